@@ -0,0 +1,24 @@
+from django.urls import path, include
+
+from api.async_views import PersonReadView, TeamReadView, async_reads
+from api.urls import router
+from api.views import PersonViewSet, TeamViewSet
+
+# Same routes as api.urls, with the list and detail reads of persons and teams served by async views
+urlpatterns = [
+    path('persons/', async_reads(
+        PersonReadView, PersonViewSet.as_view({'get': 'list', 'post': 'create'})
+    )),
+    path('persons/<int:pk>/', async_reads(
+        PersonReadView,
+        PersonViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'})
+    )),
+    path('teams/', async_reads(
+        TeamReadView, TeamViewSet.as_view({'get': 'list', 'post': 'create'})
+    )),
+    path('teams/<int:pk>/', async_reads(
+        TeamReadView,
+        TeamViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'})
+    )),
+    path('', include(router.urls)),
+]
@@ -0,0 +1,140 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+
+from api.cache import (
+    adetail_stamp, alist_stamp, aresponse_cache_key, response_timeout, set_validators, stamp_queryset, validators,
+)
+from api.metrics import label_request
+from api.readers import ValuesReader
+from api.renderers import FastJSONRenderer
+from api.replicas import acan_read_from_replica, read_from_replica
+from api.sparse import SparseFieldsMixin
+from api.views import PersonViewSet, TeamViewSet
+
+# Configuration read from the viewset, so both implementations serve the same resource
+VIEWSET_ATTRIBUTES = [
+    'queryset', 'serializer_class', 'filter_backends', 'pagination_class', 'cache_resource', 'expandable_fields',
+    'ordering', 'ordering_fields',
+]
+
+
+class AsyncReadView(SparseFieldsMixin, View):
+    """
+    Async implementation of the list and retrieve actions of ``viewset``.
+
+    The responses are the same as the viewset's, including filters, pagination, sparse fields,
+    the response cache and conditional requests, but every query and cache access is awaited
+    instead of holding a worker thread for the whole request. Responses are always JSON.
+    """
+    viewset = None
+    http_method_names = ['get', 'head']
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name in VIEWSET_ATTRIBUTES:
+            setattr(cls, name, getattr(cls.viewset, name))
+
+    def setup(self, request, *args, **kwargs):
+        super().setup(Request(request), *args, **kwargs)
+        self.paginator = self.pagination_class()
+
+    async def get(self, request, pk=None):
+        label_request(f"{self.queryset.model._meta.model_name}-{'list' if pk is None else 'retrieve'}")
+        try:
+            with read_from_replica(await acan_read_from_replica(request)):
+                if pk is None:
+                    return await self.cached_response(self.get_list_data)
+                return await self.cached_response(lambda: self.get_detail_data(pk), pk=pk)
+        except APIException as exc:
+            return self.render(exc.detail, status_code=exc.status_code)
+
+    def render(self, data, status_code=status.HTTP_200_OK):
+        response = HttpResponse(FastJSONRenderer().render(data), content_type='application/json', status=status_code)
+        response.headers['Vary'] = 'Accept'
+        return response
+
+    def get_queryset(self):
+        return self.get_read_queryset(self.queryset.all())
+
+    def filter_queryset(self, queryset):
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(self.request, queryset, self)
+        return queryset
+
+    async def get_stamp(self, pk=None):
+        if pk is None:
+            rows = stamp_queryset(self.filter_queryset(self.get_queryset()))
+            page = await self.pagination_class().apaginate_queryset(rows, self.request, view=self)
+            if page is None:
+                page = [row async for row in rows]
+            version, last_modified = await alist_stamp(page, self.cache_resource)
+        else:
+            version, last_modified = await adetail_stamp(self.get_queryset(), pk)
+        return validators(self.cache_resource, version, last_modified, self.request)
+
+    async def cached_response(self, build, pk=None):
+        """ Async version of ``CachedResponseMixin.cached_response``, sharing its cache entries. """
+        key = await aresponse_cache_key(self.cache_resource, self.request, pk)
+        entry = await cache.aget(key)
+        if entry is None:
+            etag, last_modified = await self.get_stamp(pk)
+        else:
+            etag, last_modified, data = entry
+
+        response = get_conditional_response(self.request, etag=etag, last_modified=last_modified)
+        if response is None:
+            if entry is None:
+                data = await build()
+                if data is None:
+                    return self.render({'detail': 'Not found.'}, status_code=status.HTTP_404_NOT_FOUND)
+                await cache.aset(key, (etag, last_modified, data), response_timeout())
+            response = self.render(data)
+        return set_validators(response, etag, last_modified)
+
+    async def get_list_data(self):
+        reader = ValuesReader(self.get_read_serializer())
+        queryset = reader.values(self.filter_queryset(self.get_queryset()))
+        page = await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+        if page is not None:
+            return self.paginator.get_paginated_response(await reader.arepresent(page)).data
+
+        return await reader.arepresent([row async for row in queryset])
+
+    async def get_detail_data(self, pk):
+        reader = ValuesReader(self.get_read_serializer())
+        row = await reader.values(self.get_queryset().filter(pk=pk)).afirst()
+        if row is None:
+            return None
+        data = await reader.arepresent([row])
+        return data[0]
+
+
+class PersonReadView(AsyncReadView):
+    viewset = PersonViewSet
+
+
+class TeamReadView(AsyncReadView):
+    viewset = TeamViewSet
+
+
+def async_reads(read_view, viewset_view):
+    """
+    Serve GET and HEAD with the async ``read_view`` and every other method with the DRF ``viewset_view``.
+    """
+    read = read_view.as_view()
+    write = sync_to_async(viewset_view)
+
+    async def view(request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            return await read(request, *args, **kwargs)
+        return await write(request, *args, **kwargs)
+
+    # Like DRF views, and without the csrf_exempt decorator which hides coroutines before Django 5.0
+    view.csrf_exempt = True
+    return view
@@ -0,0 +1,138 @@
+import logging
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.permissions import SAFE_METHODS
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """ Raised when a request runs more queries than the budget of its viewset action. """
+
+    def __init__(self, view, action, budget, queries):
+        self.budget = budget
+        self.queries = queries
+        listing = '\n'.join(f'{number}. {sql}' for number, sql in enumerate(queries, 1))
+        super().__init__(
+            f"{view.__name__}.{action} ran {len(queries)} queries, over its budget of {budget}:\n{listing}"
+        )
+
+
+def query_budget(view, action):
+    """ Return the number of queries ``action`` of the ``view`` viewset may run, or ``None`` without a budget. """
+    return getattr(view, 'query_budgets', {}).get(action)
+
+
+def is_batched(view, action):
+    """
+    Whether the queries of ``action`` grow with the number of items in the request, like bulk writes.
+
+    Their budget holds for requests that fit in one statement per write, as written by the tests.
+    """
+    return action in getattr(view, 'batched_actions', ())
+
+
+def viewset_action(request):
+    """ Return the viewset and the action that served ``request``, or ``(None, None)`` for other views. """
+    view = getattr(request.resolver_match, 'func', None)
+    actions = getattr(view, 'actions', None)
+    if not actions or request.method.lower() not in actions:
+        return None, None
+    return view.cls, actions[request.method.lower()]
+
+
+# Transaction control is not counted: an atomic block begins a transaction in a request, but only sets a
+# savepoint inside the transaction every test runs in
+TRANSACTION_STATEMENTS = ('BEGIN', 'SAVEPOINT ', 'RELEASE SAVEPOINT ', 'ROLLBACK TO SAVEPOINT ')
+
+
+class QueryRecorder:
+    """ Execute wrapper keeping the SQL of the queries run through the connections it is installed on. """
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.startswith(TRANSACTION_STATEMENTS):
+            self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    @contextmanager
+    def recording(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+
+def check_query_budget(view, action, queries):
+    budget = query_budget(view, action)
+    if budget is not None and len(queries) > budget:
+        raise QueryBudgetExceeded(view, action, budget, queries)
+
+
+class QueryBudgetTestMixin:
+    """
+    Test case mixin checking that requests stay within the query budgets of the viewsets.
+
+        with self.assertWithinQueryBudget(PersonViewSet, 'list'):
+            self.client.get('/api/v1/persons/')
+
+    Streamed responses must be consumed in the block, since their queries run while they are read.
+    """
+
+    @contextmanager
+    def assertWithinQueryBudget(self, view, action):
+        if query_budget(view, action) is None:
+            self.fail(f"{view.__name__}.{action} has no query budget.")
+        with QueryRecorder().recording() as recorder:
+            yield recorder
+        try:
+            check_query_budget(view, action, recorder.queries)
+        except QueryBudgetExceeded as exc:
+            self.fail(str(exc))
+
+
+class QueryBudgetMiddleware:
+    """
+    Fails the reads from viewset actions that run more queries than their ``query_budgets``.
+
+    Meant for development (``API_QUERY_BUDGETS``, on with ``DEBUG``): an N+1 query pattern then
+    shows up as an error with the list of queries as soon as the endpoint is tried. Writes over
+    their budget are already committed, so they are logged as a warning and marked with a
+    ``Query-Budget-Exceeded`` header instead. Only requests served by sync viewsets are checked,
+    actions listed in ``batched_actions`` are not, and queries run while a response is streamed
+    are not counted.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.API_QUERY_BUDGETS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.get_response(request)
+        with QueryRecorder().recording() as recorder:
+            response = self.get_response(request)
+
+        view, action = viewset_action(request)
+        if view is None or is_batched(view, action):
+            return response
+        try:
+            check_query_budget(view, action, recorder.queries)
+        except QueryBudgetExceeded as exc:
+            if request.method in SAFE_METHODS:
+                raise
+            logger.warning("%s", exc)
+            response['Query-Budget-Exceeded'] = f'{len(exc.queries)} queries, budget {exc.budget}'
+        return response
@@ -0,0 +1,161 @@
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from api.cache import invalidate, mark_deleted
+from api.serializers import UNIQUE_EMAIL_ERROR, PersonBulkItem
+from teams.models import Change, Membership, Person, Team
+from teams.signals import record_changes, suspend_handlers, touch_teams, uncount_memberships
+
+BULK_BATCH_SIZE = 1000
+UPSERT_FIELDS = ['first_name', 'last_name', 'updated_at']
+BULK_WRITE_ATTEMPTS = 2
+
+
+def _ids_by_email(emails):
+    return dict(Person.objects.filter(email__in=emails).values_list('email', 'id'))
+
+
+def _team_ids_of(person_ids):
+    return list(
+        Membership.objects.filter(person_id__in=person_ids).values_list('team_id', flat=True).distinct()
+    )
+
+
+class BulkResult:
+    """ Outcome of a bulk request: IDs written per kind and validation errors per item index. """
+
+    def __init__(self, errors=()):
+        self.created = []
+        self.updated = []
+        self.deleted = []
+        self.errors = list(errors)
+        # Set when nothing could be written, like an atomic request with errors
+        self.rolled_back = False
+
+    def add_error(self, index, errors):
+        self.errors.append({'index': index, 'errors': errors})
+
+    @property
+    def data(self):
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'deleted': self.deleted,
+            'errors': sorted(self.errors, key=lambda error: error['index']),
+        }
+
+
+def _validate_items(items, result):
+    """ Validate every item on its own, then check email uniqueness inside the batch. """
+    valid = {}
+    seen_emails = set()
+    for index, item in enumerate(items):
+        serializer = PersonBulkItem(data=item)
+        if not serializer.is_valid():
+            result.add_error(index, serializer.errors)
+            continue
+
+        email = serializer.validated_data['email']
+        if email in seen_emails:
+            result.add_error(index, {'email': ["Duplicate email in this batch."]})
+            continue
+
+        seen_emails.add(email)
+        valid[index] = serializer.validated_data
+    return valid
+
+
+def bulk_write_persons(operation, items=None, ids=None, atomic=False):
+    """
+    Create, upsert (by email) or delete many persons at once.
+
+    Email uniqueness is checked for the whole batch with a single ``IN`` query and all writes
+    happen in one transaction. Invalid items are reported in ``errors`` while the valid ones
+    are still written, unless ``atomic`` is set, in which case nothing is written at all.
+
+    An email taken by a concurrent request between the check and the insert fails the insert.
+    The emails are then read again, which makes the item an update when upserting and an error
+    when creating. If that happens again, nothing is written and the items whose email is taken
+    are reported like a duplicate email.
+    """
+    if operation == 'delete':
+        return _bulk_delete(ids, atomic, BulkResult())
+
+    invalid = BulkResult()
+    valid = _validate_items(items, invalid)
+    emails = [data['email'] for data in valid.values()]
+    for _ in range(BULK_WRITE_ATTEMPTS):
+        try:
+            return _bulk_write(operation, valid, atomic, BulkResult(invalid.errors))
+        except IntegrityError:
+            taken = set(Person.objects.filter(email__in=emails).values_list('email', flat=True))
+            if not taken:
+                raise
+
+    result = BulkResult(invalid.errors)
+    result.rolled_back = True
+    for index, data in valid.items():
+        if data['email'] in taken:
+            result.add_error(index, UNIQUE_EMAIL_ERROR)
+    return result
+
+
+def _bulk_write(operation, valid, atomic, result):
+    existing = _ids_by_email([data['email'] for data in valid.values()])
+
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    for index, data in valid.items():
+        person_id = existing.get(data['email'])
+        if person_id is None:
+            to_create.append(Person(**data))
+        elif operation == 'upsert':
+            to_update.append(Person(id=person_id, updated_at=now, **data))
+        else:
+            result.add_error(index, UNIQUE_EMAIL_ERROR)
+
+    if atomic and result.errors:
+        result.rolled_back = True
+        return result
+
+    with transaction.atomic():
+        Person.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+        Person.objects.bulk_update(to_update, UPSERT_FIELDS, batch_size=BULK_BATCH_SIZE)
+
+        record_changes(Change.CREATE, to_create)
+        record_changes(Change.UPDATE, to_update)
+
+        result.created = [person.id for person in to_create]
+        result.updated = [person.id for person in to_update]
+        if to_create or to_update:
+            invalidate('persons', result.updated)
+        if to_update:
+            team_ids = _team_ids_of(result.updated)
+            touch_teams(team_ids)
+            invalidate('teams', team_ids)
+    return result
+
+
+def _bulk_delete(ids, atomic, result):
+    found = set(Person.objects.filter(id__in=ids).values_list('id', flat=True))
+    for index, person_id in enumerate(ids):
+        if person_id not in found:
+            result.add_error(index, {'id': ["Person with the given ID not found."]})
+
+    if atomic and result.errors:
+        result.rolled_back = True
+        return result
+
+    with transaction.atomic(), suspend_handlers():
+        team_ids = _team_ids_of(found)
+        uncount_memberships(Membership.objects.filter(person_id__in=found), Team)
+        Person.objects.filter(id__in=found).delete()
+        record_changes(Change.DELETE, [Person(id=person_id) for person_id in found])
+
+        result.deleted = sorted(found)
+        if found:
+            invalidate('persons', result.deleted)
+            invalidate('teams', team_ids)
+            mark_deleted('persons')
+    return result
@@ -0,0 +1,228 @@
+import hashlib
+from calendar import timegm
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+
+from api.readers import ValuesReader
+from api.replicas import reading_from_replica
+
+
+def _version_key(resource, pk=None):
+    return f"api:version:{resource}:{'list' if pk is None else pk}"
+
+
+def _deleted_key(resource):
+    return f"api:deleted_at:{resource}"
+
+
+def _get_versions(keys):
+    versions = cache.get_many(keys)
+    missing = {key: uuid4().hex for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+async def _aget_versions(keys):
+    versions = await cache.aget_many(keys)
+    missing = {key: uuid4().hex for key in keys if key not in versions}
+    if missing:
+        await cache.aset_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def _bump_versions(keys):
+    cache.set_many({key: uuid4().hex for key in keys}, timeout=None)
+
+
+def invalidate(resource, pks=()):
+    """
+    Invalidate the cached lists of ``resource`` and the cached details of the objects in ``pks``.
+
+    Versions are bumped right away and once more when the surrounding transaction commits, so that
+    a response built from uncommitted state by a concurrent request is never served afterwards.
+    """
+    keys = [_version_key(resource)] + [_version_key(resource, pk) for pk in pks]
+    _bump_versions(keys)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _bump_versions(keys))
+
+
+def mark_deleted(resource):
+    """ Remember when an object of ``resource`` was last deleted, since deletes leave no ``updated_at`` behind. """
+    cache.set(_deleted_key(resource), timezone.now(), timeout=None)
+
+
+def _last_deleted(resource):
+    # Without a record the last delete time is unknown, so it is assumed to be now
+    cache.add(_deleted_key(resource), timezone.now(), timeout=None)
+    return cache.get(_deleted_key(resource))
+
+
+async def _alast_deleted(resource):
+    await cache.aadd(_deleted_key(resource), timezone.now(), timeout=None)
+    return await cache.aget(_deleted_key(resource))
+
+
+def _response_key(resource, request, pk, version):
+    url = hashlib.sha1(request.build_absolute_uri().encode()).hexdigest()
+    return f"api:response:{resource}:{'list' if pk is None else pk}:{version}:{url}"
+
+
+def response_cache_key(resource, request, pk=None):
+    versions = _get_versions([_version_key(resource, pk)])
+    return _response_key(resource, request, pk, versions[0])
+
+
+async def aresponse_cache_key(resource, request, pk=None):
+    versions = await _aget_versions([_version_key(resource, pk)])
+    return _response_key(resource, request, pk, versions[0])
+
+
+def stamp_queryset(queryset):
+    """
+    Return ``queryset`` as the values a list stamp is computed from: the ID and ``updated_at`` of each row.
+
+    The columns it is ordered by are selected too, so that a paginator can cut it into the same
+    pages as the list.
+    """
+    ordering = [name.lstrip('-') for name in queryset.query.order_by if isinstance(name, str)]
+    return queryset.prefetch_related(None).values(*dict.fromkeys(['id', 'updated_at'] + ordering))
+
+
+def _rows_stamp(rows):
+    digest = hashlib.sha1()
+    for row in rows:
+        digest.update(f"{row['id']}:{row['updated_at'].isoformat()}\n".encode())
+    return digest.hexdigest(), max([row['updated_at'] for row in rows], default=None)
+
+
+def list_stamp(rows, resource):
+    """
+    Return the ``(version, last_modified)`` of a list page from the rows of ``stamp_queryset`` on it.
+
+    The version hashes the IDs and modification times of the rows, so it changes when one of them
+    changes or when a row enters or leaves the page. Last-Modified only sees deletes through the
+    time of the last delete.
+    """
+    version, last_modified = _rows_stamp(rows)
+    return version, max(filter(None, [last_modified, _last_deleted(resource)]))
+
+
+async def alist_stamp(rows, resource):
+    version, last_modified = _rows_stamp(rows)
+    return version, max(filter(None, [last_modified, await _alast_deleted(resource)]))
+
+
+def detail_stamp(queryset, pk):
+    """ Return the ``(version, last_modified)`` of a single object, or ``(None, None)`` if it does not exist. """
+    last_modified = queryset.filter(pk=pk).values_list('updated_at', flat=True).first()
+    if last_modified is None:
+        return None, None
+    return last_modified.isoformat(), last_modified
+
+
+async def adetail_stamp(queryset, pk):
+    last_modified = await queryset.filter(pk=pk).values_list('updated_at', flat=True).afirst()
+    if last_modified is None:
+        return None, None
+    return last_modified.isoformat(), last_modified
+
+
+def response_timeout():
+    """
+    Return how long a response built now may be cached.
+
+    A replica may not have applied a write yet when the write invalidates the cache, so responses
+    read from it are kept no longer than the replication lag instead of until the next write.
+    """
+    if reading_from_replica():
+        return min(settings.API_CACHE_TIMEOUT, settings.REPLICA_MAX_LAG_SECONDS)
+    return settings.API_CACHE_TIMEOUT
+
+
+def validators(resource, version, last_modified, request):
+    """ Return the ETag and the Last-Modified timestamp of a response, or ``(None, None)`` without a version. """
+    if version is None:
+        return None, None
+
+    representation = '\n'.join([
+        resource, version, request.build_absolute_uri(), request.META.get('HTTP_ACCEPT', '')
+    ])
+    return f'"{hashlib.sha1(representation.encode()).hexdigest()}"', timegm(last_modified.utctimetuple())
+
+
+def set_validators(response, etag, last_modified):
+    if etag:
+        response.headers['ETag'] = etag
+    if last_modified:
+        response.headers['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+class CachedResponseMixin:
+    """
+    Serves the data of the read actions from the cache and answers conditional GETs.
+
+    Cache keys embed the current version of the list or of the object, so writes never have to
+    find the stale entries: bumping the version through ``invalidate`` makes them unreachable.
+    Each entry keeps the ETag and Last-Modified computed when it was built, so a cached
+    ``304 Not Modified`` costs no query at all.
+    """
+    cache_resource = None
+
+    def get_stamp(self, pk=None):
+        if pk is None:
+            # Only the rows of the requested page are read, with a separate paginator
+            rows = stamp_queryset(self.filter_queryset(self.get_queryset()))
+            page = self.pagination_class().paginate_queryset(rows, self.request, view=self)
+            version, last_modified = list_stamp(rows if page is None else page, self.cache_resource)
+        else:
+            version, last_modified = detail_stamp(self.get_queryset(), pk)
+        return validators(self.cache_resource, version, last_modified, self.request)
+
+    def cached_response(self, build, pk=None):
+        if pk is not None:
+            try:
+                pk = int(pk)
+            except ValueError:
+                return Response(build(), status=status.HTTP_200_OK)
+
+        key = response_cache_key(self.cache_resource, self.request, pk)
+        entry = cache.get(key)
+        if entry is None:
+            # The stamp is taken before the data is built so it can only be older than the data
+            etag, last_modified = self.get_stamp(pk)
+        else:
+            etag, last_modified, data = entry
+
+        response = get_conditional_response(self.request, etag=etag, last_modified=last_modified)
+        if response is None:
+            if entry is None:
+                data = build()
+                cache.set(key, (etag, last_modified, data), response_timeout())
+            response = Response(data, status=status.HTTP_200_OK)
+        return set_validators(response, etag, last_modified)
+
+    def get_read_serializer(self, *args, **kwargs):
+        return self.serializer_class(*args, **kwargs)
+
+    def get_list_data(self):
+        # Lists are read as plain values, which gives the serializer's output at a fraction of its cost
+        reader = ValuesReader(self.get_read_serializer())
+        queryset = reader.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(reader.represent(page)).data
+
+        return reader.represent(queryset)
@@ -0,0 +1,64 @@
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+from api.readers import ValuesReader
+from api.renderers import FastJSONRenderer
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FLUSH_SIZE = 100
+
+
+def _rendered_batches(queryset, serializer, chunk_size, flush_size):
+    encoder = FastJSONRenderer()
+    reader = ValuesReader(serializer)
+    rows = reader.values(queryset).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = reader.represent(islice(rows, chunk_size))
+        if not chunk:
+            return
+        for start in range(0, len(chunk), flush_size):
+            yield [encoder.render(item) for item in chunk[start:start + flush_size]]
+
+
+def _ndjson_stream(batches):
+    for batch in batches:
+        yield b'\n'.join(batch) + b'\n'
+
+
+def _json_array_stream(batches):
+    yield b'['
+    separator = b''
+    for batch in batches:
+        yield separator + b','.join(batch)
+        separator = b','
+    yield b']'
+
+
+async def _async_stream(stream):
+    # Each chunk is produced in the sync thread, where the cursor and its connection live
+    read = sync_to_async(next)
+    while (chunk := await read(stream, None)) is not None:
+        yield chunk
+
+
+def stream_export(queryset, serializer, request, chunk_size=EXPORT_CHUNK_SIZE, flush_size=EXPORT_FLUSH_SIZE):
+    """
+    Stream every row of ``queryset`` to the client without building the whole payload in memory.
+
+    Rows are read as values through a server-side cursor ``chunk_size`` at a time, represented
+    like ``serializer`` would and flushed every ``flush_size`` rows, either as NDJSON or as a JSON
+    array depending on the renderer negotiated for ``request``. Over ASGI the stream is an async
+    iterator, since Django reads a sync one whole before sending it.
+    """
+    renderer = request.accepted_renderer
+    batches = _rendered_batches(queryset, serializer, chunk_size, flush_size)
+    if renderer.format == 'ndjson':
+        stream = _ndjson_stream(batches)
+    else:
+        stream = _json_array_stream(batches)
+    if isinstance(request._request, ASGIRequest):
+        stream = _async_stream(stream)
+    return StreamingHttpResponse(stream, content_type=renderer.media_type)
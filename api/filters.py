@@ -0,0 +1,80 @@
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+
+
+class QueryParameterFilter(BaseFilterBackend):
+    """
+    Filters a queryset by the query parameters listed in ``parameters``.
+
+    Each entry maps a query parameter to the method that applies it and its description. Lookups
+    are case-insensitive and are backed by the indexes of the ``0004_search_indexes`` migration.
+    """
+    parameters = {}
+
+    def filter_queryset(self, request, queryset, view):
+        for parameter, (method, description) in self.parameters.items():
+            value = request.query_params.get(parameter)
+            if value:
+                queryset = getattr(self, method)(queryset, value)
+        return queryset
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': parameter,
+                'required': False,
+                'in': 'query',
+                'description': description,
+                'schema': {
+                    'type': 'string',
+                },
+            }
+            for parameter, (method, description) in self.parameters.items()
+        ]
+
+
+class PersonFilter(QueryParameterFilter):
+    parameters = {
+        'name': ('filter_name', 'Return persons whose first or last name starts with this value.'),
+        'email': ('filter_email', 'Return the person with this email.'),
+        'team': ('filter_team', 'Return the members of the team with this ID.'),
+    }
+
+    def filter_name(self, queryset, value):
+        return queryset.filter(Q(first_name__istartswith=value) | Q(last_name__istartswith=value))
+
+    def filter_email(self, queryset, value):
+        return queryset.filter(email__iexact=value)
+
+    def filter_team(self, queryset, value):
+        try:
+            team_id = int(value)
+        except ValueError:
+            raise ValidationError({'team': ["A valid integer is required."]})
+        return queryset.filter(teams__id=team_id)
+
+
+class TeamFilter(QueryParameterFilter):
+    parameters = {
+        'name': ('filter_name', 'Return teams whose name starts with this value.'),
+    }
+
+    def filter_name(self, queryset, value):
+        return queryset.filter(name__istartswith=value)
+
+
+class StableOrderingFilter(OrderingFilter):
+    """
+    Orders by ``?ordering=`` over the view's ``ordering_fields``, with the primary key as tiebreaker.
+
+    The keyset paginator takes its position from all the ordering fields, which needs a total order
+    to return stable pages. The tiebreaker follows the direction of the first field, so a
+    ``(field, id)`` index serves both directions.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view))
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering.append('-id' if ordering[0].startswith('-') else 'id')
+        return ordering
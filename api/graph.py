@@ -0,0 +1,41 @@
+from django.db.models import Count
+
+from teams.models import Membership, Person, Team
+
+
+def teams_of(person_id):
+    """ Teams ``person_id`` is a member of, read through the (person, team) index. """
+    return Team.objects.filter(membership__person_id=person_id)
+
+
+def co_members(person_id):
+    """
+    Persons sharing at least one team with ``person_id``, annotated with the number of teams they share.
+
+    The teams of the person are read through the (person, team) index and their members through
+    the unique (team, person) one, all in a single grouped query.
+    """
+    teams = Membership.objects.filter(person_id=person_id).values('team_id')
+    return (
+        Person.objects.filter(membership__team_id__in=teams)
+        .exclude(pk=person_id)
+        .annotate(shared_teams=Count('membership'))
+    )
+
+
+def common_members(team_id, other_team_id):
+    """ Members of both teams: the members of ``team_id`` found in the unique (team, person) index of the other. """
+    return Person.objects.filter(
+        membership__team_id=team_id,
+        pk__in=Membership.objects.filter(team_id=other_team_id).values('person_id'),
+    )
+
+
+def overlapping_teams(team_id):
+    """ Teams sharing at least one member with ``team_id``, annotated with the number of members they share. """
+    members = Membership.objects.filter(team_id=team_id).values('person_id')
+    return (
+        Team.objects.filter(membership__person_id__in=members)
+        .exclude(pk=team_id)
+        .annotate(shared_members=Count('membership'))
+    )
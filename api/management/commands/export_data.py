@@ -0,0 +1,50 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.transfer import COLUMNS, FORMATS, TRANSFER_BATCH_SIZE, export_rows, write_rows
+
+
+def file_format(path, format):
+    """ Return ``format``, or the format given by the extension of ``path``, CSV by default. """
+    if format:
+        return format
+    extension = os.path.splitext(path)[1].lstrip('.').lower()
+    return 'ndjson' if extension in ('ndjson', 'jsonl') else 'csv'
+
+
+class Command(BaseCommand):
+    help = "Export persons, teams or memberships as CSV or NDJSON, streamed from the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('resource', choices=list(COLUMNS), help="What to export.")
+        parser.add_argument('path', nargs='?', default='-', help="File to write, or - for the standard output.")
+        parser.add_argument(
+            '--format', choices=FORMATS, help="Format of the file; by default given by its extension, else CSV."
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=TRANSFER_BATCH_SIZE, help="Number of rows read from the database at once."
+        )
+
+    def handle(self, *args, resource, path, format, batch_size, verbosity, **options):
+        format = file_format(path, format)
+        rows = self.reporting(export_rows(resource, batch_size), resource, batch_size, verbosity)
+        if path == '-':
+            # Rows are written with their own line endings, which the output must not add to
+            self.stdout.ending = ''
+            write_rows(self.stdout, format, COLUMNS[resource], rows)
+        else:
+            with open(path, 'w', newline='', encoding='utf-8') as file:
+                write_rows(file, format, COLUMNS[resource], rows)
+
+    def reporting(self, rows, resource, batch_size, verbosity):
+        """ Pass ``rows`` through, writing the progress to the standard error every ``batch_size`` rows. """
+        start = time.perf_counter()
+        count = 0
+        for count, row in enumerate(rows, 1):
+            yield row
+            if verbosity >= 2 and count % batch_size == 0:
+                self.stderr.write(f"{count} {resource} exported ({count / (time.perf_counter() - start):.0f}/s)")
+        if verbosity >= 1:
+            self.stderr.write(f"Exported {count} {resource} in {time.perf_counter() - start:.1f}s.", self.style.SUCCESS)
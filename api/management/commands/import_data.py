@@ -0,0 +1,69 @@
+import io
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.management.commands.export_data import file_format
+from api.transfer import COLUMNS, FORMATS, MODES, TRANSFER_BATCH_SIZE, import_rows, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Import persons, teams or memberships from a CSV or NDJSON file in batches, "
+        "with the validation rules of the API."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('resource', choices=list(COLUMNS), help="What to import.")
+        parser.add_argument('path', help="File to read, or - for the standard input.")
+        parser.add_argument(
+            '--format', choices=FORMATS, help="Format of the file; by default given by its extension, else CSV."
+        )
+        parser.add_argument(
+            '--mode', choices=MODES, default='upsert',
+            help="Whether existing persons, teams and memberships are updated (upsert) or left as they are (create).",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=TRANSFER_BATCH_SIZE, help="Number of rows written per transaction."
+        )
+        parser.add_argument(
+            '--copy', action='store_true', help="Load the rows with COPY on PostgreSQL instead of one executemany."
+        )
+
+    def handle(self, *args, resource, path, format, mode, batch_size, copy, verbosity, **options):
+        format = file_format(path, format)
+        copy = copy and connection.vendor == 'postgresql'
+        start = time.perf_counter()
+
+        def progress(result):
+            if verbosity >= 2:
+                self.stderr.write(
+                    f"{result.read} rows read, {result.created} created, {result.updated} updated, "
+                    f"{result.invalid} invalid ({result.read / (time.perf_counter() - start):.0f} rows/s)"
+                )
+
+        if path == '-':
+            # Read the standard input like the files below, so that line breaks in quoted CSV values are kept
+            stdin = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline='')
+            try:
+                result = import_rows(resource, read_rows(stdin, format), mode, batch_size, copy, progress)
+            finally:
+                stdin.detach()
+        else:
+            try:
+                file = open(path, newline='', encoding='utf-8')
+            except OSError as exc:
+                raise CommandError(f"Cannot read {path}: {exc.strerror}.")
+            with file:
+                result = import_rows(resource, read_rows(file, format), mode, batch_size, copy, progress)
+
+        for error in result.errors:
+            self.stderr.write(f"Line {error['line']}: {error['errors']}")
+        if result.invalid > len(result.errors):
+            self.stderr.write(f"... and {result.invalid - len(result.errors)} more invalid rows.")
+        self.stdout.write(
+            f"{resource.capitalize()}: {result.created} created, {result.updated} updated, "
+            f"{result.skipped} skipped, {result.invalid} invalid in {time.perf_counter() - start:.1f}s."
+        )
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from api.cache import invalidate
+from teams.models import Membership, Person, Team
+from teams.signals import COUNTERS, MEMBERSHIP_COLUMNS
+
+RESOURCES = {Team: 'teams', Person: 'persons'}
+
+
+def actual_count(model):
+    """ Subquery counting the memberships of the outer ``model`` object. """
+    column = MEMBERSHIP_COLUMNS[model]
+    return Coalesce(Subquery(
+        Membership.objects.filter(**{column: OuterRef('pk')}).order_by()
+        .values(column).annotate(count=Count('pk')).values('count')
+    ), 0)
+
+
+def repair_counters(model, batch_size, dry_run=False):
+    """
+    Compare the counter of every ``model`` object with its memberships, fix the drifted ones and return their IDs.
+
+    Objects are checked by ranges of ``batch_size`` primary keys, each in its own transaction, and
+    only the drifted ones are written, so a run over correct counters writes nothing.
+    """
+    counter = COUNTERS[model]
+    last_pk = model.objects.aggregate(last=Max('pk'))['last'] or 0
+    drifted = []
+    for start in range(0, last_pk + 1, batch_size):
+        batch = model.objects.filter(pk__gte=start, pk__lt=start + batch_size)
+        with transaction.atomic():
+            pks = list(
+                batch.annotate(actual=actual_count(model)).exclude(**{counter: F('actual')}).values_list('pk', flat=True)
+            )
+            if pks and not dry_run:
+                model.objects.filter(pk__in=pks).update(**{counter: actual_count(model)}, updated_at=timezone.now())
+                invalidate(RESOURCES[model], pks)
+        drifted.extend(pks)
+    return drifted
+
+
+class Command(BaseCommand):
+    help = "Recompute the member count of every team and the team count of every person, and repair drifted ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000, help="Number of objects checked per query.")
+        parser.add_argument('--dry-run', action='store_true', help="Report the drifted counters without fixing them.")
+
+    def handle(self, *args, batch_size, dry_run, **options):
+        for model, counter in COUNTERS.items():
+            drifted = repair_counters(model, batch_size, dry_run)
+            verb = 'would be repaired' if dry_run else 'repaired'
+            self.stdout.write(f"{model._meta.verbose_name_plural.capitalize()}: {len(drifted)} {counter} {verb}.")
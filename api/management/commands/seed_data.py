@@ -0,0 +1,123 @@
+import random
+from collections import Counter
+from itertools import accumulate
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.cache import invalidate
+from teams.models import Change, Membership, Person, Team
+
+FIRST_NAMES = [
+    'Andrii', 'Bohdan', 'Daryna', 'Ivan', 'Kateryna', 'Kyrylo', 'Maria', 'Matviy', 'Oksana', 'Olena',
+    'Petro', 'Roman', 'Sofiia', 'Taras', 'Viktoria', 'Yaroslav', 'Zlata', 'Anna', 'Dmytro', 'Nazar',
+]
+LAST_NAMES = [
+    'Bondarenko', 'Boyko', 'Hrytsenko', 'Kit', 'Koval', 'Kovalenko', 'Kravchenko', 'Luxe', 'Lysenko', 'Melnyk',
+    'Moroz', 'Oliynyk', 'Petrenko', 'Rudenko', 'Savchenko', 'Shevchenko', 'Shevchuk', 'Tkachenko', 'Tkachuk', 'Vik',
+]
+
+# How the teams of a person are picked: evenly, or with the popularity of the n-th team proportional to 1/n
+DISTRIBUTIONS = ['uniform', 'zipf']
+
+
+def team_picker(team_ids, distribution, rng):
+    """ Return a function picking ``count`` distinct teams of ``team_ids`` for a person. """
+    if distribution == 'uniform':
+        return lambda count: rng.sample(team_ids, count)
+
+    cum_weights = list(accumulate(1 / rank for rank in range(1, len(team_ids) + 1)))
+
+    def pick(count):
+        picked = {}
+        while len(picked) < count:
+            picked.update(dict.fromkeys(rng.choices(team_ids, cum_weights=cum_weights, k=count - len(picked))))
+        return list(picked)
+    return pick
+
+
+def clear_data():
+    """ Delete every membership, person, team and change at once, without the signals of ``delete()``. """
+    with transaction.atomic(), connection.cursor() as cursor:
+        for model in (Membership, Person, Team, Change):
+            cursor.execute(f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)}')
+    invalidate('persons')
+    invalidate('teams')
+
+
+def generate_data(persons, teams, memberships=1, distribution='uniform', seed=0, batch_size=10000):
+    """
+    Create ``persons`` persons and ``teams`` teams, each person in ``memberships`` distinct teams.
+
+    Everything is written with ``bulk_create``, so no change is logged, and the data only depends
+    on the arguments. The member and team counts are set as they are written.
+    """
+    rng = random.Random(seed)
+    with transaction.atomic():
+        Team.objects.bulk_create(
+            (Team(name=f'Team {i:06d}', description=f'Synthetic team {i}') for i in range(teams)),
+            batch_size=batch_size,
+        )
+        team_ids = list(Team.objects.order_by('id').values_list('id', flat=True))
+        pick = team_picker(team_ids, distribution, rng)
+        count = min(memberships, len(team_ids))
+
+        member_counts = Counter()
+        for start in range(0, persons, batch_size):
+            batch = []
+            for i in range(start, min(start + batch_size, persons)):
+                person_teams = pick(count)
+                person = Person(
+                    first_name=rng.choice(FIRST_NAMES),
+                    last_name=rng.choice(LAST_NAMES),
+                    email=f'person.{i}@example.com',
+                    team_count=len(person_teams),
+                )
+                batch.append((person, person_teams))
+                member_counts.update(person_teams)
+
+            Person.objects.bulk_create([person for person, person_teams in batch])
+            Membership.objects.bulk_create(
+                (Membership(team_id=team_id, person_id=person.id) for person, person_teams in batch
+                 for team_id in person_teams),
+                batch_size=batch_size,
+            )
+
+        Team.objects.bulk_update(
+            [Team(id=team_id, member_count=members) for team_id, members in member_counts.items()],
+            ['member_count'], batch_size=batch_size,
+        )
+    invalidate('persons')
+    invalidate('teams')
+
+
+class Command(BaseCommand):
+    help = "Fill the database with synthetic persons, teams and memberships, deterministically from a seed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--persons', type=int, default=1000, help="Number of persons.")
+        parser.add_argument('--teams', type=int, default=100, help="Number of teams.")
+        parser.add_argument('--memberships', type=int, default=1, help="Number of teams of every person.")
+        parser.add_argument(
+            '--distribution', choices=DISTRIBUTIONS, default='uniform',
+            help="How teams are picked: evenly, or with a few large teams and many small ones (zipf).",
+        )
+        parser.add_argument('--seed', type=int, default=0, help="Seed of the random generator.")
+        parser.add_argument('--batch-size', type=int, default=10000, help="Number of rows per insert.")
+        parser.add_argument(
+            '--flush', action='store_true', help="Delete the existing persons, teams, memberships and changes first."
+        )
+
+    def handle(self, *args, persons, teams, memberships, distribution, seed, batch_size, flush, **options):
+        if memberships > teams:
+            raise CommandError("A person cannot be a member of more teams than there are.")
+        if distribution == 'zipf' and memberships > teams // 2:
+            raise CommandError("With the zipf distribution, persons can be members of at most half of the teams.")
+
+        if flush:
+            clear_data()
+        elif Person.objects.exists() or Team.objects.exists():
+            raise CommandError("The database already holds persons or teams; pass --flush to replace them.")
+
+        generate_data(persons, teams, memberships, distribution, seed, batch_size)
+        self.stdout.write(f"Created {persons} persons, {teams} teams and {persons * memberships} memberships.")
@@ -0,0 +1,37 @@
+from django.db import transaction
+
+from teams.models import Membership, Person
+
+
+def missing_person_ids(person_ids):
+    """ Return the IDs from ``person_ids`` that do not belong to any person, using a single query. """
+    person_ids = set(person_ids)
+    found = Person.objects.filter(id__in=person_ids).values_list('id', flat=True)
+    return sorted(person_ids.difference(found))
+
+
+def change_members(team, add=(), remove=(), replace=None):
+    """
+    Add, remove or replace the members of ``team`` and return the IDs actually added and removed.
+
+    The diff against the current members is computed in the database, restricted to the given IDs,
+    so the cost does not depend on the size of the team. Changes go through the ``members`` manager,
+    which writes them with one bulk insert and one delete and sends ``m2m_changed``.
+    """
+    memberships = Membership.objects.filter(team_id=team.pk)
+    if replace is not None:
+        add = set(replace)
+        current = set(memberships.filter(person_id__in=add).values_list('person_id', flat=True))
+        removed = sorted(memberships.exclude(person_id__in=add).values_list('person_id', flat=True))
+    else:
+        add, remove = set(add), set(remove)
+        current = set(memberships.filter(person_id__in=add | remove).values_list('person_id', flat=True))
+        removed = sorted(remove & current)
+    added = sorted(add - current)
+
+    with transaction.atomic():
+        if added:
+            team.members.add(*added)
+        if removed:
+            team.members.remove(*removed)
+    return added, removed
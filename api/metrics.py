@@ -0,0 +1,376 @@
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextvars import ContextVar
+from functools import wraps
+from uuid import uuid4
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+from api.budgets import is_batched, viewset_action
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds of the buckets of the latency histograms
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Number of queued observations from which the requests are aggregated without waiting for /metrics
+AGGREGATE_BATCH_SIZE = 1000
+
+# Seconds between two snapshots of the metrics of a process in API_METRICS_DIR
+SNAPSHOT_INTERVAL = 5
+
+# Characters of the repeated SQL kept in the duplicate queries warning
+LOGGED_SQL_LENGTH = 500
+
+SERVER_TIMING = 'total;dur=%.2f, db;dur=%.2f;desc="%d queries (%d duplicated)"'
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """ What one request spent: database queries by SQL, and time by phase (``serialize``, ``render``). """
+    __slots__ = ('start', 'route', 'queries', 'db_time', 'statements', 'timings')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.route = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = {}
+        self.timings = {}
+
+    def add_time(self, name, seconds):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def duplicates(self):
+        """ Return the number of queries that repeated an earlier SQL statement, and the most repeated one. """
+        if len(self.statements) == self.queries:
+            return 0, None
+        sql = max(self.statements, key=self.statements.get)
+        return self.queries - len(self.statements), sql
+
+
+def label_request(route):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.route = route
+
+
+def timed(name):
+    """ Decorator adding the time spent in the function to the phase ``name`` of the current request. """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            metrics = _current.get()
+            if metrics is None:
+                return func(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metrics.add_time(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def record_query(execute, sql, params, many, context):
+    """ Execute wrapper counting and timing the queries of the current request. """
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_time += time.perf_counter() - start
+        metrics.queries += 1
+        # Queries repeated with other parameters have the same SQL: the signature of N+1 queries
+        metrics.statements[sql] = metrics.statements.get(sql, 0) + 1
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    # Connections are reopened on the same wrapper object, which keeps its execute wrappers
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class _RouteStats:
+    __slots__ = ('buckets', 'count', 'duration', 'db_time', 'queries', 'duplicates', 'timings', 'size', 'statuses')
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.duration = 0.0
+        self.db_time = 0.0
+        self.queries = 0
+        self.duplicates = 0
+        self.timings = {}
+        self.size = 0
+        self.statuses = {}
+
+    def merge(self, data):
+        """ Add the stats of another process, as returned by its ``dump``. """
+        self.buckets = [count + other for count, other in zip(self.buckets, data['buckets'])]
+        for attribute in ('count', 'duration', 'db_time', 'queries', 'duplicates', 'size'):
+            setattr(self, attribute, getattr(self, attribute) + data[attribute])
+        for name, seconds in data['timings'].items():
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+        for status_code, count in data['statuses'].items():
+            self.statuses[int(status_code)] = self.statuses.get(int(status_code), 0) + count
+
+    def dump(self):
+        return {attribute: getattr(self, attribute) for attribute in self.__slots__}
+
+
+class MetricsRegistry:
+    """
+    Aggregates the metrics of the requests of this process by route and method.
+
+    Requests only queue their observations, which are aggregated by batches of
+    ``AGGREGATE_BATCH_SIZE`` or when the metrics are rendered, so a request does not wait for a lock.
+
+    With ``API_METRICS_DIR``, a process that served requests also writes its metrics to a file in
+    that directory every ``SNAPSHOT_INTERVAL`` seconds and when they are rendered, and the rendered
+    metrics are the sum of every file. All the workers of a server then report the same totals
+    whichever of them is scraped, including the requests of the workers that have exited since.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = deque()
+        self.routes = {}
+        self.snapshot_pid = None
+        self.snapshot_name = None
+
+    def observe(self, route, method, status_code, duration, metrics, duplicates, size):
+        self.pending.append((
+            route, method, status_code, duration, metrics.db_time, metrics.queries, duplicates, metrics.timings, size
+        ))
+        if len(self.pending) >= AGGREGATE_BATCH_SIZE:
+            self.aggregate()
+        if settings.API_METRICS_DIR and self.snapshot_pid != os.getpid():
+            self.start_snapshots()
+
+    def start_snapshots(self):
+        """ Write the snapshot of this process every ``SNAPSHOT_INTERVAL`` seconds from a background thread. """
+        with self.lock:
+            if self.snapshot_pid == os.getpid():
+                return
+            # Process IDs are reused, so the name of the file of a process is made unique
+            self.snapshot_pid = os.getpid()
+            self.snapshot_name = f'{self.snapshot_pid}-{uuid4().hex}.json'
+
+        def write_periodically():
+            while True:
+                time.sleep(SNAPSHOT_INTERVAL)
+                self.aggregate()
+
+        threading.Thread(target=write_periodically, name='metrics-snapshots', daemon=True).start()
+
+    def aggregate(self):
+        with self.lock:
+            while self.pending:
+                (route, method, status_code, duration, db_time, queries, duplicates, timings,
+                 size) = self.pending.popleft()
+                stats = self.routes.get((route, method))
+                if stats is None:
+                    stats = self.routes[(route, method)] = _RouteStats()
+                stats.buckets[bisect_left(LATENCY_BUCKETS, duration)] += 1
+                stats.count += 1
+                stats.duration += duration
+                stats.db_time += db_time
+                stats.queries += queries
+                stats.duplicates += duplicates
+                for name, seconds in timings.items():
+                    stats.timings[name] = stats.timings.get(name, 0.0) + seconds
+                stats.size += size
+                stats.statuses[status_code] = stats.statuses.get(status_code, 0) + 1
+            if settings.API_METRICS_DIR and self.snapshot_pid == os.getpid():
+                self.write_snapshot(settings.API_METRICS_DIR)
+
+    def write_snapshot(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, self.snapshot_name)
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump([[route, method, stats.dump()] for (route, method), stats in self.routes.items()], f)
+        os.replace(f'{path}.tmp', path)
+
+    def read_snapshots(self, directory):
+        """ Return the stats written to ``directory`` by every process, summed by route and method. """
+        routes = {}
+        for name in os.listdir(directory):
+            if not name.endswith('.json'):
+                continue
+            with open(os.path.join(directory, name)) as f:
+                snapshot = json.load(f)
+            for route, method, data in snapshot:
+                stats = routes.get((route, method))
+                if stats is None:
+                    stats = routes[(route, method)] = _RouteStats()
+                stats.merge(data)
+        return routes
+
+    def clear(self):
+        with self.lock:
+            self.pending.clear()
+            self.routes.clear()
+
+    def render(self):
+        """ Return the metrics in the Prometheus text exposition format. """
+        self.aggregate()
+        with self.lock:
+            if settings.API_METRICS_DIR:
+                routes = sorted(self.read_snapshots(settings.API_METRICS_DIR).items())
+            else:
+                routes = sorted(self.routes.items())
+            lines = []
+
+            def family(name, kind, help_text, samples):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                lines.extend(samples)
+
+            def labels(route, method, **extra):
+                pairs = {'route': route, 'method': method, **extra}
+                return ','.join(f'{key}="{_escape(value)}"' for key, value in pairs.items())
+
+            name, histogram = 'api_request_duration_seconds', []
+            for (route, method), stats in routes:
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), stats.buckets):
+                    cumulative += count
+                    histogram.append(f'{name}_bucket{{{labels(route, method, le=bound)}}} {cumulative}')
+                histogram.append(f'{name}_sum{{{labels(route, method)}}} {stats.duration!r}')
+                histogram.append(f'{name}_count{{{labels(route, method)}}} {stats.count}')
+            family(name, 'histogram', 'Wall time of the requests.', histogram)
+
+            family('api_requests_total', 'counter', 'Requests by response status.', [
+                f'api_requests_total{{{labels(route, method, status=status_code)}}} {count}'
+                for (route, method), stats in routes for status_code, count in sorted(stats.statuses.items())
+            ])
+            for name, attribute, help_text in [
+                ('api_request_db_seconds_total', 'db_time', 'Time spent running database queries.'),
+                ('api_request_queries_total', 'queries', 'Database queries.'),
+                ('api_request_duplicate_queries_total', 'duplicates',
+                 'Queries repeating the SQL of an earlier query of the same request.'),
+                ('api_response_bytes_total', 'size', 'Size of the response bodies, except streamed ones.'),
+            ]:
+                family(name, 'counter', help_text, [
+                    f'{name}{{{labels(route, method)}}} {getattr(stats, attribute)!r}'
+                    for (route, method), stats in routes
+                ])
+            family('api_request_phase_seconds_total', 'counter', 'Time spent serializing and rendering responses.', [
+                f'api_request_phase_seconds_total{{{labels(route, method, phase=phase)}}} {seconds!r}'
+                for (route, method), stats in routes for phase, seconds in sorted(stats.timings.items())
+            ])
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    """
+    Measures every request and reports it in a ``Server-Timing`` header and to ``registry``.
+
+    The wall time, the time and number of database queries, the queries repeating the SQL of an
+    earlier one (N+1 queries), the serialization and rendering time and the response size are
+    recorded per route: the viewset action for the API (``person-list``), else the URL name.
+    Disabled with ``API_METRICS = False``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.API_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.duplicates_warning = settings.API_METRICS_DUPLICATE_QUERIES_WARNING
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        duration = time.perf_counter() - metrics.start
+        duplicates, sql = metrics.duplicates()
+        route = metrics.route or getattr(request.resolver_match, 'view_name', None) or 'unmatched'
+
+        header = SERVER_TIMING % (duration * 1000, metrics.db_time * 1000, metrics.queries, duplicates)
+        for name, seconds in metrics.timings.items():
+            header += ', %s;dur=%.2f' % (name, seconds * 1000)
+        response.headers['Server-Timing'] = header
+
+        size = 0 if response.streaming else len(response.content)
+        registry.observe(route, request.method, response.status_code, duration, metrics, duplicates, size)
+        # Batched actions repeat their writes by design, one statement per batch of items
+        if duplicates >= self.duplicates_warning and not is_batched(*viewset_action(request)):
+            times = metrics.statements[sql]
+            if len(sql) > LOGGED_SQL_LENGTH:
+                sql = f'{sql[:LOGGED_SQL_LENGTH]}... ({len(sql)} characters)'
+            logger.warning("%s %s ran %d duplicate queries, %d times: %s", request.method, route, duplicates,
+                           times, sql)
+        return response
+
+
+class MetricsMixin:
+    """ Labels the metrics of the requests of a viewset with its action, e.g. ``person-list`` or ``team-bulk``. """
+
+    def initial(self, request, *args, **kwargs):
+        if self.action is not None:
+            label_request(f'{self.basename or self.queryset.model._meta.model_name}-{self.action}')
+        super().initial(request, *args, **kwargs)
+
+
+def can_read_metrics(request):
+    """ Staff users, and scrapers sending ``Authorization: Bearer <API_METRICS_TOKEN>``, may read the metrics. """
+    if request.user.is_staff:
+        return True
+    token = settings.API_METRICS_TOKEN
+    return bool(token) and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+
+
+def metrics_view(request):
+    """ Handle GET /metrics """
+    if not can_read_metrics(request):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
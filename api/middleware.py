@@ -0,0 +1,29 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+
+class ASGIUrlconfMiddleware:
+    """
+    Resolves the requests served over ASGI with ``settings.ASGI_URLCONF``.
+
+    The same project can then run under a WSGI server with the sync views and under an ASGI
+    server with the async views, without a separate settings module.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if settings.ASGI_URLCONF:
+            request.urlconf = settings.ASGI_URLCONF
+        return await self.get_response(request)
@@ -0,0 +1,152 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+TRUTHY = ('1', 'true', 'yes')
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Keyset pagination over the primary key.
+
+    Every page is fetched with ``WHERE id > <position> ORDER BY id LIMIT n`` so deep pages
+    cost the same as the first one. The whole table can still be returned in one response
+    by explicitly passing ``?unpaginated=true``.
+
+    When ordered by several fields, e.g. ``(team_count, id)``, the position holds the values of
+    all of them and pages start after it in that order, so rows sharing the first value are
+    neither skipped nor repeated however many there are.
+    """
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    unpaginated_query_param = 'unpaginated'
+    unpaginated_query_description = 'Return every result in a single response instead of a page.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        steps = self._paginate(queryset, request, view)
+        try:
+            page_queryset = next(steps)
+            steps.send(list(page_queryset))
+        except StopIteration as stop:
+            return stop.value
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """ Async version of ``paginate_queryset``, which reads the page with the async ORM. """
+        steps = self._paginate(queryset, request, view)
+        try:
+            page_queryset = next(steps)
+            steps.send([row async for row in page_queryset])
+        except StopIteration as stop:
+            return stop.value
+
+    def _paginate(self, queryset, request, view):
+        """
+        ``CursorPagination.paginate_queryset`` split around its single query.
+
+        The generator yields the queryset of the page, is sent back its rows and returns the page,
+        so the same steps serve the sync and the async paginator.
+        """
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            queryset = queryset.filter(self._get_position_filter(current_position))
+
+        # One extra row tells whether a page follows this one
+        results = yield queryset[offset:offset + self.page_size + 1]
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def _get_position_filter(self, position):
+        """ The rows that come after ``position`` in the direction of the cursor. """
+        if len(self.ordering) == 1:
+            values = [position]
+        else:
+            try:
+                values = json.loads(position)
+            except ValueError:
+                raise NotFound(self.invalid_cursor_message)
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise NotFound(self.invalid_cursor_message)
+
+        # (a, b) > (x, y) is a > x OR (a = x AND b > y), with each comparison in the field's direction
+        condition, equal = Q(), {}
+        for order, value in zip(self.ordering, values):
+            order_attr = order.lstrip('-')
+            lookup = 'lt' if self.cursor.reverse != order.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{order_attr}__{lookup}': value})
+            equal[order_attr] = value
+        return condition
+
+    def _get_position_from_instance(self, instance, ordering):
+        if len(ordering) == 1:
+            return super()._get_position_from_instance(instance, ordering)
+        if isinstance(instance, dict):
+            values = [instance[order.lstrip('-')] for order in ordering]
+        else:
+            values = [getattr(instance, order.lstrip('-')) for order in ordering]
+        return json.dumps(values, cls=DjangoJSONEncoder)
+
+    def get_page_size(self, request):
+        if request.query_params.get(self.unpaginated_query_param, '').lower() in TRUTHY:
+            return None
+        return super().get_page_size(request)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append({
+            'name': self.unpaginated_query_param,
+            'required': False,
+            'in': 'query',
+            'description': self.unpaginated_query_description,
+            'schema': {
+                'type': 'boolean',
+            },
+        })
+        return parameters
@@ -0,0 +1,85 @@
+import io
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from api.metrics import timed
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    # Dates and dataclasses go through DRF's encoder so they are formatted exactly like the stdlib renderer does
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+# UTF-8 lead bytes of U+2028 and U+2029, which JSONRenderer escapes for JavaScript
+LINE_SEPARATORS_PREFIX = b'\xe2\x80'
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer that encodes with orjson when it is installed.
+
+    The output is the same as ``JSONRenderer``'s: compact, UTF-8 and with U+2028 and U+2029
+    escaped. Only floats written with an exponent differ (``1e16`` instead of ``1e+16``), and the
+    API has no float fields. Indented output, ASCII-only output, custom encoders and values orjson
+    cannot encode (like non-string keys or integers over 64 bits) are rendered by ``JSONRenderer``.
+    """
+
+    @timed('render')
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        if (orjson is None or not self.compact or self.ensure_ascii or self.encoder_class is not JSONEncoder
+                or self.get_indent(accepted_media_type, renderer_context or {})):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(data, accepted_media_type, renderer_context)
+        if LINE_SEPARATORS_PREFIX in ret:
+            ret = ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSON parser that decodes with orjson when it is installed and the body is UTF-8.
+
+    Bodies orjson rejects are parsed again by ``JSONParser`` so errors are reported the same way.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(body), media_type, parser_context)
+
+
+class NDJSONRenderer(FastJSONRenderer):
+    """
+    Renderer which serializes a list to newline-delimited JSON, one item per line.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        if isinstance(data, dict):
+            data = [data]
+        render = super().render
+        return b''.join(render(item) + b'\n' for item in data)
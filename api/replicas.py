@@ -0,0 +1,99 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_ALIAS = 'replica'
+
+# Signed cookie set on the responses to writes, which sends the client's next reads to the primary
+WROTE_COOKIE = 'api_wrote'
+WROTE_COOKIE_SALT = 'api.replicas.wrote'
+
+_read_alias = ContextVar('read_alias', default=DEFAULT_DB_ALIAS)
+
+
+def replica_configured():
+    return settings.REPLICA_READS
+
+
+def reading_from_replica():
+    return _read_alias.get() != DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def read_from_replica(enabled=True):
+    """ Send the reads made inside the block to the replica, when one is configured and ``enabled`` is true. """
+    token = _read_alias.set(REPLICA_ALIAS if enabled and replica_configured() else DEFAULT_DB_ALIAS)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def can_read_from_replica(request):
+    """
+    Whether the reads of ``request`` may be served by the replica.
+
+    The client must not have written in the last ``REPLICA_MAX_LAG_SECONDS``, which the replica
+    may not have applied yet, and the primary must not be in a transaction whose writes the
+    replica can't see.
+    """
+    return (
+        replica_configured()
+        and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+        and request.get_signed_cookie(
+            WROTE_COOKIE, default=None, salt=WROTE_COOKIE_SALT, max_age=settings.REPLICA_MAX_LAG_SECONDS
+        ) is None
+    )
+
+
+async def acan_read_from_replica(request):
+    # The transaction state belongs to the connection of the thread the queries run in
+    return replica_configured() and await sync_to_async(can_read_from_replica)(request)
+
+
+def remember_write(response):
+    response.set_signed_cookie(
+        WROTE_COOKIE, '1', salt=WROTE_COOKIE_SALT, max_age=settings.REPLICA_MAX_LAG_SECONDS,
+        httponly=True, samesite='Lax',
+    )
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends the reads of ``read_from_replica`` blocks to the replica and every other query to the primary.
+
+    Reads outside such blocks, including those made while handling a write, stay on the primary
+    so they see the data they are about to change. Objects loaded from the replica are also saved
+    to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, REPLICA_ALIAS}
+
+
+class ReplicaReadsMixin:
+    """
+    Serves ``replica_actions`` from the read replica, except for clients that wrote recently.
+
+    Successful writes set a signed cookie for ``REPLICA_MAX_LAG_SECONDS``, during which the
+    client's reads stay on the primary and see its own writes despite the replication lag.
+    """
+    replica_actions = ('list', 'retrieve')
+
+    def dispatch(self, request, *args, **kwargs):
+        action = self.action_map.get(request.method.lower())
+        with read_from_replica(action in self.replica_actions and can_read_from_replica(request)):
+            response = super().dispatch(request, *args, **kwargs)
+
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400 and replica_configured():
+            remember_write(response)
+        return response
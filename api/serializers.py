@@ -1,30 +1,88 @@
+from contextlib import nullcontext
+
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
-from teams.models import Person, Team
-from rest_framework.validators import UniqueValidator
+from api.metrics import timed
+from teams.models import Change, Membership, Person, Team
 import re
 
 NAME_FORMAT = r"^[a-zA-Zа-яА-ЯЁёіІїЇ]+$"
+# Compiled once, names are matched against it for every person written
+NAME_PATTERN = re.compile(NAME_FORMAT)
+UNIQUE_EMAIL_ERROR = {'email': ["This field must be unique."]}
+
+
+class SparseFieldsSerializer(serializers.ModelSerializer):
+    """
+    Model serializer that can return a subset of its fields.
+
+    Only the fields listed in ``fields`` are kept, and the nested relations listed in ``compact``
+    are returned as arrays of primary keys instead of embedded objects.
+    """
+
+    def __init__(self, *args, fields=None, compact=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        for name in compact:
+            if name in self.fields:
+                self.fields[name] = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+
+    @property
+    @timed('serialize')
+    def data(self):
+        return super().data
 
 
-class PersonSerializer(serializers.ModelSerializer):
-    email = serializers.EmailField(validators=[UniqueValidator(queryset=Person.objects.all())])
+class PersonSerializer(SparseFieldsSerializer):
+    """
+    Person payload.
+
+    Email uniqueness is left to the unique constraint of the table instead of a query before each
+    write: a duplicate fails the insert or update, which is reported with the same error as a
+    ``UniqueValidator`` would.
+    """
+    email = serializers.EmailField(max_length=254)
 
     class Meta:
         model = Person
         fields = '__all__'
 
     def validate_first_name(self, value: str) -> str:
-        if not re.match(NAME_FORMAT, value):
+        if not NAME_PATTERN.match(value):
             raise serializers.ValidationError("First name can only contain letters.")
         return value
 
     def validate_last_name(self, value: str) -> str:
-        if not re.match(NAME_FORMAT, value):
+        if not NAME_PATTERN.match(value):
             raise serializers.ValidationError("Last name can only contain letters.")
         return value
 
+    def create(self, validated_data):
+        return self._save_unique(super().create, validated_data)
+
+    def update(self, instance, validated_data):
+        return self._save_unique(super().update, instance, validated_data)
+
+    def _save_unique(self, save, *args):
+        validated_data = args[-1]
+        # Inside a transaction, a savepoint keeps it usable after the failed write; outside of one there
+        # is nothing to protect and the write stays a single statement
+        in_transaction = transaction.get_connection().in_atomic_block
+        try:
+            with transaction.atomic() if in_transaction else nullcontext():
+                return save(*args)
+        except IntegrityError:
+            taken = Person.objects.filter(email=validated_data.get('email'))
+            if self.instance is not None:
+                taken = taken.exclude(pk=self.instance.pk)
+            if 'email' in validated_data and taken.exists():
+                raise serializers.ValidationError(UNIQUE_EMAIL_ERROR)
+            raise
 
-class TeamSerializer(serializers.ModelSerializer):
+
+class TeamSerializer(SparseFieldsSerializer):
     members = PersonSerializer(many=True, read_only=True)
 
     class Meta:
@@ -37,5 +95,117 @@ class TeamSerializer(serializers.ModelSerializer):
         return value
 
 
+class TeamSummarySerializer(SparseFieldsSerializer):
+    """ Team without its members. """
+
+    class Meta:
+        model = Team
+        exclude = ['members']
+
+
+class CoMemberSerializer(PersonSerializer):
+    shared_teams = serializers.IntegerField(read_only=True, help_text="Number of teams shared with the person.")
+
+
+class OverlappingTeamSerializer(TeamSummarySerializer):
+    """ Team sharing members with the team in ``context['team']``. """
+    shared_members = serializers.IntegerField(read_only=True, help_text="Number of members shared with the team.")
+    overlap = serializers.SerializerMethodField(
+        help_text="Shared members over the members of either team, from 0 to 1 (Jaccard index)."
+    )
+
+    def get_overlap(self, team) -> float:
+        either = self.context['team'].member_count + team.member_count - team.shared_members
+        return round(team.shared_members / either, 4) if either > 0 else 0.0
+
+
+class OtherTeam(serializers.Serializer):
+    team = serializers.IntegerField(help_text="ID of the other team.")
+
+
+class OverlapFilter(serializers.Serializer):
+    team = serializers.IntegerField(required=False, help_text="Only return the overlap with the team with this ID.")
+
+
 class TeamMember(serializers.Serializer):
     person_id = serializers.IntegerField()
+
+
+class TeamMembers(serializers.Serializer):
+    add = serializers.ListField(
+        child=serializers.IntegerField(), required=False, help_text="IDs of the persons to add to the team."
+    )
+    remove = serializers.ListField(
+        child=serializers.IntegerField(), required=False, help_text="IDs of the persons to remove from the team."
+    )
+    replace = serializers.ListField(
+        child=serializers.IntegerField(), required=False, allow_empty=True,
+        help_text="IDs of the persons that should be the only members of the team."
+    )
+
+    def validate(self, attrs):
+        if 'replace' in attrs and ('add' in attrs or 'remove' in attrs):
+            raise serializers.ValidationError("Replace cannot be combined with add or remove.")
+        if not attrs:
+            raise serializers.ValidationError("One of add, remove or replace is required.")
+        if set(attrs.get('add', [])) & set(attrs.get('remove', [])):
+            raise serializers.ValidationError("The same person cannot be both added and removed.")
+        return attrs
+
+
+class PersonBulkItem(PersonSerializer):
+    """ Person payload inside a bulk request or an import; email uniqueness is checked for the whole batch. """
+
+
+class TeamImportItem(TeamSerializer):
+    """ Team row of an import; name uniqueness is checked for the whole batch at once. """
+
+    class Meta(TeamSerializer.Meta):
+        fields = ['name', 'description']
+        extra_kwargs = {'name': {'validators': []}, 'description': {'default': ''}}
+
+
+class MembershipImportItem(serializers.Serializer):
+    """ Membership row of an import, with its team by name and its person by email. """
+    team = serializers.CharField(max_length=Team._meta.get_field('name').max_length)
+    person = serializers.EmailField(max_length=254)
+    role = serializers.ChoiceField(choices=Membership.ROLE_CHOICES, default=Membership.MEMBER)
+    joined_at = serializers.DateTimeField(required=False)
+
+
+class PersonBulk(serializers.Serializer):
+    BULK_MAX_ITEMS = 10000
+
+    operation = serializers.ChoiceField(choices=['create', 'upsert', 'delete'])
+    items = serializers.ListField(
+        child=serializers.DictField(), required=False, max_length=BULK_MAX_ITEMS,
+        help_text="Persons to create or upsert (matched by email)."
+    )
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, max_length=BULK_MAX_ITEMS,
+        help_text="IDs of the persons to delete."
+    )
+    atomic = serializers.BooleanField(
+        default=False, help_text="Write nothing if any item is invalid."
+    )
+
+    def validate(self, attrs):
+        field = 'ids' if attrs['operation'] == 'delete' else 'items'
+        if field not in attrs:
+            raise serializers.ValidationError({field: "This field is required for this operation."})
+        return attrs
+
+
+class ChangeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Change
+        fields = '__all__'
+
+
+class ChangeFeed(serializers.Serializer):
+    since = serializers.IntegerField(
+        required=False, default=0, min_value=0, help_text="Return the changes after this cursor."
+    )
+    limit = serializers.IntegerField(
+        required=False, default=100, min_value=1, max_value=1000, help_text="Maximum number of changes to return."
+    )
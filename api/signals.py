@@ -0,0 +1,76 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from api.cache import invalidate, mark_deleted
+from teams.models import Membership, Person, Team
+from teams.signals import handlers_suspended
+
+
+def _team_ids_of(person_id):
+    return list(Membership.objects.filter(person_id=person_id).values_list('team_id', flat=True))
+
+
+def _member_ids_of(team_id):
+    return list(Membership.objects.filter(team_id=team_id).values_list('person_id', flat=True))
+
+
+@receiver(post_save, sender=Person)
+def invalidate_saved_person(sender, instance, created, **kwargs):
+    if handlers_suspended():
+        return
+    invalidate('persons', [instance.pk])
+    if not created:
+        invalidate('teams', _team_ids_of(instance.pk))
+
+
+@receiver(pre_delete, sender=Person)
+def invalidate_deleted_person(sender, instance, **kwargs):
+    # Memberships are gone once the person is deleted, so the teams are looked up beforehand
+    if handlers_suspended():
+        return
+    invalidate('persons', [instance.pk])
+    invalidate('teams', _team_ids_of(instance.pk))
+    mark_deleted('persons')
+
+
+@receiver(post_save, sender=Team)
+def invalidate_saved_team(sender, instance, **kwargs):
+    if handlers_suspended():
+        return
+    invalidate('teams', [instance.pk])
+
+
+@receiver(pre_delete, sender=Team)
+def invalidate_members_of_deleted_team(sender, instance, **kwargs):
+    # Their team counts change, and memberships are gone once the team is deleted
+    if handlers_suspended():
+        return
+    invalidate('persons', _member_ids_of(instance.pk))
+
+
+@receiver(post_delete, sender=Team)
+def invalidate_deleted_team(sender, instance, **kwargs):
+    if handlers_suspended():
+        return
+    invalidate('teams', [instance.pk])
+    mark_deleted('teams')
+
+
+@receiver(m2m_changed, sender=Membership)
+def invalidate_team_members(sender, instance, action, reverse, pk_set, **kwargs):
+    # Both sides change, through the member list or the team count
+    if handlers_suspended():
+        return
+    if not reverse:
+        if action in ('post_add', 'post_remove'):
+            invalidate('teams', [instance.pk])
+            invalidate('persons', pk_set)
+        elif action == 'pre_clear':
+            invalidate('teams', [instance.pk])
+            invalidate('persons', _member_ids_of(instance.pk))
+    elif action in ('post_add', 'post_remove'):
+        invalidate('teams', pk_set)
+        invalidate('persons', [instance.pk])
+    elif action == 'pre_clear':
+        invalidate('teams', _team_ids_of(instance.pk))
+        invalidate('persons', [instance.pk])
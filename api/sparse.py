@@ -0,0 +1,73 @@
+from drf_yasg import openapi
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+fields_parameter = openapi.Parameter(
+    FIELDS_PARAM, openapi.IN_QUERY, type=openapi.TYPE_STRING,
+    description="Comma-separated fields to return, e.g. `id,name`. Only these columns are read from the database."
+)
+expand_parameter = openapi.Parameter(
+    EXPAND_PARAM, openapi.IN_QUERY, type=openapi.TYPE_STRING,
+    description="Comma-separated relations to embed as full objects when `fields` is used, e.g. `members`. "
+                "Relations that are not expanded are returned as arrays of IDs."
+)
+
+
+def _split(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class SparseFieldsMixin:
+    """
+    Lets read actions return only the fields listed in ``?fields=``.
+
+    Without ``?fields=`` the full representation is returned, with every relation in
+    ``expandable_fields`` embedded. With it, the queryset only selects the requested columns
+    and relations are reduced to arrays of IDs, unless they are listed in ``?expand=``.
+    """
+    expandable_fields = ()
+
+    def get_sparse_fields(self):
+        """ Return the requested fields, or ``None`` if every field should be returned. """
+        value = self.request.query_params.get(FIELDS_PARAM)
+        if value is None:
+            return None
+
+        fields = _split(value)
+        if not fields:
+            raise ValidationError({FIELDS_PARAM: ["At least one field is required."]})
+        unknown = [name for name in fields if name not in self.serializer_class().fields]
+        if unknown:
+            raise ValidationError({FIELDS_PARAM: [f"Unknown field: {name}." for name in unknown]})
+        return fields
+
+    def get_expanded_fields(self):
+        expand = _split(self.request.query_params.get(EXPAND_PARAM, ''))
+        unknown = [name for name in expand if name not in self.expandable_fields]
+        if unknown:
+            raise ValidationError({EXPAND_PARAM: [f"Cannot expand: {name}." for name in unknown]})
+        return expand
+
+    def includes_field(self, name):
+        fields = self.get_sparse_fields()
+        return fields is None or name in fields
+
+    def embeds_field(self, name):
+        """ Whether the relation ``name`` is returned as full objects rather than as IDs. """
+        return self.get_sparse_fields() is None or name in self.get_expanded_fields()
+
+    def get_read_queryset(self, queryset):
+        """ Restrict the selected columns to the requested fields; the primary key is always selected. """
+        self.get_expanded_fields()
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return queryset
+
+        columns = {field.name for field in queryset.model._meta.concrete_fields}
+        return queryset.only(*[name for name in fields if name in columns])
+
+    def get_read_serializer(self, *args, **kwargs):
+        compact = [name for name in self.expandable_fields if not self.embeds_field(name)]
+        return self.serializer_class(*args, fields=self.get_sparse_fields(), compact=compact, **kwargs)
@@ -0,0 +1,293 @@
+import csv
+import io
+import json
+from itertools import islice
+
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from api.cache import invalidate
+from api.serializers import MembershipImportItem, PersonBulkItem, TeamImportItem
+from teams.models import Change, Membership, Person, Team
+from teams.signals import (
+    CHANGE_FIELDS, count_memberships, insert_changes, record_membership_changes, touch_teams
+)
+
+TRANSFER_BATCH_SIZE = 10000
+FORMATS = ['csv', 'ndjson']
+# What happens to the rows that already exist: left as they are, or overwritten by the imported ones
+MODES = ['create', 'upsert']
+# Columns of each resource, in file order; memberships refer to teams by name and to persons by email
+COLUMNS = {
+    'persons': ['email', 'first_name', 'last_name'],
+    'teams': ['name', 'description'],
+    'memberships': ['team', 'person', 'role', 'joined_at'],
+}
+# Fields overwritten when an imported person or team already exists
+UPSERT_FIELDS = {Person: ['first_name', 'last_name', 'updated_at'], Team: ['description', 'updated_at']}
+# Serializers validating the rows of each resource, with the rules of the API
+ROW_SERIALIZERS = {'persons': PersonBulkItem, 'teams': TeamImportItem, 'memberships': MembershipImportItem}
+# Number of invalid rows kept with their errors; the others are only counted
+MAX_REPORTED_ERRORS = 100
+
+
+def export_rows(resource, chunk_size=TRANSFER_BATCH_SIZE):
+    """ Yield every row of ``resource`` as a tuple of its ``COLUMNS``, read ``chunk_size`` rows at a time. """
+    if resource == 'persons':
+        rows = Person.objects.order_by('id').values_list(*COLUMNS['persons'])
+    elif resource == 'teams':
+        rows = Team.objects.order_by('id').values_list(*COLUMNS['teams'])
+    else:
+        rows = Membership.objects.order_by('id').values_list('team__name', 'person__email', 'role', 'joined_at')
+    for row in rows.iterator(chunk_size=chunk_size):
+        if resource == 'memberships':
+            row = row[:3] + (row[3].isoformat(),)
+        yield row
+
+
+def write_rows(file, format, columns, rows):
+    """ Write ``rows`` to the text ``file``, as CSV with a header or as one JSON object per line. """
+    if format == 'csv':
+        writer = csv.writer(file)
+        writer.writerow(columns)
+        writer.writerows(rows)
+    else:
+        dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+        for row in rows:
+            file.write(dumps(dict(zip(columns, row))) + '\n')
+
+
+def read_rows(file, format):
+    """
+    Yield ``(line, row)`` for every row of a CSV file with a header, or of an NDJSON file.
+
+    ``row`` is a dict, or ``None`` for an NDJSON line that does not hold a JSON object.
+    """
+    if format == 'csv':
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line, text in enumerate(file, 1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError:
+            row = None
+        yield line, row if isinstance(row, dict) else None
+
+
+class ImportResult:
+    """ Number of rows read, created, updated and skipped by an import, and the errors of the invalid ones. """
+
+    def __init__(self):
+        self.read = 0
+        self.created = 0
+        self.updated = 0
+        self.skipped = 0
+        self.invalid = 0
+        self.errors = []
+
+    def add_error(self, line, errors):
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'errors': errors})
+
+
+def clean_row(serializer, row):
+    """
+    Validate ``row`` with ``serializer`` and return ``(data, errors)``.
+
+    CSV has no way to tell an empty value from a missing one, so empty values are missing in both formats.
+    """
+    row = {field: value for field, value in row.items() if value not in (None, '')}
+    try:
+        return serializer.run_validation(row), {}
+    except ValidationError as exc:
+        return None, {field: [str(error) for error in errors] for field, errors in exc.detail.items()}
+
+
+def upsert(model, columns, rows, conflict, update_fields, defaults, copy=False):
+    """
+    Insert ``rows`` (sequences of ``columns`` values) into the table of ``model`` with one statement.
+
+    Rows conflicting on the ``conflict`` columns update ``update_fields``, or are left as they are
+    without them, and ``defaults`` gives the other columns of every row. Rows are sent with one
+    ``executemany``, or with ``COPY`` into a temporary table on PostgreSQL when ``copy`` is set.
+    """
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    names = ', '.join(quote(column) for column in columns)
+    all_names = ', '.join(quote(column) for column in [*columns, *defaults])
+    if update_fields:
+        action = 'UPDATE SET ' + ', '.join(f'{quote(field)} = EXCLUDED.{quote(field)}' for field in update_fields)
+    else:
+        action = 'NOTHING'
+    on_conflict = f'ON CONFLICT ({", ".join(quote(column) for column in conflict)}) DO {action}'
+    values = list(defaults.values())
+
+    with connection.cursor() as cursor:
+        if not copy:
+            placeholders = ', '.join(['%s'] * (len(columns) + len(defaults)))
+            cursor.executemany(
+                f'INSERT INTO {table} ({all_names}) VALUES ({placeholders}) {on_conflict}',
+                [(*row, *values) for row in rows],
+            )
+            return
+
+        buffer = io.StringIO()
+        # Quoted empty strings stay empty strings, where COPY reads unquoted ones as NULL
+        csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC).writerows(rows)
+        buffer.seek(0)
+        cursor.execute(f'CREATE TEMPORARY TABLE import_rows AS SELECT {names} FROM {table} WITH NO DATA')
+        cursor.copy_expert(f'COPY import_rows ({names}) FROM STDIN WITH (FORMAT csv)', buffer)
+        cursor.execute(
+            f'INSERT INTO {table} ({all_names}) SELECT {names}{", %s" * len(values)} FROM import_rows {on_conflict}',
+            values,
+        )
+        cursor.execute('DROP TABLE import_rows')
+
+
+def _ids_by(model, field, values):
+    return dict(model.objects.filter(**{f'{field}__in': values}).values_list(field, 'id'))
+
+
+def _write_objects(model, key, rows, mode, copy):
+    """ Upsert persons or teams by their ``key`` field, log the changes and return the IDs created and updated. """
+    resource = 'persons' if model is Person else 'teams'
+    existing = _ids_by(model, key, [data[key] for data in rows])
+    if mode == 'create':
+        rows = [data for data in rows if data[key] not in existing]
+    counter = 'team_count' if model is Person else 'member_count'
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    upsert(
+        model, COLUMNS[resource], [[data[column] for column in COLUMNS[resource]] for data in rows], [key],
+        UPSERT_FIELDS[model] if mode == 'upsert' else None, {counter: 0, 'updated_at': now}, copy,
+    )
+    created = _ids_by(model, key, [data[key] for data in rows if data[key] not in existing])
+
+    entity = Change.PERSON if model is Person else Change.TEAM
+    ids = {**existing, **created}
+    insert_changes(
+        (entity, Change.CREATE if data[key] in created else Change.UPDATE, ids[data[key]], None,
+         {field: data[field] for field in CHANGE_FIELDS[model]})
+        for data in rows
+    )
+    updated = [existing[data[key]] for data in rows if data[key] in existing]
+    if rows:
+        invalidate(resource, updated)
+    return list(created.values()), updated
+
+
+def _write_persons(rows, mode, copy):
+    created, updated = _write_objects(Person, 'email', rows, mode, copy)
+    if updated:
+        # Teams embed their members
+        team_ids = list(
+            Membership.objects.filter(person_id__in=updated).values_list('team_id', flat=True).distinct()
+        )
+        touch_teams(team_ids)
+        invalidate('teams', team_ids)
+    return created, updated
+
+
+def _write_teams(rows, mode, copy):
+    return _write_objects(Team, 'name', rows, mode, copy)
+
+
+def _resolve_memberships(rows, lines, result):
+    """ Return ``(team_id, person_id, role, joined_at)`` of the rows, reporting those of missing teams or persons. """
+    team_ids = _ids_by(Team, 'name', {data['team'] for data in rows})
+    person_ids = _ids_by(Person, 'email', {data['person'] for data in rows})
+    adapt = connection.ops.adapt_datetimefield_value
+    now = timezone.now()
+    memberships = []
+    for data, line in zip(rows, lines):
+        errors = {}
+        if data['team'] not in team_ids:
+            errors['team'] = ["Team with the given name not found."]
+        if data['person'] not in person_ids:
+            errors['person'] = ["Person with the given email not found."]
+        if errors:
+            result.add_error(line, errors)
+        else:
+            memberships.append(
+                (team_ids[data['team']], person_ids[data['person']], data['role'], adapt(data.get('joined_at', now)))
+            )
+    return memberships
+
+
+def _write_memberships(rows, lines, mode, result, copy):
+    memberships = _resolve_memberships(rows, lines, result)
+    existing = set(Membership.objects.filter(
+        team_id__in={membership[0] for membership in memberships},
+        person_id__in={membership[1] for membership in memberships},
+    ).values_list('team_id', 'person_id'))
+    if mode == 'create':
+        memberships = [membership for membership in memberships if membership[:2] not in existing]
+    upsert(
+        Membership, ['team_id', 'person_id', 'role', 'joined_at'], memberships, ['team_id', 'person_id'],
+        ['role', 'joined_at'] if mode == 'upsert' else None, {}, copy,
+    )
+
+    created = [membership[:2] for membership in memberships if membership[:2] not in existing]
+    updated = [membership[:2] for membership in memberships if membership[:2] in existing]
+    count_memberships(created)
+    record_membership_changes(Change.CREATE, created)
+    invalidate('teams', {team_id for team_id, person_id in created + updated})
+    invalidate('persons', {person_id for team_id, person_id in created})
+    return created, updated
+
+
+def import_rows(resource, rows, mode='upsert', batch_size=TRANSFER_BATCH_SIZE, copy=False, progress=None):
+    """
+    Validate and write the ``(line, row)`` pairs of ``rows`` to ``resource``, ``batch_size`` rows at a time.
+
+    Persons are matched by email, teams by name and memberships by team and person. Each batch is
+    written in one transaction by a single ``INSERT ... ON CONFLICT`` (see ``upsert``) and gets the
+    same change log entries, counters and cache invalidation as writes through the API. Within a
+    batch, the last row of a key wins. Invalid rows are reported in the result and skipped.
+    ``progress`` is called with the result after each batch; nothing else is kept between batches,
+    so memory use only depends on ``batch_size``.
+    """
+    serializer = ROW_SERIALIZERS[resource]()
+    key = {
+        'persons': lambda data: data['email'],
+        'teams': lambda data: data['name'],
+        'memberships': lambda data: (data['team'], data['person']),
+    }[resource]
+
+    result = ImportResult()
+    rows = iter(rows)
+    while batch := list(islice(rows, batch_size)):
+        valid = {}
+        for line, row in batch:
+            if row is None:
+                result.add_error(line, {'non_field_errors': ["Expected a JSON object."]})
+                continue
+            data, errors = clean_row(serializer, row)
+            if errors:
+                result.add_error(line, errors)
+            else:
+                valid.pop(key(data), None)
+                valid[key(data)] = (line, data)
+        result.read += len(batch)
+        lines = [line for line, data in valid.values()]
+        data = [data for line, data in valid.values()]
+
+        with transaction.atomic():
+            if resource == 'memberships':
+                created, updated = _write_memberships(data, lines, mode, result, copy)
+            elif resource == 'persons':
+                created, updated = _write_persons(data, mode, copy)
+            else:
+                created, updated = _write_teams(data, mode, copy)
+        result.created += len(created)
+        result.updated += len(updated)
+        result.skipped = result.read - result.invalid - result.created - result.updated
+        if progress:
+            progress(result)
+    return result
@@ -1,11 +1,12 @@
 from django.urls import path, include
 from rest_framework import routers
 
-from api.views import PersonViewSet, TeamViewSet
+from api.views import PersonViewSet, TeamViewSet, ChangeViewSet
 
 router = routers.DefaultRouter()
 router.register(r'persons', PersonViewSet)
 router.register(r'teams', TeamViewSet)
+router.register(r'changes', ChangeViewSet)
 # router.register(r'teammembers', TeamMemberViewSet)
 
 urlpatterns = [
@@ -1,21 +1,56 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Prefetch
 from django.http import Http404
+from django.utils import timezone
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from api.serializers import PersonSerializer, TeamSerializer, TeamMember
-from teams.models import Person, Team
-
-
-class PersonViewSet(viewsets.ModelViewSet):
+from api import graph
+from api.bulk import bulk_write_persons
+from api.cache import CachedResponseMixin
+from api.export import stream_export
+from api.filters import PersonFilter, StableOrderingFilter, TeamFilter
+from api.membership import change_members, missing_person_ids
+from api.metrics import MetricsMixin
+from api.renderers import FastJSONRenderer, NDJSONRenderer
+from api.replicas import ReplicaReadsMixin
+from api.serializers import (
+    PersonSerializer, TeamSerializer, TeamMember, TeamMembers, PersonBulk, ChangeSerializer, ChangeFeed,
+    TeamSummarySerializer, CoMemberSerializer, OverlappingTeamSerializer, OtherTeam, OverlapFilter
+)
+from api.sparse import SparseFieldsMixin, expand_parameter, fields_parameter
+from teams.models import Change, Person, Team
+
+
+class PersonViewSet(MetricsMixin, ReplicaReadsMixin, SparseFieldsMixin, CachedResponseMixin, viewsets.ModelViewSet):
     serializer_class = PersonSerializer
     queryset = Person.objects.all()
+    filter_backends = [PersonFilter, StableOrderingFilter]
+    ordering_fields = ['id', 'team_count']
+    ordering = ['id']
+    cache_resource = 'persons'
+    query_budgets = {
+        'list': 2, 'retrieve': 2, 'create': 2, 'update': 5, 'partial_update': 5, 'destroy': 8, 'export': 1, 'bulk': 9,
+        'teams': 2, 'co_members': 2,
+    }
+    batched_actions = ('bulk',)
+    replica_actions = ('list', 'retrieve', 'teams', 'co_members')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve', 'export'):
+            queryset = self.get_read_queryset(queryset)
+        return queryset
 
     """ Endpoint to retrieve all persons """
 
     @swagger_auto_schema(
+        manual_parameters=[fields_parameter],
         responses={
             status.HTTP_200_OK: openapi.Response(
                 description="Successfully retrieved list.", schema=PersonSerializer()
@@ -24,9 +59,7 @@ class PersonViewSet(viewsets.ModelViewSet):
     )
     def list(self, request, **kwargs):
         """ Handle GET /persons/ """
-        queryset = self.queryset
-        serializer = self.serializer_class(queryset, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self.cached_response(self.get_list_data)
 
     """ Endpoint to create a new person """
 
@@ -52,6 +85,7 @@ class PersonViewSet(viewsets.ModelViewSet):
     """ Endpoint to retrieve a specific person by ID """
 
     @swagger_auto_schema(
+        manual_parameters=[fields_parameter],
         responses={
             status.HTTP_200_OK: openapi.Response(
                 description="Successfully retrieved person's information.",
@@ -63,9 +97,7 @@ class PersonViewSet(viewsets.ModelViewSet):
     def retrieve(self, request, pk=None, *args, **kwargs):
         """ Handle GET /persons/{id}/ """
         try:
-            instance = self.get_object()
-            serializer = self.serializer_class(instance)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return self.cached_response(lambda: self.get_read_serializer(self.get_object()).data, pk=pk)
 
         except Person.DoesNotExist:
             return Response(
@@ -148,14 +180,138 @@ class PersonViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+    """ Endpoint to export all persons as a stream """
+
+    @swagger_auto_schema(
+        manual_parameters=[fields_parameter],
+        method='get',
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                description="Streamed list of all persons as NDJSON (default) or a JSON array."
+            ),
+        }
+    )
+    @action(
+        detail=False, methods=['get'], url_path='export',
+        renderer_classes=[NDJSONRenderer, FastJSONRenderer], pagination_class=None
+    )
+    def export(self, request):
+        """ Handle GET /persons/export/ """
+        queryset = self.filter_queryset(self.get_queryset()).order_by('id')
+        return stream_export(queryset, self.get_read_serializer(), request)
+
+    """ Endpoint to create, upsert or delete persons in bulk """
+
+    @swagger_auto_schema(
+        method='post',
+        responses={
+            status.HTTP_200_OK: openapi.Response(description="Successfully processed all items."),
+            status.HTTP_207_MULTI_STATUS: openapi.Response(
+                description="Valid items were processed, invalid items are listed in errors."
+            ),
+            status.HTTP_400_BAD_REQUEST: (
+                "Error in the provided data. Nothing was written in atomic mode, or when emails kept being taken "
+                "by concurrent requests."
+            ),
+        }
+    )
+    @action(detail=False, methods=['post'], url_path='bulk', serializer_class=PersonBulk)
+    def bulk(self, request):
+        """ Handle POST /persons/bulk/ """
+        serializer = PersonBulk(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        result = bulk_write_persons(**serializer.validated_data)
+        if not result.errors:
+            return Response(result.data, status=status.HTTP_200_OK)
+        if result.rolled_back:
+            return Response(result.data, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result.data, status=status.HTTP_207_MULTI_STATUS)
+
+    """ Endpoint to retrieve the teams of a person by ID """
+
+    @swagger_auto_schema(
+        method='get',
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                description="Successfully retrieved the teams of the person.",
+                schema=TeamSummarySerializer(many=True)
+            ),
+            status.HTTP_404_NOT_FOUND: "Person with the specified ID not found."
+        }
+    )
+    @action(detail=True, methods=['get'], url_path='teams', filter_backends=[])
+    def teams(self, request, pk=None):
+        """ Handle GET /persons/{id}/teams/ """
+        try:
+            person = self.get_object()
+        except Http404:
+            return Response(
+                data={"detail": "Person with the specified ID not found."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        page = self.paginate_queryset(graph.teams_of(person.pk))
+        return self.get_paginated_response(TeamSummarySerializer(page, many=True).data)
+
+    """ Endpoint to retrieve the persons sharing a team with a person by ID """
+
+    @swagger_auto_schema(
+        method='get',
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                description="Successfully retrieved the persons sharing at least one team with the person.",
+                schema=CoMemberSerializer(many=True)
+            ),
+            status.HTTP_404_NOT_FOUND: "Person with the specified ID not found."
+        }
+    )
+    @action(detail=True, methods=['get'], url_path='co_members', filter_backends=[])
+    def co_members(self, request, pk=None):
+        """ Handle GET /persons/{id}/co_members/ """
+        try:
+            person = self.get_object()
+        except Http404:
+            return Response(
+                data={"detail": "Person with the specified ID not found."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        page = self.paginate_queryset(graph.co_members(person.pk))
+        return self.get_paginated_response(CoMemberSerializer(page, many=True).data)
+
 
-class TeamViewSet(viewsets.ModelViewSet):
+class TeamViewSet(MetricsMixin, ReplicaReadsMixin, SparseFieldsMixin, CachedResponseMixin, viewsets.ModelViewSet):
     serializer_class = TeamSerializer
     queryset = Team.objects.all()
+    filter_backends = [TeamFilter, StableOrderingFilter]
+    ordering_fields = ['id', 'member_count']
+    ordering = ['id']
+    cache_resource = 'teams'
+    expandable_fields = ('members',)
+    query_budgets = {
+        'list': 3, 'retrieve': 3, 'create': 4, 'update': 5, 'partial_update': 4, 'destroy': 8, 'export': 2,
+        'add_member': 8, 'remove_member': 8, 'members': 14, 'common_members': 2, 'overlap': 2,
+    }
+    batched_actions = ('members',)
+    replica_actions = ('list', 'retrieve', 'common_members', 'overlap')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve', 'export'):
+            queryset = self.get_read_queryset(queryset)
+            if self.includes_field('members'):
+                # Load members of all teams in a single extra query instead of one query per team,
+                # reading only their IDs when the members are not embedded
+                members = Person.objects.all() if self.embeds_field('members') else Person.objects.only('id')
+                queryset = queryset.prefetch_related(Prefetch('members', queryset=members.order_by('id')))
+        return queryset
 
     """ Endpoint to retrieve all teams """
 
     @swagger_auto_schema(
+        manual_parameters=[fields_parameter, expand_parameter],
         responses={
             status.HTTP_200_OK: openapi.Response(
                 description="Successfully retrieved list of teams.",
@@ -165,9 +321,7 @@ class TeamViewSet(viewsets.ModelViewSet):
     )
     def list(self, request, **kwargs):
         """ Handle GET /teams/ """
-        queryset = self.queryset
-        serializer = self.serializer_class(queryset, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self.cached_response(self.get_list_data)
 
     """ Endpoint to create a new team """
 
@@ -192,6 +346,7 @@ class TeamViewSet(viewsets.ModelViewSet):
     """ Endpoint to retrieve team details by ID """
 
     @swagger_auto_schema(
+        manual_parameters=[fields_parameter, expand_parameter],
         responses={
             status.HTTP_200_OK: openapi.Response(
                 description="Successfully retrieved team details.",
@@ -203,9 +358,7 @@ class TeamViewSet(viewsets.ModelViewSet):
     def retrieve(self, request, pk=None, *args, **kwargs):
         """ Handle GET /teams/{id}/ """
         try:
-            instance = self.get_object()
-            serializer = self.serializer_class(instance)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return self.cached_response(lambda: self.get_read_serializer(self.get_object()).data, pk=pk)
         except Team.DoesNotExist:
             return Response(
                 data={"detail": "Team with the given ID not found."},
@@ -288,6 +441,26 @@ class TeamViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+    """ Endpoint to export all teams as a stream """
+
+    @swagger_auto_schema(
+        manual_parameters=[fields_parameter, expand_parameter],
+        method='get',
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                description="Streamed list of all teams with their members as NDJSON (default) or a JSON array."
+            ),
+        }
+    )
+    @action(
+        detail=False, methods=['get'], url_path='export',
+        renderer_classes=[NDJSONRenderer, FastJSONRenderer], pagination_class=None
+    )
+    def export(self, request):
+        """ Handle GET /teams/export/ """
+        queryset = self.filter_queryset(self.get_queryset()).order_by('id')
+        return stream_export(queryset, self.get_read_serializer(), request)
+
     """ Endpoint to add a member to the team by ID """
 
     @swagger_auto_schema(
@@ -317,7 +490,7 @@ class TeamViewSet(viewsets.ModelViewSet):
                 data={'detail': 'Person with the given ID not found.'},
                 status=status.HTTP_404_NOT_FOUND
             )
-        if person in team.members.all():
+        if team.members.filter(pk=person.pk).exists():
             return Response(
                 data={'status': 'Error in the provided data or user is already a team member'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -359,7 +532,7 @@ class TeamViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        if person not in team.members.all():
+        if not team.members.filter(pk=person.pk).exists():
             return Response(
                 data={'status': 'Error in the provided data or user is not a team member'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -370,3 +543,162 @@ class TeamViewSet(viewsets.ModelViewSet):
             data={'status': 'Successfully removed member from the team'},
             status=status.HTTP_200_OK
         )
+
+    """ Endpoint to add, remove or replace several members of the team by ID """
+
+    @swagger_auto_schema(
+        method='post',
+        responses={
+            status.HTTP_200_OK: openapi.Response(description="Successfully changed the team members."),
+            status.HTTP_400_BAD_REQUEST: "Error in the provided data.",
+            status.HTTP_404_NOT_FOUND: "Team or person with the given ID not found."
+        }
+    )
+    @action(detail=True, methods=['post'], url_path='members', serializer_class=TeamMembers)
+    def members(self, request, pk=None):
+        """ Handle POST /teams/{id}/members/ """
+        try:
+            team = self.get_object()
+        except Http404:
+            return Response(
+                data={'detail': 'Team with the given ID not found.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        serializer = TeamMembers(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        changes = serializer.validated_data
+        missing = missing_person_ids(changes.get('add', []) + changes.get('remove', []) + changes.get('replace', []))
+        if missing:
+            return Response(
+                data={'detail': 'Person with the given ID not found.', 'missing': missing},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        added, removed = change_members(team, **changes)
+        return Response(
+            data={'added': added, 'removed': removed},
+            status=status.HTTP_200_OK
+        )
+
+    def get_teams(self, *pks):
+        """ Return the teams with the given IDs in one query, raising ``Http404`` if one of them does not exist. """
+        try:
+            pks = [int(pk) for pk in pks]
+        except ValueError:
+            raise Http404
+        teams = self.get_queryset().in_bulk(pks)
+        if len(teams) < len(set(pks)):
+            raise Http404
+        return [teams[pk] for pk in pks]
+
+    """ Endpoint to retrieve the members shared by two teams """
+
+    @swagger_auto_schema(
+        method='get',
+        query_serializer=OtherTeam,
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                description="Successfully retrieved the members of both teams.",
+                schema=PersonSerializer(many=True)
+            ),
+            status.HTTP_400_BAD_REQUEST: "Error in the provided data.",
+            status.HTTP_404_NOT_FOUND: "Team with the given ID not found."
+        }
+    )
+    @action(detail=True, methods=['get'], url_path='common_members', filter_backends=[])
+    def common_members(self, request, pk=None):
+        """ Handle GET /teams/{id}/common_members/ """
+        query = OtherTeam(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            team, other = self.get_teams(pk, query.validated_data['team'])
+        except Http404:
+            return Response(
+                data={'detail': 'Team with the given ID not found.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        page = self.paginate_queryset(graph.common_members(team.pk, other.pk))
+        return self.get_paginated_response(PersonSerializer(page, many=True).data)
+
+    """ Endpoint to retrieve the teams sharing members with a team """
+
+    @swagger_auto_schema(
+        method='get',
+        query_serializer=OverlapFilter,
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                description="Successfully retrieved the teams sharing at least one member with the team.",
+                schema=OverlappingTeamSerializer(many=True)
+            ),
+            status.HTTP_400_BAD_REQUEST: "Error in the provided data.",
+            status.HTTP_404_NOT_FOUND: "Team with the given ID not found."
+        }
+    )
+    @action(detail=True, methods=['get'], url_path='overlap', filter_backends=[])
+    def overlap(self, request, pk=None):
+        """ Handle GET /teams/{id}/overlap/ """
+        query = OverlapFilter(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        other = query.validated_data.get('team')
+        try:
+            team = self.get_teams(pk)[0] if other is None else self.get_teams(pk, other)[0]
+        except Http404:
+            return Response(
+                data={'detail': 'Team with the given ID not found.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        teams = graph.overlapping_teams(team.pk)
+        if other is not None:
+            teams = teams.filter(pk=other)
+        page = self.paginate_queryset(teams)
+        return self.get_paginated_response(OverlappingTeamSerializer(page, many=True, context={'team': team}).data)
+
+
+class ChangeViewSet(MetricsMixin, viewsets.GenericViewSet):
+    serializer_class = ChangeSerializer
+    queryset = Change.objects.all()
+    pagination_class = None
+    query_budgets = {'list': 1}
+
+    """ Endpoint to retrieve the changes made after a cursor """
+
+    @swagger_auto_schema(
+        query_serializer=ChangeFeed,
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                description="Successfully retrieved changes, oldest first.",
+                schema=ChangeSerializer(many=True)
+            ),
+            status.HTTP_400_BAD_REQUEST: "Error in the provided cursor or limit."
+        }
+    )
+    def list(self, request, **kwargs):
+        """ Handle GET /changes/ """
+        query = ChangeFeed(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        since = query.validated_data['since']
+        limit = query.validated_data['limit']
+        # Recent entries may belong to transactions that are still committing with lower IDs
+        settled = timezone.now() - timedelta(seconds=settings.CHANGE_FEED_SETTLE_SECONDS)
+        changes = list(
+            self.get_queryset().filter(id__gt=since, created_at__lte=settled).order_by('id')[:limit + 1]
+        )
+        return Response(
+            data={
+                'cursor': changes[:limit][-1].id if changes else since,
+                'has_more': len(changes) > limit,
+                'changes': self.serializer_class(changes[:limit], many=True).data,
+            },
+            status=status.HTTP_200_OK
+        )
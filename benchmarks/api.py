@@ -0,0 +1,287 @@
+"""
+Latency, throughput and query count of every API endpoint, with baselines to compare commits.
+
+    python -m benchmarks.api --save benchmarks/baselines/sqlite.json
+    python -m benchmarks.api --compare benchmarks/baselines/sqlite.json
+
+Requests are sent one at a time through Django's test client, so the throughput is that of a
+single worker. Reads are measured with an empty response cache, except for the ``(cached)`` ones.
+Every write is undone outside of the measured time, so the database is the same after each run.
+
+``--save`` writes the results, the seeding parameters and the commit to a JSON file.
+``--compare`` prints the change of every endpoint since such a file and exits with status 1 when
+an endpoint runs more queries, or its p50 grew by more than ``--threshold`` percent. Query counts
+are exact on any machine; compare timings only with a baseline taken on the same machine.
+"""
+import argparse
+import json
+import random
+import subprocess
+import sys
+import time
+
+from benchmarks.common import percentile, print_table, seed
+
+from django.core.cache import cache  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.db.models import Max  # noqa: E402
+from django.test import Client  # noqa: E402
+
+from teams.models import Change, Membership, Person, Team  # noqa: E402
+
+
+class QueryCounter:
+    """ Execute wrapper counting the queries run through a connection. """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Case:
+    """
+    One endpoint: ``prepare`` runs before each request and returns its argument, ``request`` is
+    measured, and ``cleanup`` runs after it with the same argument.
+    """
+
+    def __init__(self, name, request, prepare=None, cleanup=None, cached=False):
+        self.name = name
+        self.request = request
+        self.prepare = prepare or (lambda: None)
+        self.cleanup = cleanup or (lambda argument: None)
+        self.cached = cached
+
+    def run(self, client, repeat):
+        durations, queries = [], []
+        counter = QueryCounter()
+        for _ in range(repeat):
+            argument = self.prepare()
+            if not self.cached:
+                cache.clear()
+            counter.count = 0
+            with connection.execute_wrapper(counter):
+                start = time.perf_counter()
+                response = self.request(client, argument)
+                durations.append((time.perf_counter() - start) * 1000)
+            queries.append(counter.count)
+            if response.status_code >= 400:
+                raise RuntimeError(f'{self.name}: {response.status_code} {response.content[:200]!r}')
+            self.cleanup(argument)
+        return durations, queries
+
+
+def consumed(response):
+    """ Read the whole body of a streaming response, which is only produced while it is read. """
+    b''.join(response.streaming_content)
+    return response
+
+
+def json_request(method, client, path, data):
+    return getattr(client, method)(path, json.dumps(data), content_type='application/json')
+
+
+def cases(rng):
+    """ Return the cases of every endpoint, on random persons and teams of the seeded database. """
+    person_ids = list(Person.objects.values_list('id', flat=True))
+    team_ids = list(Team.objects.values_list('id', flat=True))
+    counter = iter(range(10 ** 9))
+
+    def person():
+        return rng.choice(person_ids)
+
+    def team():
+        return rng.choice(team_ids)
+
+    def new_person():
+        return Person.objects.create(first_name='Bench', last_name='Mark', email=f'bench.{next(counter)}@example.com')
+
+    def new_team():
+        return Team.objects.create(name=f'Bench team {next(counter)}')
+
+    def delete(argument):
+        argument.delete()
+
+    def person_data(number):
+        return {'first_name': 'Bench', 'last_name': 'Mark', 'email': f'bench.{number}@example.com'}
+
+    def non_member_of(team_id):
+        """ A person who is not a member of ``team_id``. """
+        while True:
+            person_id = person()
+            if not Membership.objects.filter(team_id=team_id, person_id=person_id).exists():
+                return person_id
+
+    def member_pair():
+        team_id = team()
+        return team_id, non_member_of(team_id)
+
+    def added_pair():
+        team_id, person_id = member_pair()
+        Team.objects.get(pk=team_id).members.add(person_id)
+        return team_id, person_id
+
+    def remove_pair(argument):
+        team_id, person_id = argument
+        Team.objects.get(pk=team_id).members.remove(person_id)
+
+    def batch_of_members():
+        team_id = team()
+        return team_id, [non_member_of(team_id) for _ in range(10)]
+
+    def remove_batch(argument):
+        team_id, person_ids = argument
+        Team.objects.get(pk=team_id).members.remove(*person_ids)
+
+    def last_changes():
+        return (Change.objects.aggregate(last=Max('id'))['last'] or 0) - 100
+
+    prefix = Person.objects.values_list('first_name', flat=True).first()[:4]
+    return [
+        Case('persons list', lambda client, _: client.get('/api/v1/persons/')),
+        Case('persons list (cached)', lambda client, _: client.get('/api/v1/persons/'), cached=True),
+        Case('persons list ?name=', lambda client, _: client.get('/api/v1/persons/', {'name': prefix})),
+        Case('persons list ?fields=', lambda client, _: client.get('/api/v1/persons/', {'fields': 'id,email'})),
+        Case('persons list ?ordering=', lambda client, _: client.get(
+            '/api/v1/persons/', {'ordering': '-team_count'}
+        )),
+        Case('person retrieve', lambda client, pk: client.get(f'/api/v1/persons/{pk}/'), person),
+        Case('person retrieve (cached)', lambda client, pk: client.get(f'/api/v1/persons/{pk}/'),
+             lambda: person_ids[0], cached=True),
+        Case('person create', lambda client, number: json_request(
+            'post', client, '/api/v1/persons/', person_data(number)
+        ), lambda: next(counter), lambda number: Person.objects.filter(email=f'bench.{number}@example.com').delete()),
+        Case('person update', lambda client, obj: json_request(
+            'put', client, f'/api/v1/persons/{obj.pk}/', {**person_data(next(counter)), 'first_name': 'Updated'}
+        ), new_person, delete),
+        Case('person partial update', lambda client, obj: json_request(
+            'patch', client, f'/api/v1/persons/{obj.pk}/', {'last_name': 'Updated'}
+        ), new_person, delete),
+        Case('person destroy', lambda client, obj: client.delete(f'/api/v1/persons/{obj.pk}/'), new_person),
+        Case('persons export ?name=', lambda client, _: consumed(
+            client.get('/api/v1/persons/export/', {'name': prefix})
+        )),
+        Case('persons bulk upsert (100)', lambda client, numbers: json_request(
+            'post', client, '/api/v1/persons/bulk/',
+            {'operation': 'upsert', 'items': [person_data(number) for number in numbers]},
+        ), lambda: [next(counter) for _ in range(100)], lambda numbers: Person.objects.filter(
+            email__in=[f'bench.{number}@example.com' for number in numbers]
+        ).delete()),
+        Case('teams list', lambda client, _: client.get('/api/v1/teams/')),
+        Case('teams list ?fields=', lambda client, _: client.get('/api/v1/teams/', {'fields': 'id,name,members'})),
+        Case('team retrieve', lambda client, pk: client.get(f'/api/v1/teams/{pk}/'), team),
+        Case('team create', lambda client, number: json_request(
+            'post', client, '/api/v1/teams/', {'name': f'Bench team {number}'}
+        ), lambda: next(counter), lambda number: Team.objects.filter(name=f'Bench team {number}').delete()),
+        Case('team update', lambda client, obj: json_request(
+            'put', client, f'/api/v1/teams/{obj.pk}/', {'name': f'Bench team {next(counter)}', 'description': 'x'}
+        ), new_team, delete),
+        Case('team partial update', lambda client, obj: json_request(
+            'patch', client, f'/api/v1/teams/{obj.pk}/', {'description': 'Updated'}
+        ), new_team, delete),
+        Case('team destroy', lambda client, obj: client.delete(f'/api/v1/teams/{obj.pk}/'), new_team),
+        Case('team add_member', lambda client, pair: json_request(
+            'post', client, f'/api/v1/teams/{pair[0]}/add_member/', {'person_id': pair[1]}
+        ), member_pair, remove_pair),
+        Case('team remove_member', lambda client, pair: json_request(
+            'post', client, f'/api/v1/teams/{pair[0]}/remove_member/', {'person_id': pair[1]}
+        ), added_pair),
+        Case('team members add (10)', lambda client, batch: json_request(
+            'post', client, f'/api/v1/teams/{batch[0]}/members/', {'add': batch[1]}
+        ), batch_of_members, remove_batch),
+        Case('teams export ?name=', lambda client, _: consumed(
+            client.get('/api/v1/teams/export/', {'name': 'Team 0000'})
+        )),
+        Case('changes list', lambda client, since: client.get('/api/v1/changes/', {'since': since}), last_changes),
+    ]
+
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """ Print the change of every endpoint since ``baseline`` and return whether any of them regressed. """
+    rows, regressed = [], False
+    for name, result in results.items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        change = (result['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100
+        worse = result['queries'] > before['queries'] or change > threshold
+        regressed = regressed or worse
+        rows.append({
+            'name': name,
+            'p50_ms': result['p50_ms'],
+            'base_p50_ms': before['p50_ms'],
+            'p50_change_pct': change,
+            'queries': result['queries'],
+            'base_queries': before['queries'],
+            'regression': 'YES' if worse else '',
+        })
+    print(f"Compared with {baseline.get('commit') or 'the baseline'}:")
+    print_table(rows)
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--persons', type=int, default=100000)
+    parser.add_argument('--teams', type=int, default=1000)
+    parser.add_argument('--memberships', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', default='', help="Only run the endpoints whose name contains this text.")
+    parser.add_argument('--save', help="Write the results to this JSON file.")
+    parser.add_argument('--compare', help="Compare the results with this JSON file.")
+    parser.add_argument('--threshold', type=float, default=20, help="Allowed p50 growth in percent.")
+    args = parser.parse_args()
+
+    seed(args.persons, args.teams, args.memberships)
+    client = Client()
+    results = {}
+    for case in cases(random.Random(args.seed)):
+        if args.only not in case.name:
+            continue
+        case.run(client, min(args.repeat, 5))
+        durations, queries = case.run(client, args.repeat)
+        mean = sum(durations) / len(durations)
+        results[case.name] = {
+            'runs': len(durations),
+            'req_per_s': round(1000 / mean, 3),
+            'mean_ms': round(mean, 3),
+            'p50_ms': round(percentile(durations, 50), 3),
+            'p95_ms': round(percentile(durations, 95), 3),
+            'p99_ms': round(percentile(durations, 99), 3),
+            'queries': max(queries),
+        }
+    print_table([{'name': name, **result} for name, result in results.items()])
+
+    if args.save:
+        data = {
+            'commit': git_commit(), 'persons': args.persons, 'teams': args.teams,
+            'memberships': args.memberships, 'repeat': args.repeat, 'results': results,
+        }
+        with open(args.save, 'w') as file:
+            json.dump(data, file, indent=2)
+            file.write('\n')
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if (baseline['persons'], baseline['teams'], baseline['memberships']) != (
+                args.persons, args.teams, args.memberships):
+            print("The baseline was taken on a database seeded differently.")
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
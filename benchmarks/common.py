@@ -0,0 +1,70 @@
+import os
+import statistics
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+
+from api.management.commands.seed_data import FIRST_NAMES, LAST_NAMES, clear_data, generate_data  # noqa: E402,F401
+from teams.models import Person, Team  # noqa: E402
+
+
+def migrate():
+    call_command('migrate', verbosity=0)
+
+
+def seed(persons, teams, memberships_per_person=1, seed=0):
+    """
+    Fill the database with ``persons`` persons and ``teams`` teams, unless it already holds exactly that many.
+
+    Every person joins ``memberships_per_person`` random teams. The data only depends on the arguments.
+    """
+    migrate()
+    if Person.objects.count() == persons and Team.objects.count() == teams:
+        return
+
+    clear_data()
+    generate_data(persons, teams, memberships_per_person, seed=seed)
+
+
+def measure(func, repeat):
+    """ Call ``func`` ``repeat`` times and return the durations in milliseconds. """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+
+def percentile(durations, percent):
+    ordered = sorted(durations)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+def summarize(name, durations):
+    return {
+        'name': name,
+        'runs': len(durations),
+        'mean_ms': statistics.fmean(durations),
+        'p50_ms': percentile(durations, 50),
+        'p95_ms': percentile(durations, 95),
+        'p99_ms': percentile(durations, 99),
+    }
+
+
+def print_table(rows):
+    columns = list(rows[0])
+    widths = {column: max(len(column), *(len(_format(row[column])) for row in rows)) for column in columns}
+    print('  '.join(column.ljust(widths[column]) for column in columns))
+    for row in rows:
+        print('  '.join(_format(row[column]).ljust(widths[column]) for column in columns))
+
+
+def _format(value):
+    return f'{value:.3f}' if isinstance(value, float) else str(value)
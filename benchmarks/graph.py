@@ -0,0 +1,100 @@
+"""
+Latency and query plans of the membership graph endpoints at 1M persons and 100k teams.
+
+    BENCHMARK_DB=benchmarks/graph.sqlite3 python -m benchmarks.graph
+
+Every person is a member of ``--per-person`` teams, seeded like ``benchmarks.memberships``: the
+defaults give 3M memberships and teams of 30 members. The first run seeds the database, which
+takes a few minutes; give it its own ``BENCHMARK_DB`` to leave the other benchmarks' alone.
+
+Requests go through Django's test client on random persons and teams. ``--explain`` also prints
+the query plan of each graph query, which should only search the membership indexes.
+"""
+import argparse
+import random
+
+from benchmarks.api import QueryCounter
+from benchmarks.common import measure, print_table, summarize
+from benchmarks.memberships import seed_memberships
+
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+
+from api import graph  # noqa: E402
+from teams.models import Person, Team  # noqa: E402
+
+
+def explain(queryset):
+    """ Return the query plan of the first page of ``queryset``, as the endpoints read it. """
+    return queryset.order_by('id')[:101].explain()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--persons', type=int, default=1000000)
+    parser.add_argument('--teams', type=int, default=100000)
+    parser.add_argument('--per-person', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--explain', action='store_true', help="Print the query plan of every graph query.")
+    args = parser.parse_args()
+
+    seed_memberships(args.persons, args.teams, args.per_person)
+    rng = random.Random(1)
+    first_person = Person.objects.order_by('id').values_list('id', flat=True).first()
+    first_team = Team.objects.order_by('id').values_list('id', flat=True).first()
+
+    def person():
+        return first_person + rng.randrange(args.persons)
+
+    def team():
+        return first_team + rng.randrange(args.teams)
+
+    def sharing_team(team_id):
+        """ A team sharing a member with ``team_id``, so intersections and overlaps are not empty. """
+        other = graph.overlapping_teams(team_id).values_list('id', flat=True).first()
+        return other or team()
+
+    def team_pair_path(action):
+        def path():
+            team_id = team()
+            return f'/api/v1/teams/{team_id}/{action}/?team={sharing_team(team_id)}'
+        return path
+
+    cases = [
+        ('person teams', lambda: f'/api/v1/persons/{person()}/teams/'),
+        ('person co_members', lambda: f'/api/v1/persons/{person()}/co_members/'),
+        ('team overlap', lambda: f'/api/v1/teams/{team()}/overlap/'),
+        ('team overlap ?team=', team_pair_path('overlap')),
+        ('team common_members', team_pair_path('common_members')),
+    ]
+
+    client = Client()
+    rows = []
+    for name, path in cases:
+        paths = [path() for _ in range(args.repeat)]
+        requests = iter(paths)
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            durations = measure(lambda: client.get(next(requests)), args.repeat)
+        response = client.get(paths[0])
+        if response.status_code != 200:
+            raise RuntimeError(f'{name}: {response.status_code} {response.content[:200]!r}')
+        rows.append({**summarize(name, durations), 'queries': counter.count / args.repeat})
+
+    print(f'{args.persons} persons, {args.teams} teams, {args.persons * args.per_person} memberships, '
+          f'{args.repeat} random requests each')
+    print_table(rows)
+
+    if args.explain:
+        person_id, team_id = person(), team()
+        for name, queryset in [
+            ('teams_of', graph.teams_of(person_id)),
+            ('co_members', graph.co_members(person_id)),
+            ('common_members', graph.common_members(team_id, sharing_team(team_id))),
+            ('overlapping_teams', graph.overlapping_teams(team_id)),
+        ]:
+            print(f'\n{name}:\n{explain(queryset)}')
+
+
+if __name__ == '__main__':
+    main()
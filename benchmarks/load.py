@@ -0,0 +1,139 @@
+"""
+Load test of the read endpoints served by uvicorn, with the async views and with the sync viewsets.
+
+    python -m benchmarks.load --clients 500 --duration 20
+
+Each mode starts its own uvicorn process on the benchmark database (``ASGI_URLCONF`` selects the
+views) and is hit by ``--clients`` concurrent clients for ``--duration`` seconds. Requests spread
+over person and team details and filtered person lists, so most of them miss the response cache.
+The clients are spread over ``--processes`` processes; give the server and the clients separate
+cores, or the numbers mostly measure the clients. Needs ``uvicorn`` and ``httpx``.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.common import FIRST_NAMES, LAST_NAMES, percentile, print_table, seed
+
+MODES = [
+    ('sync viewsets', ''),
+    ('async views', 'wht_teams.asgi_urls'),
+]
+
+
+def request_paths(persons, teams, rng):
+    while True:
+        kind = rng.randrange(4)
+        if kind == 0:
+            yield f'/api/v1/persons/{rng.randint(1, persons)}/'
+        elif kind == 1:
+            yield f'/api/v1/teams/{rng.randint(1, teams)}/'
+        elif kind == 2:
+            yield f'/api/v1/persons/?name={rng.choice(FIRST_NAMES + LAST_NAMES)[:4]}&page_size=20'
+        else:
+            yield f'/api/v1/persons/?team={rng.randint(1, teams)}&page_size=20'
+
+
+async def run_clients(base_url, clients, duration, persons, teams, seed=0):
+    latencies = []
+    errors = 0
+    paths = request_paths(persons, teams, random.Random(seed))
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(next(paths))
+                    if response.status_code >= 500:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+def run_process(arguments):
+    return asyncio.run(run_clients(*arguments))
+
+
+def run_load(base_url, clients, duration, persons, teams, processes):
+    """ Return the latencies, the error count and the elapsed time of all client processes. """
+    shares = [clients // processes + (index < clients % processes) for index in range(processes)]
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.map(run_process, [
+            (base_url, share, duration, persons, teams, index) for index, share in enumerate(shares)
+        ])
+    latencies = [latency for result in results for latency in result[0]]
+    return latencies, sum(result[1] for result in results), max(result[2] for result in results)
+
+
+def wait_until_up(base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f'{base_url}/api/v1/', timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f'no server is answering on {base_url}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--persons', type=int, default=100000)
+    parser.add_argument('--teams', type=int, default=1000)
+    parser.add_argument('--clients', type=int, default=500)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    seed(args.persons, args.teams)
+    base_url = f'http://127.0.0.1:{args.port}'
+
+    rows = []
+    for name, urlconf in MODES:
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE='benchmarks.settings', ASGI_URLCONF=urlconf)
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'wht_teams.asgi:application', '--port', str(args.port),
+             '--log-level', 'warning', '--no-access-log'],
+            env=env,
+        )
+        try:
+            wait_until_up(base_url)
+            latencies, errors, elapsed = run_load(
+                base_url, args.clients, args.duration, args.persons, args.teams, args.processes
+            )
+        finally:
+            server.terminate()
+            server.wait()
+
+        rows.append({
+            'views': name,
+            'requests': len(latencies),
+            'errors': errors,
+            'requests_per_s': len(latencies) / elapsed,
+            'p50_ms': percentile(latencies, 50),
+            'p99_ms': percentile(latencies, 99),
+        })
+    print(f'{args.clients} concurrent clients for {args.duration:g}s per mode')
+    print_table(rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Latency of membership checks and reverse lookups ("which teams is this person in") at 10M memberships.
+
+    BENCHMARK_DB=benchmarks/memberships.sqlite3 python -m benchmarks.memberships
+
+Every person is a member of ``--per-person`` teams, so the defaults give 10M membership rows.
+They are written with one ``INSERT ... SELECT`` per team slot, which takes a few minutes the first
+time; the database is reused afterwards, so give it its own ``BENCHMARK_DB`` to leave the smaller
+database of the other benchmarks alone.
+
+Each layout is measured in turn: ``model`` is the indexes of ``Membership`` and ``legacy`` the
+indexes of the former implicit table, one per foreign key besides the unique (team, person) one.
+"""
+import argparse
+import random
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from benchmarks.common import measure, print_table, seed, summarize
+
+from teams.models import Membership, Person, Team  # noqa: E402
+
+LAYOUTS = {
+    'model': [('teams_member_person_team_idx', '(person_id, team_id)')],
+    'legacy': [('bench_legacy_team_idx', '(team_id)'), ('bench_legacy_person_idx', '(person_id)')],
+}
+
+
+def seed_memberships(persons, teams, per_person):
+    """ Seed the persons and teams, then make every person a member of ``per_person`` distinct teams. """
+    seed(persons, teams, memberships_per_person=0)
+    if Membership.objects.count() == persons * per_person:
+        return
+
+    first_team = Team.objects.order_by('id').values_list('id', flat=True).first()
+    stride = teams // per_person
+    table = Membership._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        Membership.objects.all().delete()
+        for slot in range(per_person):
+            cursor.execute(
+                f'INSERT INTO {table} (team_id, person_id, role, joined_at) '
+                f'SELECT %s + (id + %s) %% %s, id, %s, %s FROM {Person._meta.db_table}',
+                [first_team, slot * stride, teams, Membership.MEMBER, timezone.now()],
+            )
+
+
+def use_layout(layout):
+    """ Replace the non-unique indexes of the membership table with those of ``layout``. """
+    table = Membership._meta.db_table
+    with connection.cursor() as cursor:
+        for indexes in LAYOUTS.values():
+            for name, columns in indexes:
+                cursor.execute(f'DROP INDEX IF EXISTS {name}')
+        for name, columns in LAYOUTS[layout]:
+            cursor.execute(f'CREATE INDEX {name} ON {table} {columns}')
+        cursor.execute('ANALYZE')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--persons', type=int, default=1000000)
+    parser.add_argument('--teams', type=int, default=10000)
+    parser.add_argument('--per-person', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=1000)
+    args = parser.parse_args()
+
+    seed_memberships(args.persons, args.teams, args.per_person)
+    rng = random.Random(1)
+    person_ids = Person.objects.order_by('id').values_list('id', flat=True)
+    team_ids = Team.objects.order_by('id').values_list('id', flat=True)
+    first_person, first_team = person_ids.first(), team_ids.first()
+
+    def sample(name, query):
+        arguments = iter([
+            (first_team + rng.randrange(args.teams), first_person + rng.randrange(args.persons))
+            for _ in range(args.repeat)
+        ])
+        return summarize(name, measure(lambda: query(*next(arguments)), args.repeat))
+
+    queries = [
+        ('membership check', lambda team, person: Membership.objects.filter(team_id=team, person_id=person).exists()),
+        ('teams of person (ids)', lambda team, person: list(
+            Membership.objects.filter(person_id=person).values_list('team_id', flat=True)
+        )),
+        ('teams of person (rows)', lambda team, person: list(Team.objects.filter(members=person).values('id', 'name'))),
+        ('members of team (page)', lambda team, person: list(
+            Person.objects.filter(teams=team).order_by('id').values('id', 'email')[:20]
+        )),
+    ]
+
+    rows = []
+    try:
+        for layout in LAYOUTS:
+            use_layout(layout)
+            for name, query in queries:
+                rows.append({'indexes': layout, **sample(name, query)})
+    finally:
+        use_layout('model')
+
+    print(f'{Membership.objects.count()} memberships, {args.persons} persons, {args.teams} teams, '
+          f'{args.repeat} random lookups each')
+    print_table(rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Overhead of ``MetricsMiddleware`` on whole requests.
+
+    python -m benchmarks.metrics --persons 100000 --teams 1000
+
+Every request is sent through Django's test client with the middleware enabled and disabled,
+alternating between both so that drifts of the machine affect them alike. The overhead is the
+difference of the median durations.
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.common import print_table, seed
+
+from django.core.cache import cache  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+
+from teams.models import Person, Team  # noqa: E402
+
+
+def client(enabled):
+    """ Return a test client whose handler loaded the middleware with ``API_METRICS = enabled``. """
+    with override_settings(API_METRICS=enabled):
+        instance = Client()
+        instance.get('/api/v1/persons/')
+    return instance
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--persons', type=int, default=100000)
+    parser.add_argument('--teams', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    seed(args.persons, args.teams)
+    person = Person.objects.order_by('id').values_list('id', flat=True).first()
+    team = Team.objects.order_by('id').values_list('id', flat=True).first()
+
+    def uncached(url):
+        def request(http):
+            cache.clear()
+            http.get(url)
+        return request
+
+    cases = [
+        ('person detail (cached)', lambda http: http.get(f'/api/v1/persons/{person}/')),
+        ('persons page of 100 (cached)', lambda http: http.get('/api/v1/persons/')),
+        ('person detail', uncached(f'/api/v1/persons/{person}/')),
+        ('team detail', uncached(f'/api/v1/teams/{team}/')),
+        ('persons page of 100', uncached('/api/v1/persons/')),
+    ]
+    clients = {enabled: client(enabled) for enabled in (False, True)}
+
+    rows = []
+    for name, request in cases:
+        durations = {False: [], True: []}
+        for i in range(args.repeat):
+            for enabled in (i % 2 == 0, i % 2 == 1):
+                start = time.perf_counter()
+                request(clients[enabled])
+                durations[enabled].append((time.perf_counter() - start) * 1000)
+        disabled, enabled = statistics.median(durations[False]), statistics.median(durations[True])
+        rows.append({
+            'name': name,
+            'disabled_ms': disabled,
+            'enabled_ms': enabled,
+            'overhead_us': (enabled - disabled) * 1000,
+            'overhead_pct': (enabled - disabled) / disabled * 100,
+        })
+    print(f'{args.repeat} requests with and without the middleware, medians')
+    print_table(rows)
+
+
+if __name__ == '__main__':
+    main()
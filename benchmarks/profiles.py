@@ -0,0 +1,88 @@
+"""
+Throughput of the dev profile (``manage.py runserver``) against the prod profile (gunicorn).
+
+    python -m benchmarks.profiles --clients 50 --duration 20
+    python -m benchmarks.profiles --workers 8
+
+Both servers run on this machine on the benchmark database and get the same requests as
+``benchmarks.load``. The dev server runs without its autoreloader, which would only add a file
+watching process. The prod server is configured by ``gunicorn.conf.py``; ``--workers`` overrides
+``WEB_WORKERS``. Needs ``gunicorn`` and ``httpx``.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import percentile, print_table, seed
+from benchmarks.load import run_load, wait_until_up
+
+
+def environment(profile, **extra):
+    return dict(os.environ, DJANGO_SETTINGS_MODULE='benchmarks.settings', DJANGO_PROFILE=profile, **extra)
+
+
+def serve(command, env, base_url, args):
+    """ Start the server, run the load against it and return the latencies, errors and elapsed time. """
+    server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_up(base_url)
+        return run_load(base_url, args.clients, args.duration, args.persons, args.teams, args.processes)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def commands(port, workers, static_root):
+    """ Return the name, the command and the environment of the server of each profile. """
+    address = f'127.0.0.1:{port}'
+    prod = {'WEB_BIND': address, 'WEB_ACCESS_LOG': '', 'STATIC_ROOT': static_root}
+    if workers:
+        prod['WEB_WORKERS'] = str(workers)
+    return [
+        ('dev', [sys.executable, 'manage.py', 'runserver', '--noreload', address], {}),
+        ('prod', [sys.executable, '-m', 'gunicorn', 'wht_teams.wsgi'], prod),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--persons', type=int, default=100000)
+    parser.add_argument('--teams', type=int, default=1000)
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=0, help="gunicorn workers, WEB_WORKERS by default.")
+    parser.add_argument('--port', type=int, default=8766)
+    args = parser.parse_args()
+
+    seed(args.persons, args.teams)
+    base_url = f'http://127.0.0.1:{args.port}'
+
+    rows = []
+    with tempfile.TemporaryDirectory() as static_root:
+        subprocess.run(
+            [sys.executable, 'manage.py', 'collectstatic', '--noinput', '--verbosity', '0'],
+            env=environment('prod', STATIC_ROOT=static_root), check=True,
+        )
+        results = [
+            (profile, serve(command, environment(profile, **extra_env), base_url, args))
+            for profile, command, extra_env in commands(args.port, args.workers, static_root)
+        ]
+
+    for profile, (latencies, errors, elapsed) in results:
+        rows.append({
+            'profile': profile,
+            'requests': len(latencies),
+            'errors': errors,
+            'requests_per_s': len(latencies) / elapsed,
+            'p50_ms': percentile(latencies, 50),
+            'p99_ms': percentile(latencies, 99),
+        })
+    print(f'{args.clients} concurrent clients for {args.duration:g}s per profile')
+    print_table(rows)
+
+
+if __name__ == '__main__':
+    main()
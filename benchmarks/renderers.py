@@ -0,0 +1,58 @@
+"""
+Throughput of the JSON renderers on large list payloads.
+
+    python -m benchmarks.renderers --persons 100000 --teams 1000
+
+The payloads are built once from the seeded database, then rendered by DRF's ``JSONRenderer`` and by
+``FastJSONRenderer`` (orjson when installed). Both must produce the same bytes.
+"""
+import argparse
+
+from benchmarks.common import measure, print_table, seed
+
+from api.readers import ValuesReader  # noqa: E402
+from api.renderers import FastJSONRenderer, orjson  # noqa: E402
+from api.serializers import PersonSerializer, TeamSerializer  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+from teams.models import Person, Team  # noqa: E402
+
+
+def payload(serializer_class, queryset):
+    reader = ValuesReader(serializer_class())
+    return reader.represent(reader.values(queryset))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--persons', type=int, default=100000)
+    parser.add_argument('--teams', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    seed(args.persons, args.teams)
+    cases = [
+        ('persons', payload(PersonSerializer, Person.objects.order_by('id'))),
+        ('teams with members', payload(TeamSerializer, Team.objects.order_by('id'))),
+    ]
+
+    rows = []
+    for name, data in cases:
+        rendered = JSONRenderer().render(data)
+        assert FastJSONRenderer().render(data) == rendered, f'{name}: renderers disagree'
+
+        json_ms = min(measure(lambda: JSONRenderer().render(data), args.repeat))
+        fast_ms = min(measure(lambda: FastJSONRenderer().render(data), args.repeat))
+        megabytes = len(rendered) / 1024 / 1024
+        rows.append({
+            'name': name,
+            'megabytes': megabytes,
+            'json_mb_per_s': megabytes / json_ms * 1000,
+            'fast_mb_per_s': megabytes / fast_ms * 1000,
+            'speedup': json_ms / fast_ms,
+        })
+    print(f"FastJSONRenderer encodes with {'orjson ' + orjson.__version__ if orjson else 'the stdlib'}")
+    print_table(rows)
+
+
+if __name__ == '__main__':
+    main()
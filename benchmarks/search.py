@@ -0,0 +1,66 @@
+"""
+Latency of the indexed person and team filters.
+
+    python -m benchmarks.search --persons 1000000 --teams 10000
+
+The lookups go through the same filter backends as ``GET /persons/`` and ``GET /teams/`` and fetch one page.
+"""
+import argparse
+import random
+
+from benchmarks.common import FIRST_NAMES, LAST_NAMES, measure, print_table, seed, summarize
+
+from api.filters import PersonFilter, TeamFilter  # noqa: E402
+from teams.models import Person, Team  # noqa: E402
+
+PAGE_SIZE = 100
+
+
+def lookup(backend, queryset, **params):
+    filter_backend = backend()
+    for parameter, value in params.items():
+        method, description = filter_backend.parameters[parameter]
+        queryset = getattr(filter_backend, method)(queryset, value)
+    return lambda: list(queryset.order_by('id')[:PAGE_SIZE])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--persons', type=int, default=1000000)
+    parser.add_argument('--teams', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    seed(args.persons, args.teams)
+    rng = random.Random(1)
+    persons = Person.objects.all()
+    teams = Team.objects.all()
+
+    def sample(name, make_lookup):
+        lookups = [make_lookup() for _ in range(args.repeat)]
+        iterator = iter(lookups)
+        return summarize(name, measure(lambda: next(iterator)(), args.repeat))
+
+    rows = [
+        sample('name prefix (3 chars)', lambda: lookup(
+            PersonFilter, persons, name=rng.choice(FIRST_NAMES + LAST_NAMES)[:3].lower()
+        )),
+        sample('name prefix (full)', lambda: lookup(
+            PersonFilter, persons, name=rng.choice(LAST_NAMES)
+        )),
+        sample('email', lambda: lookup(
+            PersonFilter, persons, email=f'PERSON.{rng.randrange(args.persons)}@example.com'
+        )),
+        sample('team members', lambda: lookup(
+            PersonFilter, persons, team=str(rng.choice(list(teams.values_list('id', flat=True)[:1000])))
+        )),
+        sample('team name prefix', lambda: lookup(
+            TeamFilter, teams, name=f'team {rng.randrange(args.teams):06d}'[:9]
+        )),
+    ]
+    print(f'{args.persons} persons, {args.teams} teams, first page of {PAGE_SIZE} rows')
+    print_table(rows)
+
+
+if __name__ == '__main__':
+    main()
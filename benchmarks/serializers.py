@@ -0,0 +1,75 @@
+"""
+Rows per second of the list representation, with the DRF serializers and with the values reader.
+
+    python -m benchmarks.serializers --persons 100000
+
+Both sides read every row from the database and build the data returned by ``GET /persons/`` and
+``GET /teams/`` without pagination; rendering to JSON is left out. ``represent`` only times turning
+the fetched rows into data (including loading the members with the reader), ``total`` includes the
+query. The database driver's cost of parsing dates is paid by both sides and weighs heavily on SQLite.
+"""
+import argparse
+import time
+
+from benchmarks.common import print_table, seed
+
+from api.readers import ValuesReader  # noqa: E402
+from api.serializers import PersonSerializer, TeamSerializer  # noqa: E402
+from teams.models import Person, Team  # noqa: E402
+
+
+def with_serializer(serializer_class, queryset):
+    rows = list(queryset.all())
+    return rows, lambda: serializer_class(rows, many=True).data
+
+
+def with_reader(serializer_class, queryset):
+    reader = ValuesReader(serializer_class())
+    rows = list(reader.values(queryset.all()))
+    return rows, lambda: reader.represent(rows)
+
+
+def best_times(setup, serializer_class, queryset, repeat):
+    """ Return the best ``(fetch, represent)`` durations in seconds. """
+    fetch_times = []
+    represent_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows, represent = setup(serializer_class, queryset)
+        fetched = time.perf_counter()
+        represent()
+        fetch_times.append(fetched - start)
+        represent_times.append(time.perf_counter() - fetched)
+    return min(fetch_times), min(represent_times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--persons', type=int, default=100000)
+    parser.add_argument('--teams', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    seed(args.persons, args.teams)
+    cases = [
+        ('persons', PersonSerializer, Person.objects.order_by('id'), args.persons),
+        ('teams with members', TeamSerializer, Team.objects.order_by('id').prefetch_related('members'), args.teams),
+    ]
+
+    rows = []
+    for name, serializer_class, queryset, count in cases:
+        serializer_fetch, serializer_represent = best_times(with_serializer, serializer_class, queryset, args.repeat)
+        reader_fetch, reader_represent = best_times(with_reader, serializer_class, queryset, args.repeat)
+        rows.append({
+            'name': name,
+            'rows': count,
+            'serializer_represent_rows_per_s': count / serializer_represent,
+            'reader_represent_rows_per_s': count / reader_represent,
+            'represent_speedup': serializer_represent / reader_represent,
+            'total_speedup': (serializer_fetch + serializer_represent) / (reader_fetch + reader_represent),
+        })
+    print_table(rows)
+
+
+if __name__ == '__main__':
+    main()
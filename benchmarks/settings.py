@@ -0,0 +1,25 @@
+"""
+Settings for the benchmarks.
+
+Benchmarks run against a local SQLite file by default. Set ``BENCHMARK_USE_PROJECT_DB=1`` to run them
+against the database configured in ``wht_teams.settings`` instead.
+"""
+import os
+
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+from wht_teams.settings import *  # noqa: E402,F401,F403
+from wht_teams.settings import BASE_DIR  # noqa: E402
+
+if os.environ.get('BENCHMARK_USE_PROJECT_DB') != '1':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('BENCHMARK_DB', BASE_DIR / 'benchmarks' / 'benchmark.sqlite3'),
+        }
+    }
+
+# Other than when the profiles are compared, benchmarks run with DEBUG off
+if 'DJANGO_PROFILE' not in os.environ:
+    DEBUG = False
+ALLOWED_HOSTS = ['*']
@@ -0,0 +1,75 @@
+"""
+Cold start time of a worker process: importing ``wht_teams.wsgi``, then loading the URLconf.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --modules 15
+
+Each run starts a new Python process with the project settings, which is what a server does for
+every worker it spawns. The URLconf is loaded on the first request; it is timed apart since it
+imports the views. ``--modules`` also prints the slowest imports reported by ``-X importtime``.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.common import print_table, summarize
+
+STARTUP = '''
+import json, time
+start = time.perf_counter()
+import wht_teams.wsgi
+imported = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+loaded = time.perf_counter()
+print(json.dumps({'wsgi': (imported - start) * 1000, 'urlconf': (loaded - imported) * 1000}))
+'''
+
+
+def environment():
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='wht_teams.settings')
+    env.setdefault('SECRET_KEY', 'benchmark')
+    return env
+
+
+def run(extra_args=()):
+    return subprocess.run(
+        [sys.executable, *extra_args, '-c', STARTUP], capture_output=True, text=True, check=True, env=environment()
+    )
+
+
+def slowest_imports(count):
+    """ Return the ``count`` top-level imports with the largest cumulative time, in milliseconds. """
+    rows = []
+    for line in run(['-X', 'importtime']).stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if not name.startswith('  '):
+            rows.append({'module': name.strip(), 'cumulative_ms': int(cumulative_us) / 1000})
+    return sorted(rows, key=lambda row: row['cumulative_ms'], reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--modules', type=int, default=0, help="Also print this many of the slowest imports.")
+    args = parser.parse_args()
+
+    run()
+    timings = [json.loads(run().stdout) for _ in range(args.repeat)]
+    print(f'{args.repeat} new processes')
+    print_table([
+        summarize('import wht_teams.wsgi', [timing['wsgi'] for timing in timings]),
+        summarize('load URLconf', [timing['urlconf'] for timing in timings]),
+        summarize('total', [timing['wsgi'] + timing['urlconf'] for timing in timings]),
+    ])
+    if args.modules:
+        print()
+        print_table(slowest_imports(args.modules))
+
+
+if __name__ == '__main__':
+    main()
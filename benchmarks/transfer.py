@@ -0,0 +1,68 @@
+"""
+Throughput and memory of the import_data and export_data commands on persons.
+
+    BENCHMARK_DB=benchmarks/transfer.sqlite3 python -m benchmarks.transfer --persons 1000000
+
+A CSV file of ``--persons`` persons is imported into an empty database, then imported again (every
+row an update), then exported. The database is emptied first, so give it its own ``BENCHMARK_DB``
+to leave the seeded database of the other benchmarks alone. The peak resident memory is reported
+after each step: it should not grow with the number of persons.
+"""
+import argparse
+import os
+import random
+import resource
+import tempfile
+import time
+from io import StringIO
+
+from benchmarks.common import FIRST_NAMES, LAST_NAMES, clear_data, migrate, print_table
+
+from django.core.management import call_command  # noqa: E402
+
+from teams.models import Change, Person  # noqa: E402
+
+
+def peak_memory_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def write_persons(path, persons, seed):
+    rng = random.Random(seed)
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        file.write('email,first_name,last_name\n')
+        for i in range(persons):
+            file.write(f'person.{i}@example.com,{rng.choice(FIRST_NAMES)},{rng.choice(LAST_NAMES)}\n')
+
+
+def step(name, persons, command, *args):
+    start = time.perf_counter()
+    call_command(command, *args, stdout=StringIO(), stderr=StringIO())
+    seconds = time.perf_counter() - start
+    return {'step': name, 'seconds': seconds, 'rows_per_s': persons / seconds, 'peak_rss_mb': peak_memory_mb()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--persons', type=int, default=1000000)
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    migrate()
+    clear_data()
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, 'persons.csv')
+        write_persons(source, args.persons, args.seed)
+        batch = ['--batch-size', str(args.batch_size)]
+        rows = [
+            step('import (create)', args.persons, 'import_data', 'persons', source, *batch),
+            step('import (update)', args.persons, 'import_data', 'persons', source, *batch),
+            step('export', args.persons, 'export_data', 'persons', os.path.join(directory, 'export.csv'), *batch),
+        ]
+    print_table(rows)
+    print(f"{Person.objects.count()} persons, {Change.objects.count()} change log entries")
+
+
+if __name__ == '__main__':
+    main()
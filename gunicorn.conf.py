@@ -0,0 +1,71 @@
+"""
+gunicorn settings of the prod profile, read from the environment like the Django settings.
+
+    DJANGO_PROFILE=prod gunicorn wht_teams.wsgi
+
+gunicorn reads this file from the working directory. The project is imported once by the master
+process, which then forks the workers; each worker keeps its database connections open between
+requests (``DB_CONN_MAX_AGE``) and is replaced by a new one after ``WEB_MAX_REQUESTS`` requests.
+"""
+import multiprocessing
+import os
+import re
+
+# Not `from decouple import config`: module-level names are gunicorn settings, and config is one of them
+import decouple
+
+bind = decouple.config('WEB_BIND', default='0.0.0.0:8000')
+
+# Worker processes, and threads per worker; with more than one thread the workers are gthread workers
+workers = decouple.config('WEB_WORKERS', default=multiprocessing.cpu_count() * 2 + 1, cast=int)
+threads = decouple.config('WEB_THREADS', default=1, cast=int)
+
+# Import the project in the master process before forking, so that workers start ready to serve
+# and share the memory of the imported modules
+preload_app = decouple.config('WEB_PRELOAD', default=True, cast=bool)
+
+# Replace a worker after this many requests, 0 to keep it; the jitter keeps workers from being
+# replaced at the same time
+max_requests = decouple.config('WEB_MAX_REQUESTS', default=1000, cast=int)
+max_requests_jitter = decouple.config('WEB_MAX_REQUESTS_JITTER', default=100, cast=int)
+
+timeout = decouple.config('WEB_TIMEOUT', default=30, cast=int)
+keepalive = decouple.config('WEB_KEEPALIVE', default=5, cast=int)
+accesslog = decouple.config('WEB_ACCESS_LOG', default='-') or None
+
+
+# Metrics snapshots of the workers, named "<pid>-<uuid>.json" by api.metrics and written through a ".tmp" file
+METRICS_SNAPSHOT = re.compile(r'\d+-[0-9a-f]{32}\.json(\.tmp)?')
+
+
+def on_starting(server):
+    """
+    Start the metrics of this server from zero, by deleting the snapshots of the workers of its last run.
+
+    Other files and directories in API_METRICS_DIR are left alone.
+    """
+    directory = decouple.config('API_METRICS_DIR', default='')
+    if directory and os.path.isdir(directory):
+        for entry in os.scandir(directory):
+            if METRICS_SNAPSHOT.fullmatch(entry.name) and entry.is_file(follow_symlinks=False):
+                os.remove(entry.path)
+
+
+def when_ready(server):
+    """ Load the URLconf, which imports the views, in the master process too when the app is preloaded. """
+    if preload_app:
+        from django.urls import get_resolver
+        get_resolver().url_patterns
+
+
+def pre_fork(server, worker):
+    """ Close the database connections of the preloaded app, so that workers don't share them. """
+    if preload_app:
+        from django.db import connections
+        connections.close_all()
+
+
+def worker_exit(server, worker):
+    """ Write the metrics of the requests the worker served since its last snapshot. """
+    from api.metrics import registry
+    registry.aggregate()
@@ -1,18 +1,176 @@
 from django.contrib import admin
-from .models import Person, Team
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.forms.models import BaseInlineFormSet
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
 
+from .models import Membership, Person, Team
 
-class PersonAdmin(admin.ModelAdmin):
-    list_display = ['first_name', 'last_name', 'full_name']
+# Unfiltered changelists of tables at least this large show an estimated number of rows
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+
+def estimated_count(model, using='default'):
+    """
+    Return the number of rows of ``model``'s table from the planner statistics, or ``None`` without them.
+
+    The statistics are maintained by autovacuum on PostgreSQL and by ``ANALYZE`` on SQLite; reading
+    them costs one lookup instead of a scan of the whole table.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)', [table])
+        elif connection.vendor == 'sqlite':
+            try:
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table])
+            except DatabaseError:
+                # The statistics table only exists once ANALYZE ran
+                return None
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None or row[0] is None:
+        return None
+    count = int(str(row[0]).split()[0])
+    return count if count >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator using the estimated number of rows of large unfiltered tables instead of ``COUNT(*)``.
+
+    Counting every row of a large table takes longer than reading the page itself. Filtered and
+    searched lists are still counted exactly, as are small tables.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class CountRangeFilter(admin.SimpleListFilter):
+    """
+    Filters by ranges of a stored counter, served by its (counter, id) index.
+
+    Unlike a filter on a column, whose choices are its distinct values read from the whole table,
+    the choices are fixed.
+    """
+    ranges = [('0', 'None', 0, 0), ('1', '1', 1, 1), ('2-5', '2 to 5', 2, 5), ('6-', 'More than 5', 6, None)]
+
+    def lookups(self, request, model_admin):
+        return [(value, label) for value, label, low, high in self.ranges]
+
+    def queryset(self, request, queryset):
+        for value, label, low, high in self.ranges:
+            if self.value() == value:
+                queryset = queryset.filter(**{f'{self.parameter_name}__gte': low})
+                return queryset if high is None else queryset.filter(**{f'{self.parameter_name}__lte': high})
+        return queryset
+
+
+class TeamCountFilter(CountRangeFilter):
+    title = 'team count'
+    parameter_name = 'team_count'
+
+
+class MemberCountFilter(CountRangeFilter):
+    title = 'member count'
+    parameter_name = 'member_count'
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    """ Changelist settings for large tables: estimated counts, and no second count of the whole table. """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class PersonAdmin(ScalableAdmin):
+    list_display = ['first_name', 'last_name', 'email', 'team_count']
     search_fields = ['first_name', 'last_name']
-    list_filter = ['first_name', 'last_name']
+    list_filter = [TeamCountFilter]
+
+
+class MemberSelect(AutocompleteSelect):
+    """
+    Autocomplete widget of the member rows, labelled with the ``person`` loaded with the membership.
+
+    The base widget looks up its selected object with one query per row.
+    """
+    person = None
+
+    def optgroups(self, name, value, attr=None):
+        selected = [str(pk) for pk in value if str(pk) not in self.choices.field.empty_values]
+        if self.person is None or selected != [str(self.person.pk)]:
+            return super().optgroups(name, value, attr)
+        options = [] if self.is_required else [self.create_option(name, '', '', False, 0)]
+        label = self.choices.field.label_from_instance(self.person)
+        options.append(self.create_option(name, self.person.pk, label, set(selected), len(options)))
+        return [(None, options, 0)]
+
 
+class MembershipFormSet(BaseInlineFormSet):
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        if form.instance.pk is not None:
+            # Rows are labelled with the membership, whose team is the one being edited
+            form.instance.team = self.instance
+            widget = form.fields['person'].widget
+            # The admin wraps the widget to add the links to the person's pages
+            getattr(widget, 'widget', widget).person = form.instance.person
 
-class TeamAdmin(admin.ModelAdmin):
-    list_display = ['name', 'description']
+
+class MembershipInline(admin.TabularInline):
+    """ Members of the team, read with their persons in one query and picked with an autocomplete search. """
+    model = Membership
+    formset = MembershipFormSet
+    fields = ['person', 'role', 'joined_at']
+    autocomplete_fields = ['person']
+    extra = 0
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('person')
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'person':
+            kwargs['widget'] = MemberSelect(db_field, self.admin_site, using=kwargs.get('using'))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+class TeamAdmin(ScalableAdmin):
+    list_display = ['name', 'description', 'member_count']
     search_fields = ['name']
-    list_filter = ['name']
-    filter_horizontal = ('members',)
+    list_filter = [MemberCountFilter]
+    inlines = [MembershipInline]
+
+    def save_formset(self, request, form, formset, change):
+        """ Add and remove members through ``Team.members``, whose signals keep the counters and the change log. """
+        if formset.model is not Membership:
+            return super().save_formset(request, form, formset, change)
+
+        team = form.instance
+        memberships = formset.save(commit=False)
+        removed = [membership.person_id for membership in formset.deleted_objects]
+        added = [membership for membership in memberships if membership.pk is None]
+        for membership, changed_fields in formset.changed_objects:
+            if 'person' in changed_fields:
+                removed.append(Membership.objects.values_list('person_id', flat=True).get(pk=membership.pk))
+                added.append(membership)
+            else:
+                membership.save()
+
+        team.members.remove(*removed)
+        for membership in added:
+            team.members.add(
+                membership.person_id, through_defaults={'role': membership.role, 'joined_at': membership.joined_at}
+            )
 
 
 admin.site.register(Person, PersonAdmin)
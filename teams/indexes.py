@@ -0,0 +1,54 @@
+from django.db import models
+from django.db.models import Q, TextField
+from django.db.models.functions import Cast, Collate, Upper
+
+
+class SearchIndex(models.Index):
+    """
+    Index serving the case-insensitive lookups of a text field, built for the database in use.
+
+    PostgreSQL compiles these lookups to ``UPPER(field::text)``. The ``prefix`` index holds that
+    expression with the text_pattern_ops operator class, so ``istartswith`` uses the btree whatever
+    the collation is, and it also serves ``iexact``. The ``exact`` index only serves ``iexact``, and
+    the ``contains`` index is a trigram GIN serving ``icontains`` (needs the pg_trgm extension).
+
+    SQLite compiles them to ``LIKE``, which only uses an index built with the NOCASE collation.
+    Substring searches cannot use any index there, so the ``contains`` index is kept empty.
+    Other databases get a plain index on the field.
+    """
+    KINDS = ('prefix', 'exact', 'contains')
+
+    def __init__(self, *, field, kind, name):
+        if kind not in self.KINDS:
+            raise ValueError(f"SearchIndex.kind must be one of {', '.join(self.KINDS)}.")
+        self.field = field
+        self.kind = kind
+        super().__init__(fields=[field], name=name)
+
+    def deconstruct(self):
+        path, args, kwargs = super().deconstruct()
+        del kwargs['fields']
+        return path, args, {'field': self.field, 'kind': self.kind, **kwargs}
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        index = self._index_for(schema_editor.connection.vendor)
+        return index.create_sql(model, schema_editor, using=using, **kwargs)
+
+    def _index_for(self, vendor):
+        """ The index this one is built as on ``vendor``. """
+        if vendor == 'postgresql':
+            from django.contrib.postgres.indexes import GinIndex, OpClass
+
+            expression = Upper(Cast(self.field, TextField()))
+            if self.kind == 'prefix':
+                return models.Index(OpClass(expression, name='text_pattern_ops'), name=self.name)
+            if self.kind == 'contains':
+                return GinIndex(OpClass(expression, name='gin_trgm_ops'), name=self.name)
+            return models.Index(expression, name=self.name)
+
+        if self.kind == 'contains':
+            # No row has a null primary key
+            return models.Index(fields=[self.field], name=self.name, condition=Q(pk__isnull=True))
+        if vendor == 'sqlite':
+            return models.Index(Collate(self.field, 'NOCASE'), name=self.name)
+        return models.Index(fields=[self.field], name=self.name)
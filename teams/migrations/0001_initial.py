@@ -0,0 +1,32 @@
+# Generated by Django 4.2.6 on 2026-10-18 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Person',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_name', models.CharField(max_length=50, verbose_name='First Name')),
+                ('last_name', models.CharField(max_length=50, verbose_name='Last Name')),
+                ('email', models.EmailField(max_length=254, unique=True, verbose_name='Email')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Team',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Name')),
+                ('description', models.TextField(blank=True, verbose_name='Description')),
+                ('members', models.ManyToManyField(blank=True, related_name='teams', to='teams.person', verbose_name='Members')),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.6 on 2026-10-18 10:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0002_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.CharField(choices=[('person', 'Person'), ('team', 'Team'), ('membership', 'Membership')], max_length=10, verbose_name='Entity')),
+                ('action', models.CharField(choices=[('create', 'Create'), ('update', 'Update'), ('delete', 'Delete')], max_length=6, verbose_name='Action')),
+                ('object_id', models.BigIntegerField(verbose_name='Object ID')),
+                ('related_id', models.BigIntegerField(blank=True, null=True, verbose_name='Related ID')),
+                ('data', models.JSONField(blank=True, null=True, verbose_name='Data')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+            ],
+        ),
+    ]
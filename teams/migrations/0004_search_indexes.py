@@ -0,0 +1,56 @@
+from django.db import migrations
+
+# Case-insensitive lookups compile to UPPER(column::text) on PostgreSQL. Prefix searches (istartswith) need
+# the text_pattern_ops operator class to use a btree whatever the collation is, and substring searches
+# (icontains, as used by the admin search) need a trigram GIN index.
+POSTGRESQL_INDEXES = [
+    ('person_first_name_prefix_idx', 'teams_person', 'btree (UPPER(first_name::text) text_pattern_ops)'),
+    ('person_last_name_prefix_idx', 'teams_person', 'btree (UPPER(last_name::text) text_pattern_ops)'),
+    ('person_email_upper_idx', 'teams_person', 'btree (UPPER(email::text))'),
+    ('person_first_name_trgm_idx', 'teams_person', 'gin (UPPER(first_name::text) gin_trgm_ops)'),
+    ('person_last_name_trgm_idx', 'teams_person', 'gin (UPPER(last_name::text) gin_trgm_ops)'),
+    ('team_name_prefix_idx', 'teams_team', 'btree (UPPER(name::text) text_pattern_ops)'),
+    ('team_name_trgm_idx', 'teams_team', 'gin (UPPER(name::text) gin_trgm_ops)'),
+]
+
+# SQLite compiles the same lookups to LIKE, which can only use an index built with the NOCASE collation.
+SQLITE_INDEXES = [
+    ('person_first_name_nocase_idx', 'teams_person', '(first_name COLLATE NOCASE)'),
+    ('person_last_name_nocase_idx', 'teams_person', '(last_name COLLATE NOCASE)'),
+    ('person_email_nocase_idx', 'teams_person', '(email COLLATE NOCASE)'),
+    ('team_name_nocase_idx', 'teams_team', '(name COLLATE NOCASE)'),
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for name, table, definition in POSTGRESQL_INDEXES:
+            schema_editor.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} USING {definition}')
+    elif vendor == 'sqlite':
+        for name, table, definition in SQLITE_INDEXES:
+            schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} {definition}')
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for name, table, definition in POSTGRESQL_INDEXES:
+            schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+    elif vendor == 'sqlite':
+        for name, table, definition in SQLITE_INDEXES:
+            schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction, but it does not block writes on large tables
+    atomic = False
+
+    dependencies = [
+        ('teams', '0003_change'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.6 on 2026-10-18 10:48
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_memberships(apps, schema_editor):
+    Person = apps.get_model('teams', 'Person')
+    Team = apps.get_model('teams', 'Team')
+    Membership = Team.members.through
+
+    def counts(column):
+        return Coalesce(Subquery(
+            Membership.objects.filter(**{column: OuterRef('pk')}).order_by()
+            .values(column).annotate(count=Count('pk')).values('count')
+        ), 0)
+
+    Team.objects.update(member_count=counts('team_id'))
+    Person.objects.update(team_count=counts('person_id'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0004_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='person',
+            name='team_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Team Count'),
+        ),
+        migrations.AddField(
+            model_name='team',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Member Count'),
+        ),
+        migrations.RunPython(count_memberships, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['team_count', 'id'], name='teams_person_team_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='team',
+            index=models.Index(fields=['member_count', 'id'], name='teams_team_member_count_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.6 on 2026-10-18 10:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0005_member_counts'),
+    ]
+
+    operations = [
+        # The implicit table of Team.members already has these columns, the unique (team_id, person_id)
+        # constraint and an index per foreign key, so the model takes it over without touching the data
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='Membership',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('person', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='teams.person', verbose_name='Person')),
+                        ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='teams.team', verbose_name='Team')),
+                    ],
+                    options={
+                        'db_table': 'teams_team_members',
+                        'unique_together': {('team', 'person')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='team',
+                    name='members',
+                    field=models.ManyToManyField(blank=True, related_name='teams', through='teams.Membership', to='teams.person', verbose_name='Members'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='membership',
+            name='role',
+            field=models.CharField(choices=[('member', 'Member'), ('lead', 'Lead')], default='member', max_length=10, verbose_name='Role'),
+        ),
+        migrations.AddField(
+            model_name='membership',
+            name='joined_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Joined At'),
+        ),
+    ]
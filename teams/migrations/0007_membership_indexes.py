@@ -0,0 +1,50 @@
+from django.db import migrations, models
+
+PERSON_TEAM_INDEX = models.Index(fields=['person', 'team'], name='teams_member_person_team_idx')
+
+
+def add_person_team_index(apps, schema_editor):
+    Membership = apps.get_model('teams', 'Membership')
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.add_index(Membership, PERSON_TEAM_INDEX, concurrently=True)
+    else:
+        schema_editor.add_index(Membership, PERSON_TEAM_INDEX)
+
+
+def remove_person_team_index(apps, schema_editor):
+    Membership = apps.get_model('teams', 'Membership')
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.remove_index(Membership, PERSON_TEAM_INDEX, concurrently=True)
+    else:
+        schema_editor.remove_index(Membership, PERSON_TEAM_INDEX)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction, but it does not block writes on large tables
+    atomic = False
+
+    dependencies = [
+        ('teams', '0006_membership'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name='membership', index=PERSON_TEAM_INDEX),
+            ],
+            database_operations=[
+                migrations.RunPython(add_person_team_index, remove_person_team_index),
+            ],
+        ),
+        # Both single-column indexes are prefixes of a composite index now, so they only slow writes down
+        migrations.AlterField(
+            model_name='membership',
+            name='person',
+            field=models.ForeignKey(db_index=False, on_delete=models.deletion.CASCADE, to='teams.person', verbose_name='Person'),
+        ),
+        migrations.AlterField(
+            model_name='membership',
+            name='team',
+            field=models.ForeignKey(db_index=False, on_delete=models.deletion.CASCADE, to='teams.team', verbose_name='Team'),
+        ),
+    ]
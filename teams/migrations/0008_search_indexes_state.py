@@ -0,0 +1,72 @@
+from django.db import migrations
+
+from teams.indexes import SearchIndex
+
+# The indexes 0004 created with raw SQL, now declared on the models so that migrations know them.
+# SQLite rebuilds a table to add a field, which dropped them in 0005 since they were missing from the state.
+SEARCH_INDEXES = [
+    ('person', SearchIndex(field='first_name', kind='prefix', name='person_first_name_prefix_idx')),
+    ('person', SearchIndex(field='last_name', kind='prefix', name='person_last_name_prefix_idx')),
+    ('person', SearchIndex(field='email', kind='exact', name='person_email_upper_idx')),
+    ('person', SearchIndex(field='first_name', kind='contains', name='person_first_name_trgm_idx')),
+    ('person', SearchIndex(field='last_name', kind='contains', name='person_last_name_trgm_idx')),
+    ('team', SearchIndex(field='name', kind='prefix', name='team_name_prefix_idx')),
+    ('team', SearchIndex(field='name', kind='contains', name='team_name_trgm_idx')),
+]
+
+# Names of the SQLite indexes of 0004, replaced by the ones above
+SQLITE_INDEX_NAMES = [
+    'person_first_name_nocase_idx', 'person_last_name_nocase_idx', 'person_email_nocase_idx', 'team_name_nocase_idx',
+]
+
+
+def existing_indexes(schema_editor, model):
+    with schema_editor.connection.cursor() as cursor:
+        return schema_editor.connection.introspection.get_constraints(cursor, model._meta.db_table)
+
+
+def add_search_indexes(apps, schema_editor):
+    """ Create the search indexes that are missing; on PostgreSQL those of 0004 are still there. """
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    elif vendor == 'sqlite':
+        for name in SQLITE_INDEX_NAMES:
+            schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+    for model_name, index in SEARCH_INDEXES:
+        model = apps.get_model('teams', model_name)
+        if index.name in existing_indexes(schema_editor, model):
+            continue
+        if vendor == 'postgresql':
+            schema_editor.add_index(model, index, concurrently=True)
+        else:
+            schema_editor.add_index(model, index)
+
+
+def remove_search_indexes(apps, schema_editor):
+    """ Leave the PostgreSQL indexes to 0004, which created them; other databases lost theirs in 0005. """
+    if schema_editor.connection.vendor == 'postgresql':
+        return
+    for model_name, index in SEARCH_INDEXES:
+        schema_editor.remove_index(apps.get_model('teams', model_name), index)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction, but it does not block writes on large tables
+    atomic = False
+
+    dependencies = [
+        ('teams', '0007_membership_indexes'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name=model_name, index=index) for model_name, index in SEARCH_INDEXES
+            ],
+            database_operations=[
+                migrations.RunPython(add_search_indexes, remove_search_indexes),
+            ],
+        ),
+    ]
@@ -1,10 +1,26 @@
 from django.db import models
+from django.utils import timezone
+
+from teams.indexes import SearchIndex
 
 
 class Person(models.Model):
     first_name = models.CharField(max_length=50, verbose_name='First Name')
     last_name = models.CharField(max_length=50, verbose_name='Last Name')
     email = models.EmailField(unique=True, verbose_name='Email')
+    team_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='Team Count')
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name='Updated At')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['team_count', 'id'], name='teams_person_team_count_idx'),
+            # Searches by name prefix and by email, and the admin search
+            SearchIndex(field='first_name', kind='prefix', name='person_first_name_prefix_idx'),
+            SearchIndex(field='last_name', kind='prefix', name='person_last_name_prefix_idx'),
+            SearchIndex(field='email', kind='exact', name='person_email_upper_idx'),
+            SearchIndex(field='first_name', kind='contains', name='person_first_name_trgm_idx'),
+            SearchIndex(field='last_name', kind='contains', name='person_last_name_trgm_idx'),
+        ]
 
     def __str__(self):
         return self.full_name
@@ -17,7 +33,75 @@ class Person(models.Model):
 class Team(models.Model):
     name = models.CharField(max_length=100, unique=True, verbose_name='Name')
     description = models.TextField(blank=True, verbose_name='Description')
-    members = models.ManyToManyField(Person, blank=True, related_name='teams', verbose_name='Members')
+    members = models.ManyToManyField(
+        Person, through='Membership', blank=True, related_name='teams', verbose_name='Members'
+    )
+    member_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='Member Count')
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name='Updated At')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['member_count', 'id'], name='teams_team_member_count_idx'),
+            # Searches by name prefix, and the admin search
+            SearchIndex(field='name', kind='prefix', name='team_name_prefix_idx'),
+            SearchIndex(field='name', kind='contains', name='team_name_trgm_idx'),
+        ]
 
     def __str__(self):
         return self.name
+
+
+class Membership(models.Model):
+    """
+    Membership of a person in a team, the through model of ``Team.members``.
+
+    Memberships are changed through ``Team.members`` and ``Person.teams``, whose signals keep the
+    counters, the change log and the API cache in step; rows written directly bypass them.
+    """
+    MEMBER = 'member'
+    LEAD = 'lead'
+    ROLE_CHOICES = [(MEMBER, 'Member'), (LEAD, 'Lead')]
+
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, db_index=False, verbose_name='Team')
+    person = models.ForeignKey(Person, on_delete=models.CASCADE, db_index=False, verbose_name='Person')
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES, default=MEMBER, verbose_name='Role')
+    joined_at = models.DateTimeField(default=timezone.now, verbose_name='Joined At')
+
+    class Meta:
+        # Kept from the implicit table: the unique (team, person) index serves the members of a team
+        # and membership checks, and (person, team) covers the teams of a person
+        db_table = 'teams_team_members'
+        unique_together = [('team', 'person')]
+        indexes = [models.Index(fields=['person', 'team'], name='teams_member_person_team_idx')]
+
+    def __str__(self):
+        return f"{self.person} in {self.team}"
+
+
+class Change(models.Model):
+    """
+    Append-only log of the changes made to persons, teams and memberships.
+
+    The auto-incremented ID is the cursor of the change feed. For memberships ``object_id`` is the
+    team and ``related_id`` the person. Deletes are recorded as tombstones; deleting a person or a
+    team implicitly deletes all of its memberships.
+    """
+    PERSON = 'person'
+    TEAM = 'team'
+    MEMBERSHIP = 'membership'
+    ENTITY_CHOICES = [(PERSON, 'Person'), (TEAM, 'Team'), (MEMBERSHIP, 'Membership')]
+
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+    ACTION_CHOICES = [(CREATE, 'Create'), (UPDATE, 'Update'), (DELETE, 'Delete')]
+
+    entity = models.CharField(max_length=10, choices=ENTITY_CHOICES, verbose_name='Entity')
+    action = models.CharField(max_length=6, choices=ACTION_CHOICES, verbose_name='Action')
+    object_id = models.BigIntegerField(verbose_name='Object ID')
+    related_id = models.BigIntegerField(null=True, blank=True, verbose_name='Related ID')
+    data = models.JSONField(null=True, blank=True, verbose_name='Data')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Created At')
+
+    def __str__(self):
+        return f"{self.action} {self.entity} {self.object_id}"
@@ -0,0 +1,218 @@
+import json
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connection
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from teams.models import Change, Membership, Person, Team
+
+_suspended = ContextVar('teams_signal_handlers_suspended', default=False)
+
+CHANGE_ENTITIES = {Person: Change.PERSON, Team: Change.TEAM}
+# Denormalized number of memberships of each side, and the membership column pointing to that side
+COUNTERS = {Team: 'member_count', Person: 'team_count'}
+MEMBERSHIP_COLUMNS = {Team: 'team_id', Person: 'person_id'}
+CHANGE_FIELDS = {
+    Person: ['first_name', 'last_name', 'email'],
+    Team: ['name', 'description'],
+}
+
+
+def handlers_suspended():
+    return _suspended.get()
+
+
+@contextmanager
+def suspend_handlers():
+    """
+    Disable the per-object signal handlers inside the block.
+
+    Meant for bulk writers, which apply the same side effects once for the whole batch instead.
+    """
+    token = _suspended.set(True)
+    try:
+        yield
+    finally:
+        _suspended.reset(token)
+
+
+def touch_teams(team_ids):
+    """ Bump the modification stamp of the given teams. """
+    Team.objects.filter(pk__in=team_ids).update(updated_at=timezone.now())
+
+
+def touch_teams_of(person_ids):
+    """ Bump the modification stamp of every team the given persons are members of. """
+    Team.objects.filter(members__in=person_ids).update(updated_at=timezone.now())
+
+
+def add_to_counters(model, pks, change):
+    """
+    Add ``change`` to the counter of the ``model`` objects in ``pks`` and bump their stamps.
+
+    Counters are incremented in the database, so concurrent changes don't overwrite each other,
+    and ``pks`` can be a subquery.
+    """
+    counter = COUNTERS[model]
+    model.objects.filter(pk__in=pks).update(**{counter: Greatest(F(counter) + change, 0)}, updated_at=timezone.now())
+
+
+def uncount_memberships(memberships, model):
+    """
+    Subtract the ``memberships`` about to be deleted from the counters of their ``model`` side.
+
+    The memberships are locked first, so a concurrent delete of the same rows waits for this one
+    and then finds nothing left to subtract. Objects are grouped by their number of memberships
+    and each group is updated with one statement selecting it by subquery.
+    """
+    column = MEMBERSHIP_COLUMNS[model]
+    list(memberships.select_for_update().values_list('pk', flat=True))
+    per_object = memberships.order_by().values(column).annotate(count=Count('pk'))
+    for count in per_object.values_list('count', flat=True).distinct():
+        add_to_counters(model, per_object.filter(count=count).values(column), -count)
+
+
+def count_memberships(pairs):
+    """
+    Add the ``(team_id, person_id)`` memberships just created to the counters of both sides.
+
+    Like in ``uncount_memberships``, objects are grouped by their number of new memberships and
+    each group is updated with one statement.
+    """
+    for model, side in ((Team, 0), (Person, 1)):
+        per_object = Counter(pair[side] for pair in pairs)
+        groups = defaultdict(list)
+        for pk, count in per_object.items():
+            groups[count].append(pk)
+        for count, pks in groups.items():
+            add_to_counters(model, pks, count)
+
+
+def insert_changes(rows):
+    """
+    Append ``(entity, action, object_id, related_id, data)`` rows to the change log with one ``executemany``.
+
+    No model instance is built and the timestamp is adapted once, which makes large batches several
+    times cheaper than ``bulk_create``.
+    """
+    created_at = connection.ops.adapt_datetimefield_value(timezone.now())
+    params = [
+        (entity, action, object_id, related_id, None if data is None else json.dumps(data), created_at)
+        for entity, action, object_id, related_id, data in rows
+    ]
+    if not params:
+        return
+    quote = connection.ops.quote_name
+    columns = ['entity', 'action', 'object_id', 'related_id', 'data', 'created_at']
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {quote(Change._meta.db_table)} ({', '.join(quote(column) for column in columns)}) "
+            f"VALUES ({', '.join(['%s'] * len(columns))})",
+            params,
+        )
+
+
+def record_changes(action, instances):
+    """ Append a change of ``action`` to the change log for each of the given persons or teams. """
+    insert_changes(
+        (
+            CHANGE_ENTITIES[type(instance)],
+            action,
+            instance.pk,
+            None,
+            None if action == Change.DELETE else {
+                field: getattr(instance, field) for field in CHANGE_FIELDS[type(instance)]
+            },
+        )
+        for instance in instances
+    )
+
+
+def record_membership_changes(action, pairs):
+    """ Append a membership change of ``action`` to the change log for each ``(team_id, person_id)`` pair. """
+    insert_changes((Change.MEMBERSHIP, action, team_id, person_id, None) for team_id, person_id in pairs)
+
+
+def _membership_pairs(instance, reverse, pk_set):
+    if reverse:
+        return [(team_id, instance.pk) for team_id in pk_set]
+    return [(instance.pk, person_id) for person_id in pk_set]
+
+
+@receiver(post_save, sender=Person)
+@receiver(post_save, sender=Team)
+def record_saved(sender, instance, created, **kwargs):
+    if handlers_suspended():
+        return
+    record_changes(Change.CREATE if created else Change.UPDATE, [instance])
+
+
+@receiver(post_delete, sender=Person)
+@receiver(post_delete, sender=Team)
+def record_deleted(sender, instance, **kwargs):
+    if handlers_suspended():
+        return
+    record_changes(Change.DELETE, [instance])
+
+
+@receiver(m2m_changed, sender=Membership)
+def record_member_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if handlers_suspended():
+        return
+    if action == 'post_add':
+        record_membership_changes(Change.CREATE, _membership_pairs(instance, reverse, pk_set))
+    elif action == 'post_remove':
+        record_membership_changes(Change.DELETE, _membership_pairs(instance, reverse, pk_set))
+    elif action == 'pre_clear':
+        related = instance.teams if reverse else instance.members
+        pk_set = related.values_list('pk', flat=True)
+        record_membership_changes(Change.DELETE, _membership_pairs(instance, reverse, pk_set))
+
+
+@receiver(post_save, sender=Person)
+def touch_teams_of_saved_person(sender, instance, created, **kwargs):
+    if created or handlers_suspended():
+        return
+    touch_teams_of([instance.pk])
+
+
+@receiver(pre_delete, sender=Person)
+def uncount_deleted_person(sender, instance, **kwargs):
+    if handlers_suspended():
+        return
+    uncount_memberships(Membership.objects.filter(person_id=instance.pk), Team)
+
+
+@receiver(pre_delete, sender=Team)
+def uncount_deleted_team(sender, instance, **kwargs):
+    if handlers_suspended():
+        return
+    uncount_memberships(Membership.objects.filter(team_id=instance.pk), Person)
+
+
+@receiver(m2m_changed, sender=Membership)
+def count_member_change(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """ Keep the counters of both sides in step with the memberships, which also bumps their stamps. """
+    if handlers_suspended():
+        return
+    memberships = Membership.objects.filter(**{MEMBERSHIP_COLUMNS[type(instance)]: instance.pk})
+    related = MEMBERSHIP_COLUMNS[model]
+    if action == 'post_add' and pk_set:
+        add_to_counters(type(instance), [instance.pk], len(pk_set))
+        add_to_counters(model, pk_set, 1)
+    elif action == 'pre_remove':
+        # Only the memberships that exist are deleted, and they are locked like in uncount_memberships
+        removed = memberships.filter(**{f'{related}__in': pk_set}).select_for_update()
+        removed = list(removed.values_list(related, flat=True))
+        if removed:
+            add_to_counters(type(instance), [instance.pk], -len(removed))
+            add_to_counters(model, removed, -1)
+    elif action == 'pre_clear':
+        uncount_memberships(memberships, model)
+        type(instance).objects.filter(pk=instance.pk).update(**{COUNTERS[type(instance)]: 0}, updated_at=timezone.now())
@@ -0,0 +1,87 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from teams.admin import ESTIMATED_COUNT_THRESHOLD, estimated_count
+from teams.models import Person, Team
+
+
+def create_persons(count, start=0):
+    return Person.objects.bulk_create(
+        Person(first_name='Admin', last_name='Test', email=f'admin.{number}@example.com')
+        for number in range(start, start + count)
+    )
+
+
+def full_counts(queries, table):
+    """ The queries counting every row of ``table``. """
+    return [
+        query['sql'] for query in queries
+        if query['sql'].startswith('SELECT COUNT(*)') and f'FROM "{table}"' in query['sql']
+        and 'WHERE' not in query['sql']
+    ]
+
+
+class AdminScalabilityTests(APITestCase):
+    rows = 100000
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+
+    def get(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, queries.captured_queries
+
+    def test_person_changelist_at_100k_rows(self):
+        create_persons(100)
+        small, small_queries = self.get('/admin/teams/person/')
+
+        create_persons(self.rows - 100, start=100)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.assertEqual(estimated_count(Person), self.rows)
+        large, large_queries = self.get('/admin/teams/person/')
+
+        self.assertLessEqual(len(large_queries), len(small_queries))
+        self.assertEqual(full_counts(large_queries, 'teams_person'), [])
+        self.assertEqual(large.context['cl'].result_count, self.rows)
+
+        # Filtered lists are counted exactly, and the filter choices are not read from the table
+        filtered, filtered_queries = self.get('/admin/teams/person/', {'team_count': '0'})
+        self.assertEqual(filtered.context['cl'].result_count, self.rows)
+        self.assertEqual(len(filtered_queries), len(large_queries))
+        self.assertFalse([query for query in filtered_queries if 'DISTINCT' in query['sql']])
+
+    def test_small_tables_are_counted_exactly(self):
+        create_persons(10)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.assertLess(estimated_count(Person), ESTIMATED_COUNT_THRESHOLD)
+        response, queries = self.get('/admin/teams/person/')
+        self.assertEqual(response.context['cl'].result_count, 10)
+        self.assertEqual(len(full_counts(queries, 'teams_person')), 1)
+
+    def test_team_changelist_filters_by_member_count(self):
+        team = Team.objects.create(name='Big Team')
+        Team.objects.create(name='Empty Team')
+        team.members.add(*create_persons(6))
+
+        response, queries = self.get('/admin/teams/team/', {'member_count': '6-'})
+        self.assertEqual([team.name for team in response.context['cl'].result_list], ['Big Team'])
+        response, queries = self.get('/admin/teams/team/', {'member_count': '0'})
+        self.assertEqual([team.name for team in response.context['cl'].result_list], ['Empty Team'])
+
+    def test_team_change_page_queries_do_not_grow_with_members(self):
+        team = Team.objects.create(name='Big Team')
+        team.members.add(*create_persons(5))
+        # The first request also fills the content type cache
+        self.get(f'/admin/teams/team/{team.id}/change/')
+        response, few = self.get(f'/admin/teams/team/{team.id}/change/')
+        self.assertContains(response, 'Admin Test')
+
+        team.members.add(*create_persons(100, start=5))
+        response, many = self.get(f'/admin/teams/team/{team.id}/change/')
+        self.assertEqual(len(many), len(few))
@@ -0,0 +1,104 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework import status
+
+from teams.models import Person, Team
+
+
+class AsyncReadViewTests(TestCase):
+    persons_url = '/api/v1/persons/'
+    teams_url = '/api/v1/teams/'
+
+    def setUp(self):
+        cache.clear()
+        self.person = Person.objects.create(first_name="Viktoria", last_name="Kit", email="viki.kit@example.com")
+        self.other_person = Person.objects.create(first_name="Matviy", last_name="Luxe", email="matviy.luxe@example.com")
+        self.team = Team.objects.create(name='Test Team', description='This is a test team')
+        self.team.members.add(self.person, self.other_person)
+        Team.objects.create(name='Empty Team')
+
+    async def get_async(self, url, data=None, headers=None):
+        response = await self.async_client.get(url, data, headers=headers)
+        self.assertEqual(response.resolver_match.func.__module__, 'api.async_views')
+        return response
+
+    async def assertSameAsSync(self, url, data=None):
+        """ The async view must answer exactly like the sync viewset. """
+        response = await self.get_async(url, data)
+        await cache.aclear()
+        expected = await self.sync_get(url, data)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.content, expected.content)
+        return response
+
+    async def sync_get(self, url, data=None):
+        return await sync_to_async(self.client.get)(url, data)
+
+    async def test_list_persons(self):
+        await self.assertSameAsSync(self.persons_url)
+
+    async def test_list_teams(self):
+        await self.assertSameAsSync(self.teams_url)
+
+    async def test_retrieve(self):
+        await self.assertSameAsSync(f'{self.persons_url}{self.person.id}/')
+        await self.assertSameAsSync(f'{self.teams_url}{self.team.id}/')
+
+    async def test_retrieve_not_found(self):
+        response = await self.assertSameAsSync(f'{self.persons_url}999/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_filters_and_sparse_fields(self):
+        await self.assertSameAsSync(self.persons_url, {'name': 'mat', 'fields': 'id,email'})
+        await self.assertSameAsSync(self.teams_url, {'fields': 'id,members'})
+        await self.assertSameAsSync(self.teams_url, {'fields': 'id,members', 'expand': 'members'})
+
+    async def test_invalid_parameters(self):
+        response = await self.assertSameAsSync(self.persons_url, {'team': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = await self.assertSameAsSync(self.persons_url, {'fields': 'password'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_pagination(self):
+        response = await self.assertSameAsSync(self.persons_url, {'page_size': 1})
+        next_page = await self.assertSameAsSync(response.json()['next'])
+        self.assertEqual([person['id'] for person in next_page.json()['results']], [self.other_person.id])
+        previous_page = await self.assertSameAsSync(next_page.json()['previous'])
+        self.assertEqual([person['id'] for person in previous_page.json()['results']], [self.person.id])
+
+    async def test_conditional_get(self):
+        response = await self.get_async(self.teams_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for _ in range(2):
+            not_modified = await self.get_async(self.teams_url, headers={'If-None-Match': response['ETag']})
+            self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_writes_go_to_the_viewset(self):
+        data = {'first_name': 'Andrii', 'last_name': 'Shevchenko', 'email': 'a.shevchenko@example.com'}
+        response = await self.async_client.post(self.persons_url, data, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = await self.get_async(self.persons_url, {'email': data['email']})
+        self.assertEqual(len(response.json()['results']), 1)
+
+    def sync_export(self, url, accept):
+        response = self.client.get(url, HTTP_ACCEPT=accept)
+        self.assertFalse(response.is_async)
+        return b''.join(response.streaming_content)
+
+    async def test_exports_stream_asynchronously(self):
+        for url in (f'{self.persons_url}export/', f'{self.teams_url}export/'):
+            for accept in ('application/x-ndjson', 'application/json'):
+                response = await self.async_client.get(url, headers={'Accept': accept})
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                # A sync iterator would be read whole by the ASGI handler before anything is sent
+                self.assertTrue(response.is_async)
+                content = b''.join([chunk async for chunk in response.streaming_content])
+
+                expected = await sync_to_async(self.sync_export)(url, accept)
+                self.assertEqual(content, expected)
+
+    def test_sync_requests_use_the_viewsets(self):
+        response = self.client.get(self.persons_url)
+        self.assertEqual(response.resolver_match.func.cls.__name__, 'PersonViewSet')
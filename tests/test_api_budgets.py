@@ -0,0 +1,168 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from api.budgets import QueryBudgetExceeded, QueryBudgetTestMixin
+from api.management.commands.seed_data import clear_data, generate_data
+from api.serializers import PersonBulk
+from api.views import ChangeViewSet, PersonViewSet, TeamViewSet
+from teams.models import Person, Team
+
+
+class QueryBudgetTests(QueryBudgetTestMixin, APITestCase):
+    persons_url = '/api/v1/persons/'
+    teams_url = '/api/v1/teams/'
+    sizes = (1, 100, 1000)
+
+    def request(self, view, action, method, path, data=None, **kwargs):
+        """ Send a request with an empty cache, check it against the budget of its action. """
+        cache.clear()
+        with self.assertWithinQueryBudget(view, action) as recorder:
+            response = getattr(self.client, method)(path, data, **kwargs)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertLess(response.status_code, 400, response.content if not response.streaming else b'')
+        self.counts.append((f'{view.__name__}.{action}', len(recorder.queries)))
+        return response
+
+    def run_actions(self, size):
+        """ Run every action of the viewsets on ``size`` persons and teams, the first team having all the persons. """
+        clear_data()
+        generate_data(persons=size, teams=size, memberships=min(3, size))
+        person_ids = list(Person.objects.order_by('id').values_list('id', flat=True))
+        team = Team.objects.order_by('id').first()
+        team.members.add(*person_ids)
+        team_url = f'{self.teams_url}{team.id}/'
+        person_url = f'{self.persons_url}{person_ids[0]}/'
+        # Write payloads keep the same size, under the number of rows the database writes per statement
+        items = [{'first_name': 'Bulk', 'last_name': 'Test', 'email': f'bulk.{i}@example.com'} for i in range(10)]
+
+        self.request(PersonViewSet, 'list', 'get', self.persons_url)
+        self.request(PersonViewSet, 'list', 'get', self.persons_url, {'unpaginated': 'true'})
+        self.request(PersonViewSet, 'list', 'get', self.persons_url, {'fields': 'id,email', 'page_size': 1000})
+        self.request(PersonViewSet, 'retrieve', 'get', person_url)
+        self.request(PersonViewSet, 'teams', 'get', f'{person_url}teams/')
+        self.request(PersonViewSet, 'co_members', 'get', f'{person_url}co_members/')
+        self.request(PersonViewSet, 'update', 'put', person_url, {
+            'first_name': 'Budget', 'last_name': 'Test', 'email': 'person.0@example.com'
+        })
+        self.request(PersonViewSet, 'partial_update', 'patch', person_url, {'last_name': 'Patched'})
+        self.request(PersonViewSet, 'export', 'get', f'{self.persons_url}export/')
+        self.request(PersonViewSet, 'create', 'post', self.persons_url, {
+            'first_name': 'Budget', 'last_name': 'Test', 'email': 'budget.test@example.com'
+        })
+        bulk_url = f'{self.persons_url}bulk/'
+        self.request(PersonViewSet, 'bulk', 'post', bulk_url, {'operation': 'upsert', 'items': items}, format='json')
+        self.request(PersonViewSet, 'bulk', 'post', bulk_url, {'operation': 'upsert', 'items': items}, format='json')
+        bulk_ids = list(Person.objects.filter(first_name='Bulk').values_list('id', flat=True))
+
+        self.request(TeamViewSet, 'list', 'get', self.teams_url)
+        self.request(TeamViewSet, 'list', 'get', self.teams_url, {'expand': 'members', 'page_size': 1000})
+        self.request(TeamViewSet, 'list', 'get', self.teams_url, {'fields': 'id,name,members', 'page_size': 1000})
+        self.request(TeamViewSet, 'retrieve', 'get', team_url)
+        self.request(TeamViewSet, 'retrieve', 'get', team_url, {'expand': 'members'})
+        other_team = Team.objects.order_by('-id').first()
+        self.request(TeamViewSet, 'common_members', 'get', f'{team_url}common_members/', {'team': other_team.id})
+        self.request(TeamViewSet, 'overlap', 'get', f'{team_url}overlap/')
+        self.request(TeamViewSet, 'overlap', 'get', f'{team_url}overlap/', {'team': other_team.id})
+        self.request(TeamViewSet, 'update', 'put', team_url, {'name': 'Budget Team', 'description': 'Updated'})
+        self.request(TeamViewSet, 'partial_update', 'patch', team_url, {'description': 'Patched'})
+        self.request(TeamViewSet, 'export', 'get', f'{self.teams_url}export/')
+        self.request(TeamViewSet, 'create', 'post', self.teams_url, {'name': 'New Budget Team'})
+        new_team_url = f"{self.teams_url}{Team.objects.get(name='New Budget Team').id}/"
+        self.request(TeamViewSet, 'add_member', 'post', f'{team_url}add_member/', {'person_id': bulk_ids[0]})
+        self.request(TeamViewSet, 'remove_member', 'post', f'{team_url}remove_member/', {'person_id': bulk_ids[0]})
+        members_url = f'{team_url}members/'
+        new_members_url = f'{new_team_url}members/'
+        self.request(TeamViewSet, 'members', 'post', members_url, {'add': bulk_ids[:5]}, format='json')
+        self.request(TeamViewSet, 'members', 'post', members_url, {
+            'add': bulk_ids[5:], 'remove': bulk_ids[:5]
+        }, format='json')
+        self.request(TeamViewSet, 'members', 'post', new_members_url, {'replace': bulk_ids[:5]}, format='json')
+        self.request(TeamViewSet, 'members', 'post', new_members_url, {'replace': bulk_ids[5:]}, format='json')
+        self.request(PersonViewSet, 'bulk', 'post', bulk_url, {'operation': 'delete', 'ids': bulk_ids}, format='json')
+
+        created = Person.objects.get(email='budget.test@example.com')
+        team.members.add(created)
+        self.request(PersonViewSet, 'destroy', 'delete', f'{self.persons_url}{created.id}/')
+        self.request(TeamViewSet, 'destroy', 'delete', team_url)
+        self.request(ChangeViewSet, 'list', 'get', '/api/v1/changes/')
+
+    def test_budgets_do_not_grow_with_data(self):
+        counts = {}
+        for size in self.sizes:
+            self.counts = []
+            self.run_actions(size)
+            counts[size] = self.counts
+
+        for size in self.sizes[1:]:
+            self.assertEqual(counts[size], counts[self.sizes[0]], f"Query counts grew from size 1 to {size}.")
+
+    def test_every_action_has_a_budget(self):
+        for view in (PersonViewSet, TeamViewSet, ChangeViewSet):
+            for action in view.get_extra_actions():
+                self.assertIn(action.__name__, view.query_budgets)
+            for action in ('list', 'retrieve', 'create', 'update', 'partial_update', 'destroy'):
+                if hasattr(view, action):
+                    self.assertIn(action, view.query_budgets)
+
+    def test_over_budget_fails(self):
+        Person.objects.create(first_name='Viktoria', last_name='Kit', email='viki.kit@example.com')
+        cache.clear()
+        with mock.patch.dict(PersonViewSet.query_budgets, {'list': 1}):
+            with self.assertRaises(AssertionError) as raised:
+                with self.assertWithinQueryBudget(PersonViewSet, 'list'):
+                    self.client.get(self.persons_url)
+        self.assertIn("PersonViewSet.list ran 2 queries, over its budget of 1", str(raised.exception))
+
+    @override_settings(API_QUERY_BUDGETS=True)
+    def test_middleware_fails_request_over_budget(self):
+        Person.objects.create(first_name='Viktoria', last_name='Kit', email='viki.kit@example.com')
+        cache.clear()
+        with mock.patch.dict(PersonViewSet.query_budgets, {'list': 1}):
+            with self.assertRaises(QueryBudgetExceeded) as raised:
+                self.client.get(self.persons_url)
+        self.assertEqual(len(raised.exception.queries), 2)
+        self.assertIn('"teams_person"', raised.exception.queries[-1])
+
+        cache.clear()
+        self.assertEqual(self.client.get(self.persons_url).status_code, 200)
+
+    @override_settings(API_QUERY_BUDGETS=True)
+    def test_middleware_reports_writes_over_budget(self):
+        # The person is saved by the time the queries are counted, so the request is not failed
+        with mock.patch.dict(PersonViewSet.query_budgets, {'create': 0}):
+            with self.assertLogs('api.budgets', 'WARNING') as logs:
+                response = self.client.post(self.persons_url, {
+                    'first_name': 'Viktoria', 'last_name': 'Kit', 'email': 'viki.kit@example.com'
+                })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response['Query-Budget-Exceeded'], '2 queries, budget 0')
+        self.assertIn("PersonViewSet.create ran 2 queries, over its budget of 0", logs.output[0])
+        self.assertTrue(Person.objects.filter(email='viki.kit@example.com').exists())
+
+    @override_settings(API_QUERY_BUDGETS=True)
+    def test_middleware_leaves_out_batched_actions(self):
+        items = [
+            {'first_name': 'Bulk', 'last_name': 'Test', 'email': f'bulk.{i}@example.com'}
+            for i in range(PersonBulk.BULK_MAX_ITEMS)
+        ]
+        response = self.client.post(f'{self.persons_url}bulk/', {'operation': 'create', 'items': items}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Query-Budget-Exceeded', response)
+        self.assertEqual(Person.objects.count(), PersonBulk.BULK_MAX_ITEMS)
+
+        team = Team.objects.create(name='Bulk Team')
+        response = self.client.post(
+            f'{self.teams_url}{team.id}/members/', {'add': response.data['created']}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(team.members.count(), PersonBulk.BULK_MAX_ITEMS)
+
+    @override_settings(API_QUERY_BUDGETS=False)
+    def test_middleware_disabled(self):
+        cache.clear()
+        with mock.patch.dict(PersonViewSet.query_budgets, {'list': 0}):
+            self.assertEqual(self.client.get(self.persons_url).status_code, 200)
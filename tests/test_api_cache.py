@@ -0,0 +1,167 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.cache import invalidate, response_cache_key
+from teams.models import Person, Team
+
+
+class ResponseCacheTests(APITestCase):
+    persons_url = '/api/v1/persons/'
+    teams_url = '/api/v1/teams/'
+
+    def setUp(self):
+        cache.clear()
+        self.person = Person.objects.create(first_name="Viktoria", last_name="Kit", email="viki.kit@example.com")
+        self.other_person = Person.objects.create(first_name="Matviy", last_name="Luxe", email="matviy.luxe@example.com")
+        self.team = Team.objects.create(name='Test Team')
+        self.other_team = Team.objects.create(name='Other Team')
+        self.team.members.add(self.person)
+
+        self.person_url = f'{self.persons_url}{self.person.id}/'
+        self.team_url = f'{self.teams_url}{self.team.id}/'
+        self.other_team_url = f'{self.teams_url}{self.other_team.id}/'
+
+    def get_cached(self, url):
+        """ Prime the cache for ``url`` and check the next request is served without queries. """
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            cached = self.client.get(url)
+        self.assertEqual(cached.data, response.data)
+        return response
+
+    def get_uncached(self, url):
+        """ Request ``url`` and check the response was built from the database. """
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertGreater(len(context.captured_queries), 0, 'Response was served from the cache.')
+        return response
+
+    def test_reads_are_cached(self):
+        for url in (self.persons_url, self.person_url, self.teams_url, self.team_url):
+            self.get_cached(url)
+
+    def test_list_pages_are_cached_separately(self):
+        first_page = self.get_cached(f'{self.persons_url}?page_size=1')
+        second_page = self.get_cached(first_page.data['next'])
+        self.assertNotEqual(first_page.data['results'], second_page.data['results'])
+
+    def test_create_person_invalidates_person_list(self):
+        self.get_cached(self.persons_url)
+        self.get_cached(self.person_url)
+        self.client.post(self.persons_url, {'first_name': 'Andrii', 'last_name': 'Shevchenko', 'email': 'a@example.com'})
+
+        response = self.get_uncached(self.persons_url)
+        self.assertEqual(len(response.data['results']), 3)
+        self.get_cached(self.person_url)
+
+    def test_update_person_invalidates_person_and_their_teams(self):
+        for url in (self.persons_url, self.person_url, self.teams_url, self.team_url, self.other_team_url):
+            self.get_cached(url)
+        self.client.patch(self.person_url, {'first_name': 'Viktoriia'})
+
+        self.assertEqual(self.get_uncached(self.person_url).data['first_name'], 'Viktoriia')
+        self.assertEqual(self.get_uncached(self.persons_url).data['results'][0]['first_name'], 'Viktoriia')
+        self.assertEqual(self.get_uncached(self.team_url).data['members'][0]['first_name'], 'Viktoriia')
+        self.get_uncached(self.teams_url)
+        self.get_cached(self.other_team_url)
+
+    def test_delete_person_invalidates_person_and_their_teams(self):
+        for url in (self.persons_url, self.person_url, self.teams_url, self.team_url, self.other_team_url):
+            self.get_cached(url)
+        self.client.delete(self.person_url)
+
+        self.assertEqual(self.client.get(self.person_url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(len(self.get_uncached(self.persons_url).data['results']), 1)
+        self.assertEqual(self.get_uncached(self.team_url).data['members'], [])
+        self.get_uncached(self.teams_url)
+        self.get_cached(self.other_team_url)
+
+    def test_update_team_invalidates_team(self):
+        for url in (self.teams_url, self.team_url, self.other_team_url, self.person_url):
+            self.get_cached(url)
+        self.client.patch(self.team_url, {'description': 'Updated Description'})
+
+        self.assertEqual(self.get_uncached(self.team_url).data['description'], 'Updated Description')
+        self.get_uncached(self.teams_url)
+        self.get_cached(self.other_team_url)
+        self.get_cached(self.person_url)
+
+    def test_delete_team_invalidates_team(self):
+        self.get_cached(self.teams_url)
+        self.get_cached(self.team_url)
+        self.client.delete(self.team_url)
+
+        self.assertEqual(self.client.get(self.team_url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(len(self.get_uncached(self.teams_url).data['results']), 1)
+
+    def test_add_member_invalidates_team(self):
+        for url in (self.teams_url, self.team_url, self.other_team_url):
+            self.get_cached(url)
+        self.client.post(f'{self.team_url}add_member/', {'person_id': self.other_person.id})
+
+        self.assertEqual(len(self.get_uncached(self.team_url).data['members']), 2)
+        self.get_uncached(self.teams_url)
+        self.get_cached(self.other_team_url)
+
+    def test_remove_member_invalidates_team(self):
+        for url in (self.teams_url, self.team_url, self.other_team_url):
+            self.get_cached(url)
+        self.client.post(f'{self.team_url}remove_member/', {'person_id': self.person.id})
+
+        self.assertEqual(self.get_uncached(self.team_url).data['members'], [])
+        self.get_uncached(self.teams_url)
+        self.get_cached(self.other_team_url)
+
+    def test_members_endpoint_invalidates_team(self):
+        self.get_cached(self.team_url)
+        self.client.post(f'{self.team_url}members/', {'replace': [self.other_person.id]}, format='json')
+
+        self.assertEqual(self.get_uncached(self.team_url).data['members'][0]['id'], self.other_person.id)
+
+    def test_reverse_membership_changes_invalidate_teams(self):
+        self.get_cached(self.other_team_url)
+        self.other_person.teams.add(self.other_team)
+        self.assertEqual(len(self.get_uncached(self.other_team_url).data['members']), 1)
+
+        self.get_cached(self.other_team_url)
+        self.other_person.teams.clear()
+        self.assertEqual(self.get_uncached(self.other_team_url).data['members'], [])
+
+    def test_bulk_upsert_invalidates_persons_and_their_teams(self):
+        for url in (self.persons_url, self.person_url, self.team_url, self.other_team_url):
+            self.get_cached(url)
+        items = [{'first_name': 'Viktoriia', 'last_name': 'Kit', 'email': self.person.email}]
+        self.client.post(f'{self.persons_url}bulk/', {'operation': 'upsert', 'items': items}, format='json')
+
+        self.assertEqual(self.get_uncached(self.person_url).data['first_name'], 'Viktoriia')
+        self.get_uncached(self.persons_url)
+        self.assertEqual(self.get_uncached(self.team_url).data['members'][0]['first_name'], 'Viktoriia')
+        self.get_cached(self.other_team_url)
+
+    def test_bulk_create_invalidates_person_list(self):
+        self.get_cached(self.persons_url)
+        items = [{'first_name': 'Andrii', 'last_name': 'Shevchenko', 'email': 'a@example.com'}]
+        self.client.post(f'{self.persons_url}bulk/', {'operation': 'create', 'items': items}, format='json')
+
+        self.assertEqual(len(self.get_uncached(self.persons_url).data['results']), 3)
+
+    def test_bulk_delete_invalidates_persons_and_their_teams(self):
+        for url in (self.persons_url, self.team_url, self.other_team_url):
+            self.get_cached(url)
+        self.client.post(f'{self.persons_url}bulk/', {'operation': 'delete', 'ids': [self.person.id]}, format='json')
+
+        self.assertEqual(len(self.get_uncached(self.persons_url).data['results']), 1)
+        self.assertEqual(self.get_uncached(self.team_url).data['members'], [])
+        self.get_cached(self.other_team_url)
+
+    def test_versions_are_bumped_again_on_commit(self):
+        request = self.client.get(self.team_url).wsgi_request
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            invalidate('teams', [self.team.id])
+            key_before_commit = response_cache_key('teams', request, self.team.id)
+        self.assertEqual(len(callbacks), 1)
+        self.assertNotEqual(response_cache_key('teams', request, self.team.id), key_before_commit)
@@ -0,0 +1,101 @@
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from teams.models import Change, Person, Team
+
+
+@override_settings(CHANGE_FEED_SETTLE_SECONDS=0)
+class ChangeFeedTests(APITestCase):
+    base_url = '/api/v1/changes/'
+
+    def setUp(self):
+        self.person = Person.objects.create(first_name="Viktoria", last_name="Kit", email="viki.kit@example.com")
+        self.team = Team.objects.create(name='Test Team')
+        self.cursor = Change.objects.latest('id').id
+
+    def changes_since(self, cursor):
+        response = self.client.get(self.base_url, {'since': cursor})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [
+            (change['entity'], change['action'], change['object_id'], change['related_id'])
+            for change in response.data['changes']
+        ]
+
+    def test_creates_are_recorded(self):
+        response = self.client.get(self.base_url)
+        self.assertEqual(response.data['cursor'], self.cursor)
+        self.assertEqual(response.data['changes'][0]['data'], {
+            'first_name': 'Viktoria', 'last_name': 'Kit', 'email': 'viki.kit@example.com'
+        })
+        self.assertEqual(self.changes_since(0), [
+            ('person', 'create', self.person.id, None),
+            ('team', 'create', self.team.id, None),
+        ])
+
+    def test_updates_and_deletes_are_recorded(self):
+        self.client.patch(f'/api/v1/persons/{self.person.id}/', {'first_name': 'Viktoriia'})
+        self.client.delete(f'/api/v1/teams/{self.team.id}/')
+        self.assertEqual(self.changes_since(self.cursor), [
+            ('person', 'update', self.person.id, None),
+            ('team', 'delete', self.team.id, None),
+        ])
+        self.assertEqual(Change.objects.get(entity='person', action='update').data['first_name'], 'Viktoriia')
+        self.assertIsNone(Change.objects.get(action='delete').data)
+
+    def test_membership_changes_are_recorded(self):
+        other = Person.objects.create(first_name="Matviy", last_name="Luxe", email="matviy.luxe@example.com")
+        cursor = Change.objects.latest('id').id
+        self.client.post(f'/api/v1/teams/{self.team.id}/add_member/', {'person_id': self.person.id})
+        other.teams.add(self.team)
+        self.client.post(f'/api/v1/teams/{self.team.id}/remove_member/', {'person_id': self.person.id})
+        self.team.members.clear()
+
+        self.assertEqual(self.changes_since(cursor), [
+            ('membership', 'create', self.team.id, self.person.id),
+            ('membership', 'create', self.team.id, other.id),
+            ('membership', 'delete', self.team.id, self.person.id),
+            ('membership', 'delete', self.team.id, other.id),
+        ])
+
+    def test_bulk_changes_are_recorded(self):
+        items = [
+            {'first_name': 'Viktoriia', 'last_name': 'Kit', 'email': self.person.email},
+            {'first_name': 'Andrii', 'last_name': 'Shevchenko', 'email': 'a.shevchenko@example.com'},
+        ]
+        response = self.client.post('/api/v1/persons/bulk/', {'operation': 'upsert', 'items': items}, format='json')
+        created = response.data['created'][0]
+        self.client.post('/api/v1/persons/bulk/', {'operation': 'delete', 'ids': [created]}, format='json')
+
+        self.assertEqual(self.changes_since(self.cursor), [
+            ('person', 'create', created, None),
+            ('person', 'update', self.person.id, None),
+            ('person', 'delete', created, None),
+        ])
+
+    def test_incremental_sync_in_pages(self):
+        Team.objects.bulk_create(Team(name=f'Team {i}') for i in range(5))
+        for team in Team.objects.exclude(pk=self.team.pk):
+            team.save()
+
+        synced = []
+        cursor = self.cursor
+        while True:
+            response = self.client.get(self.base_url, {'since': cursor, 'limit': 2})
+            synced.extend(change['id'] for change in response.data['changes'])
+            cursor = response.data['cursor']
+            if not response.data['has_more']:
+                break
+
+        self.assertEqual(synced, list(Change.objects.filter(id__gt=self.cursor).values_list('id', flat=True)))
+        self.assertEqual(self.changes_since(cursor), [])
+
+    @override_settings(CHANGE_FEED_SETTLE_SECONDS=60)
+    def test_unsettled_changes_are_held_back(self):
+        response = self.client.get(self.base_url)
+        self.assertEqual(response.data['changes'], [])
+        self.assertEqual(response.data['cursor'], 0)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.base_url, {'since': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,137 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.budgets import QueryRecorder
+from api.cache import mark_deleted
+from teams.models import Person, Team
+
+
+class ConditionalGetTests(APITestCase):
+    persons_url = '/api/v1/persons/'
+    teams_url = '/api/v1/teams/'
+
+    def setUp(self):
+        cache.clear()
+        self.person = Person.objects.create(first_name="Viktoria", last_name="Kit", email="viki.kit@example.com")
+        self.team = Team.objects.create(name='Test Team')
+        self.team.members.add(self.person)
+        self.team_url = f'{self.teams_url}{self.team.id}/'
+        self.person_url = f'{self.persons_url}{self.person.id}/'
+
+    def make_stale(self, *models):
+        """ Move modification stamps into the past, so a later write is visible at second resolution. """
+        past = timezone.now() - timedelta(minutes=5)
+        cache.clear()
+        with mock.patch('api.cache.timezone.now', return_value=past):
+            for model in models:
+                model.objects.update(updated_at=past)
+                mark_deleted(model._meta.verbose_name_plural.lower())
+
+    def test_responses_carry_validators(self):
+        for url in (self.persons_url, self.person_url, self.teams_url, self.team_url):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(response['ETag'].startswith('"'))
+            self.assertIn('Last-Modified', response)
+
+    def test_if_none_match_returns_not_modified(self):
+        for url in (self.persons_url, self.person_url, self.teams_url, self.team_url):
+            etag = self.client.get(url)['ETag']
+            cache.clear()
+            # Only the stamp query runs, nothing is serialized
+            with self.assertNumQueries(1):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response['ETag'], etag)
+
+            # Once the response is cached, the 304 costs no query at all
+            self.client.get(url)
+            with self.assertNumQueries(0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_etag_covers_its_page_only(self):
+        others = [
+            Person.objects.create(first_name='Other', last_name='Test', email=f'other.{i}@example.com')
+            for i in range(3)
+        ]
+        url = f'{self.persons_url}?page_size=2'
+        with QueryRecorder().recording() as recorder:
+            etag = self.client.get(url)['ETag']
+        # The stamp reads the rows of the page instead of aggregating the whole table
+        self.assertFalse([sql for sql in recorder.queries if 'COUNT(' in sql or 'MAX(' in sql])
+
+        Person.objects.filter(pk=others[-1].pk).update(last_name='Changed', updated_at=timezone.now())
+        cache.clear()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Person.objects.filter(pk=others[0].pk).update(last_name='Changed', updated_at=timezone.now())
+        cache.clear()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+        # A row leaving the page changes it too
+        etag = self.client.get(url)['ETag']
+        Person.objects.filter(pk=self.person.pk).delete()
+        cache.clear()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_etag_depends_on_query_string(self):
+        first = self.client.get(self.persons_url)['ETag']
+        self.assertNotEqual(self.client.get(f'{self.persons_url}?page_size=1')['ETag'], first)
+
+    def test_if_modified_since(self):
+        for url in (self.persons_url, self.person_url, self.teams_url, self.team_url):
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(timezone.now().timestamp() + 60))
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(timezone.now().timestamp() - 60))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_person_change_modifies_their_teams(self):
+        etag = self.client.get(self.team_url)['ETag']
+        list_etag = self.client.get(self.teams_url)['ETag']
+        self.client.patch(self.person_url, {'first_name': 'Viktoriia'})
+
+        response = self.client.get(self.team_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['members'][0]['first_name'], 'Viktoriia')
+        self.assertEqual(self.client.get(self.teams_url, HTTP_IF_NONE_MATCH=list_etag).status_code, status.HTTP_200_OK)
+
+    def test_member_changes_modify_team(self):
+        other = Person.objects.create(first_name="Matviy", last_name="Luxe", email="matviy.luxe@example.com")
+        self.make_stale(Team)
+        before = Team.objects.get(pk=self.team.pk).updated_at
+
+        self.client.post(f'{self.team_url}add_member/', {'person_id': other.id})
+        after_add = Team.objects.get(pk=self.team.pk).updated_at
+        self.assertGreater(after_add, before)
+
+        self.make_stale(Team)
+        other.teams.remove(self.team)
+        self.assertGreater(Team.objects.get(pk=self.team.pk).updated_at, before)
+
+    def test_delete_modifies_list(self):
+        self.make_stale(Person)
+        etag = self.client.get(self.persons_url)['ETag']
+        if_modified_since = http_date(timezone.now().timestamp() - 60)
+        response = self.client.get(self.persons_url, HTTP_IF_MODIFIED_SINCE=if_modified_since)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.delete(self.person_url)
+        self.assertEqual(self.client.get(self.persons_url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+        response = self.client.get(self.persons_url, HTTP_IF_MODIFIED_SINCE=if_modified_since)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_bulk_upsert_modifies_persons_and_teams(self):
+        self.make_stale(Person, Team)
+        before = Team.objects.get(pk=self.team.pk).updated_at
+        items = [{'first_name': 'Viktoriia', 'last_name': 'Kit', 'email': self.person.email}]
+        self.client.post(f'{self.persons_url}bulk/', {'operation': 'upsert', 'items': items}, format='json')
+
+        self.assertGreater(Person.objects.get(pk=self.person.pk).updated_at, before)
+        self.assertGreater(Team.objects.get(pk=self.team.pk).updated_at, before)
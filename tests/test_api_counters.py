@@ -0,0 +1,240 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from teams.models import Change, Membership, Person, Team
+
+
+class MemberCountTests(APITestCase):
+    persons_url = '/api/v1/persons/'
+    teams_url = '/api/v1/teams/'
+
+    def setUp(self):
+        cache.clear()
+        self.persons = [
+            Person.objects.create(first_name='Member', last_name='Test', email=f'member.{i}@example.com')
+            for i in range(3)
+        ]
+        self.team = Team.objects.create(name='Test Team')
+        self.other_team = Team.objects.create(name='Other Team')
+
+    def assertCounts(self, teams, persons):
+        self.assertEqual([team.member_count for team in Team.objects.order_by('id')], teams)
+        self.assertEqual([person.team_count for person in Person.objects.order_by('id')], persons)
+
+    def test_add_and_remove_member(self):
+        url = f'{self.teams_url}{self.team.id}/'
+        self.client.post(f'{url}add_member/', {'person_id': self.persons[0].id})
+        self.client.post(f'{url}add_member/', {'person_id': self.persons[1].id})
+        self.assertCounts([2, 0], [1, 1, 0])
+
+        self.client.post(f'{url}remove_member/', {'person_id': self.persons[0].id})
+        self.assertCounts([1, 0], [0, 1, 0])
+
+    def test_members_endpoint(self):
+        url = f'{self.teams_url}{self.team.id}/members/'
+        self.client.post(url, {'add': [person.id for person in self.persons]}, format='json')
+        self.assertCounts([3, 0], [1, 1, 1])
+        self.client.post(url, {'replace': [self.persons[2].id]}, format='json')
+        self.assertCounts([1, 0], [0, 0, 1])
+
+    def test_set_and_clear_from_both_sides(self):
+        self.team.members.set(self.persons[:2])
+        self.persons[0].teams.add(self.other_team)
+        self.assertCounts([2, 1], [2, 1, 0])
+
+        self.team.members.set(self.persons[1:])
+        self.assertCounts([2, 1], [1, 1, 1])
+
+        self.persons[0].teams.clear()
+        self.assertCounts([2, 0], [0, 1, 1])
+        self.team.members.clear()
+        self.assertCounts([0, 0], [0, 0, 0])
+
+    def test_removing_non_member_changes_nothing(self):
+        self.team.members.add(self.persons[0])
+        self.team.members.remove(self.persons[1])
+        self.assertCounts([1, 0], [1, 0, 0])
+
+    def test_deletes(self):
+        for team in (self.team, self.other_team):
+            team.members.add(*self.persons)
+
+        self.persons[0].delete()
+        self.assertCounts([2, 2], [2, 2])
+        response = self.client.post(
+            f'{self.persons_url}bulk/', {'operation': 'delete', 'ids': [self.persons[1].id]}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertCounts([1, 1], [2])
+        self.team.delete()
+        self.assertCounts([1], [1])
+
+    def test_counts_are_served_and_invalidated(self):
+        person_url = f'{self.persons_url}{self.persons[0].id}/'
+        self.assertEqual(self.client.get(person_url).data['team_count'], 0)
+        self.client.post(f'{self.teams_url}{self.team.id}/add_member/', {'person_id': self.persons[0].id})
+
+        self.assertEqual(self.client.get(person_url).data['team_count'], 1)
+        team = self.client.get(f'{self.teams_url}{self.team.id}/').data
+        self.assertEqual(team['member_count'], 1)
+        self.assertEqual(team['members'][0]['team_count'], 1)
+
+    def test_counts_are_read_only(self):
+        response = self.client.patch(f'{self.teams_url}{self.team.id}/', {'member_count': 10})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['member_count'], 0)
+
+    def test_ordering_by_member_count(self):
+        teams = [self.team, self.other_team] + [Team.objects.create(name=f'Team {i}') for i in range(3)]
+        for team, size in zip(teams, [1, 3, 0, 2, 1]):
+            team.members.add(*self.persons[:size])
+        expected = [self.other_team.id, teams[3].id, teams[4].id, self.team.id, teams[2].id]
+
+        # Pages of three split the teams with equal counts, which are ordered by ID in the same direction
+        ids = []
+        url, data = self.teams_url, {'ordering': '-member_count', 'page_size': 3, 'fields': 'id,name'}
+        while url:
+            response = self.client.get(url, data)
+            ids.extend(team['id'] for team in response.data['results'])
+            self.assertEqual(set(response.data['results'][0]), {'id', 'name'})
+            url, data = response.data['next'], None
+        self.assertEqual(ids, expected)
+
+        response = self.client.get(self.teams_url, {'ordering': 'member_count', 'unpaginated': 'true'})
+        self.assertEqual(
+            [team['id'] for team in response.data],
+            [teams[2].id, self.team.id, teams[4].id, teams[3].id, self.other_team.id],
+        )
+
+    def test_ordering_pages_through_many_ties(self):
+        # More rows share the first ordering value than DRF's cursor offset can skip (1000)
+        Person.objects.bulk_create(
+            Person(first_name='Tie', last_name='Test', email=f'tie.{i}@example.com') for i in range(1200)
+        )
+        self.team.members.add(self.persons[0])
+        expected = list(Person.objects.order_by('-team_count', '-id').values_list('id', flat=True))
+
+        ids = []
+        url, data = self.persons_url, {'ordering': '-team_count', 'page_size': 100}
+        while url:
+            response = self.client.get(url, data)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(person['id'] for person in response.data['results'])
+            url, data = response.data['next'], None
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(ids, expected)
+
+        # And back from the last page
+        ids = [person['id'] for person in response.data['results']]
+        url = response.data['previous']
+        while url:
+            response = self.client.get(url)
+            ids[:0] = [person['id'] for person in response.data['results']]
+            url = response.data['previous']
+        self.assertEqual(ids, expected)
+
+    def test_ordering_persons_by_team_count(self):
+        self.team.members.add(self.persons[1])
+        response = self.client.get(self.persons_url, {'ordering': '-team_count'})
+        self.assertEqual(
+            [person['id'] for person in response.data['results']],
+            [self.persons[1].id, self.persons[2].id, self.persons[0].id],
+        )
+
+    def test_unknown_ordering_is_ignored(self):
+        response = self.client.get(self.persons_url, {'ordering': 'email'})
+        self.assertEqual([person['id'] for person in response.data['results']], [person.id for person in self.persons])
+
+
+class AdminMembershipTests(APITestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        self.persons = [
+            Person.objects.create(first_name='Member', last_name='Test', email=f'member.{i}@example.com')
+            for i in range(3)
+        ]
+        self.team = Team.objects.create(name='Test Team')
+        self.team.members.add(self.persons[0], self.persons[1])
+        self.url = f'/admin/teams/team/{self.team.id}/change/'
+
+    def save_members(self, rows):
+        """ Post the change form of the team with one inline row per ``(membership, person, role, delete)``. """
+        data = {
+            'name': self.team.name, 'description': '',
+            'membership_set-TOTAL_FORMS': len(rows), 'membership_set-INITIAL_FORMS': sum(bool(row[0]) for row in rows),
+            'membership_set-MIN_NUM_FORMS': 0, 'membership_set-MAX_NUM_FORMS': 1000,
+        }
+        for index, (membership, person, role, delete) in enumerate(rows):
+            prefix = f'membership_set-{index}-'
+            data.update({
+                prefix + 'id': membership.id if membership else '', prefix + 'team': self.team.id,
+                prefix + 'person': person.id, prefix + 'role': role,
+                prefix + 'joined_at_0': '2023-10-01', prefix + 'joined_at_1': '12:00:00',
+            })
+            if delete:
+                data[prefix + 'DELETE'] = 'on'
+        response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, 302, response.content)
+
+    def test_inline_changes_go_through_members(self):
+        first, second = Membership.objects.order_by('person_id')
+        self.save_members([
+            (first, self.persons[0], Membership.LEAD, False),
+            (second, self.persons[1], Membership.MEMBER, True),
+            (None, self.persons[2], Membership.MEMBER, False),
+        ])
+
+        self.assertEqual(
+            list(Membership.objects.order_by('person_id').values_list('person_id', 'role')),
+            [(self.persons[0].id, Membership.LEAD), (self.persons[2].id, Membership.MEMBER)],
+        )
+        self.assertEqual(Team.objects.get().member_count, 2)
+        self.assertEqual([person.team_count for person in Person.objects.order_by('id')], [1, 0, 1])
+        self.assertEqual(
+            list(Change.objects.filter(entity=Change.MEMBERSHIP).values_list('action', 'related_id').order_by('id'))[2:],
+            [(Change.DELETE, self.persons[1].id), (Change.CREATE, self.persons[2].id)],
+        )
+
+    def test_changing_the_person_of_a_row(self):
+        first, second = Membership.objects.order_by('person_id')
+        self.save_members([
+            (first, self.persons[0], Membership.MEMBER, False),
+            (second, self.persons[2], Membership.MEMBER, False),
+        ])
+        self.assertEqual([person.team_count for person in Person.objects.order_by('id')], [1, 0, 1])
+        self.assertEqual(Team.objects.get().member_count, 2)
+
+
+class RecountMembersCommandTests(APITestCase):
+    def setUp(self):
+        self.person = Person.objects.create(first_name='Viktoria', last_name='Kit', email='viki.kit@example.com')
+        self.team = Team.objects.create(name='Test Team')
+        self.team.members.add(self.person)
+        Team.objects.create(name='Empty Team')
+
+    def recount(self, *args):
+        out = StringIO()
+        call_command('recount_members', *args, batch_size=1, stdout=out)
+        return out.getvalue()
+
+    def test_repairs_drift(self):
+        Team.objects.update(member_count=5)
+        Person.objects.update(team_count=0)
+
+        self.assertEqual(self.recount('--dry-run'), "Teams: 2 member_count would be repaired.\n"
+                                                    "Persons: 1 team_count would be repaired.\n")
+        self.assertEqual(Team.objects.get(pk=self.team.pk).member_count, 5)
+
+        self.assertEqual(self.recount(), "Teams: 2 member_count repaired.\nPersons: 1 team_count repaired.\n")
+        self.assertEqual(list(Team.objects.order_by('id').values_list('member_count', flat=True)), [1, 0])
+        self.assertEqual(Person.objects.get().team_count, 1)
+
+    def test_correct_counters_are_left_alone(self):
+        stamps = list(Team.objects.order_by('id').values_list('updated_at', flat=True))
+        self.assertEqual(self.recount(), "Teams: 0 member_count repaired.\nPersons: 0 team_count repaired.\n")
+        self.assertEqual(list(Team.objects.order_by('id').values_list('updated_at', flat=True)), stamps)
@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+from unittest import mock
+
+from django.conf import settings
+from django.test import override_settings
+from drf_yasg.generators import OpenAPISchemaGenerator
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from wht_teams.redoc import CachedSchemaView
+
+
+class SchemaTests(APITestCase):
+    schema_url = '/docs/?format=openapi'
+
+    def setUp(self):
+        CachedSchemaView.schemas.clear()
+
+    def test_schema_is_generated_once(self):
+        with mock.patch.object(
+            OpenAPISchemaGenerator, 'get_schema', autospec=True, side_effect=OpenAPISchemaGenerator.get_schema
+        ) as get_schema:
+            first = self.client.get(self.schema_url)
+            second = self.client.get(self.schema_url)
+        self.assertEqual(get_schema.call_count, 1)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.content, second.content)
+        self.assertIn('/persons/', first.json()['paths'])
+
+    @override_settings(ALLOWED_HOSTS=['*'])
+    def test_schemas_of_any_hosts_are_bounded(self):
+        for number in range(CachedSchemaView.max_schemas * 2):
+            response = self.client.get(self.schema_url, HTTP_HOST=f'host{number}.example.com')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(CachedSchemaView.schemas), CachedSchemaView.max_schemas)
+        self.assertEqual(
+            [key[2] for key in CachedSchemaView.schemas],
+            [f'host{number}.example.com' for number in range(CachedSchemaView.max_schemas, number + 1)],
+        )
+
+        # The most recently used schemas are kept
+        first_kept = next(iter(CachedSchemaView.schemas))
+        self.client.get(self.schema_url, HTTP_HOST=first_kept[2])
+        self.client.get(self.schema_url, HTTP_HOST='other.example.com')
+        self.assertIn(first_kept, CachedSchemaView.schemas)
+
+    def test_caching_headers(self):
+        response = self.client.get(self.schema_url)
+        self.assertEqual(response['Cache-Control'], f'public, max-age={settings.API_SCHEMA_CACHE_SECONDS}')
+
+        response = self.client.get(self.schema_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+    def test_ui_has_its_own_etag(self):
+        schema = self.client.get(self.schema_url)
+        ui = self.client.get('/docs/')
+        self.assertEqual(ui.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(ui['ETag'], schema['ETag'])
+
+    def test_urls_do_not_import_the_docs_machinery(self):
+        code = (
+            'import sys, django; django.setup(); import wht_teams.urls; '
+            'print("drf_yasg.views" in sys.modules, "wht_teams.redoc" in sys.modules)'
+        )
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, env=os.environ)
+        self.assertEqual(result.stdout.split(), ['False', 'False'], result.stderr)
@@ -0,0 +1,98 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from teams.models import Person, Team
+
+
+class MembershipGraphTests(APITestCase):
+    persons_url = '/api/v1/persons/'
+    teams_url = '/api/v1/teams/'
+
+    def setUp(self):
+        self.persons = [
+            Person.objects.create(first_name=name, last_name='Kit', email=f'{name.lower()}.kit@example.com')
+            for name in ('Viktoria', 'Matviy', 'Andrii', 'Olena', 'Taras')
+        ]
+        viktoria, matviy, andrii, olena, taras = self.persons
+        self.backend = Team.objects.create(name='Backend')
+        self.frontend = Team.objects.create(name='Frontend')
+        self.design = Team.objects.create(name='Design')
+        self.backend.members.add(viktoria, matviy, andrii)
+        self.frontend.members.add(viktoria, andrii, olena)
+        self.design.members.add(taras)
+
+    def ids(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['id'] for item in response.data['results']]
+
+    def test_teams_of_person(self):
+        viktoria, matviy, andrii, olena, taras = self.persons
+        response = self.client.get(f'{self.persons_url}{viktoria.id}/teams/')
+        self.assertEqual(self.ids(response), [self.backend.id, self.frontend.id])
+        self.assertNotIn('members', response.data['results'][0])
+        self.assertEqual(response.data['results'][0]['member_count'], 3)
+
+    def test_co_members(self):
+        viktoria, matviy, andrii, olena, taras = self.persons
+        response = self.client.get(f'{self.persons_url}{viktoria.id}/co_members/')
+        self.assertEqual(self.ids(response), [matviy.id, andrii.id, olena.id])
+        self.assertEqual([person['shared_teams'] for person in response.data['results']], [1, 2, 1])
+
+        self.assertEqual(self.ids(self.client.get(f'{self.persons_url}{taras.id}/co_members/')), [])
+
+    def test_co_members_are_paginated(self):
+        viktoria, matviy, andrii, olena, taras = self.persons
+        response = self.client.get(f'{self.persons_url}{viktoria.id}/co_members/', {'page_size': 2})
+        self.assertEqual(self.ids(response), [matviy.id, andrii.id])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual(self.ids(response), [olena.id])
+        self.assertEqual(response.data['results'][0]['shared_teams'], 1)
+        self.assertIsNone(response.data['next'])
+
+    def test_common_members(self):
+        viktoria, matviy, andrii, olena, taras = self.persons
+        response = self.client.get(f'{self.teams_url}{self.backend.id}/common_members/', {'team': self.frontend.id})
+        self.assertEqual(self.ids(response), [viktoria.id, andrii.id])
+
+        response = self.client.get(f'{self.teams_url}{self.backend.id}/common_members/', {'team': self.design.id})
+        self.assertEqual(self.ids(response), [])
+
+    def test_common_members_needs_other_team(self):
+        response = self.client.get(f'{self.teams_url}{self.backend.id}/common_members/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('team', response.data)
+
+        response = self.client.get(f'{self.teams_url}{self.backend.id}/common_members/', {'team': 999999})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_overlap(self):
+        response = self.client.get(f'{self.teams_url}{self.backend.id}/overlap/')
+        self.assertEqual(self.ids(response), [self.frontend.id])
+        self.assertEqual(response.data['results'][0]['shared_members'], 2)
+        self.assertEqual(response.data['results'][0]['overlap'], 0.5)
+
+        response = self.client.get(f'{self.teams_url}{self.backend.id}/overlap/', {'team': self.design.id})
+        self.assertEqual(self.ids(response), [])
+
+    def test_unknown_ids(self):
+        response = self.client.get(f'{self.persons_url}999999/co_members/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(f'{self.persons_url}999999/teams/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(f'{self.teams_url}999999/overlap/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_one_query_besides_the_lookup(self):
+        viktoria = self.persons[0]
+        for path in (
+            f'{self.persons_url}{viktoria.id}/teams/',
+            f'{self.persons_url}{viktoria.id}/co_members/',
+            f'{self.teams_url}{self.backend.id}/common_members/?team={self.frontend.id}',
+            f'{self.teams_url}{self.backend.id}/overlap/',
+        ):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(path).status_code, status.HTTP_200_OK)
+            self.assertEqual(len(queries), 2, path)
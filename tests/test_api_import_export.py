@@ -0,0 +1,241 @@
+import json
+import os
+import tempfile
+from io import BytesIO, StringIO, TextIOWrapper
+from unittest import mock, skipUnless
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from rest_framework.test import APITestCase
+
+from api.management.commands.recount_members import repair_counters
+from teams.models import Change, Membership, Person, Team
+
+
+class ImportExportTestCase(APITestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def read(self, name):
+        with open(os.path.join(self.directory.name, name), newline='', encoding='utf-8') as file:
+            return file.read()
+
+    def call(self, *args):
+        out, err = StringIO(), StringIO()
+        call_command(*args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def import_data(self, *args):
+        return self.call('import_data', *args)
+
+    def export_data(self, *args):
+        return self.call('export_data', *args)
+
+
+class ImportExportCommandTests(ImportExportTestCase):
+    def test_round_trip(self):
+        for format in ('csv', 'ndjson'):
+            with self.subTest(format=format):
+                viktoria = Person.objects.create(first_name='Viktoria', last_name='Kit', email='viki.kit@example.com')
+                nazar = Person.objects.create(first_name='Nazar', last_name='Koval', email='nazar.koval@example.com')
+                team = Team.objects.create(name='Backend', description='Servers, "APIs", and\ndatabases')
+                team.members.add(viktoria, nazar)
+                Team.objects.create(name='Design')
+                for resource in ('persons', 'teams', 'memberships'):
+                    self.export_data(resource, os.path.join(self.directory.name, f'{resource}.{format}'))
+
+                Team.objects.all().delete()
+                Person.objects.all().delete()
+                for resource in ('persons', 'teams', 'memberships'):
+                    self.import_data(resource, os.path.join(self.directory.name, f'{resource}.{format}'))
+
+                self.assertEqual(
+                    list(Person.objects.order_by('email').values_list(
+                        'email', 'first_name', 'last_name', 'team_count'
+                    )),
+                    [('nazar.koval@example.com', 'Nazar', 'Koval', 1), ('viki.kit@example.com', 'Viktoria', 'Kit', 1)],
+                )
+                self.assertEqual(
+                    list(Team.objects.order_by('name').values_list('name', 'description', 'member_count')),
+                    [('Backend', 'Servers, "APIs", and\ndatabases', 2), ('Design', '', 0)],
+                )
+                self.assertEqual(
+                    sorted(Membership.objects.values_list('team__name', 'person__email')),
+                    [('Backend', 'nazar.koval@example.com'), ('Backend', 'viki.kit@example.com')],
+                )
+                Team.objects.all().delete()
+                Person.objects.all().delete()
+
+    def test_export_formats(self):
+        Person.objects.create(first_name='Viktoria', last_name='Kit', email='viki.kit@example.com')
+        out, err = self.export_data('persons', '--format', 'ndjson')
+        self.assertEqual(out, '{"email":"viki.kit@example.com","first_name":"Viktoria","last_name":"Kit"}\n')
+        self.assertIn("Exported 1 persons", err)
+
+        self.export_data('persons', os.path.join(self.directory.name, 'persons.csv'))
+        self.assertEqual(
+            self.read('persons.csv'), 'email,first_name,last_name\r\nviki.kit@example.com,Viktoria,Kit\r\n'
+        )
+
+    def test_standard_output_and_input(self):
+        Team.objects.create(name='Backend', description='Servers,\r\n"APIs"\nand databases')
+        out, err = self.export_data('teams')
+        self.assertEqual(out, 'name,description\r\nBackend,"Servers,\r\n""APIs""\nand databases"\r\n')
+
+        Team.objects.all().delete()
+        with mock.patch('sys.stdin', TextIOWrapper(BytesIO(out.encode()))):
+            self.import_data('teams', '-')
+        self.assertEqual(Team.objects.get().description, 'Servers,\r\n"APIs"\nand databases')
+
+    def test_upsert_and_create_modes(self):
+        person = Person.objects.create(first_name='Viktoria', last_name='Kit', email='viki.kit@example.com')
+        path = self.write('persons.csv', (
+            'email,first_name,last_name\n'
+            'viki.kit@example.com,Viktoria,Luxe\n'
+            'nazar.koval@example.com,Nazar,Koval\n'
+        ))
+        since = Change.objects.order_by('id').last().id
+
+        out, err = self.import_data('persons', path, '--mode', 'create')
+        self.assertIn("Persons: 1 created, 0 updated, 1 skipped, 0 invalid", out)
+        self.assertEqual(Person.objects.get(pk=person.pk).last_name, 'Kit')
+
+        out, err = self.import_data('persons', path)
+        self.assertIn("Persons: 0 created, 2 updated, 0 skipped", out)
+        self.assertEqual(Person.objects.get(pk=person.pk).last_name, 'Luxe')
+
+        nazar = Person.objects.get(email='nazar.koval@example.com')
+        self.assertEqual(
+            list(Change.objects.filter(id__gt=since).values_list('action', 'object_id')),
+            [(Change.CREATE, nazar.pk), (Change.UPDATE, person.pk), (Change.UPDATE, nazar.pk)],
+        )
+
+    def test_invalid_rows_are_reported(self):
+        Team.objects.create(name='Backend')
+        Person.objects.create(first_name='Viktoria', last_name='Kit', email='viki.kit@example.com')
+        path = self.write('persons.ndjson', '\n'.join([
+            '{"email": "nazar.koval@example.com", "first_name": "Nazar", "last_name": "Koval"}',
+            '{"email": "not-an-email", "first_name": "Taras", "last_name": "Moroz"}',
+            '{"email": "o.melnyk@example.com", "first_name": "Olena1", "last_name": ""}',
+            '[1, 2]',
+        ]))
+        out, err = self.import_data('persons', path, '--batch-size', '2')
+        self.assertIn("Persons: 1 created, 0 updated, 0 skipped, 3 invalid", out)
+        self.assertIn("Line 2: {'email': ['Enter a valid email address.']}", err)
+        self.assertIn(
+            "Line 3: {'first_name': ['First name can only contain letters.'], "
+            "'last_name': ['This field is required.']}", err,
+        )
+        self.assertIn("Line 4: {'non_field_errors': ['Expected a JSON object.']}", err)
+
+        path = self.write('memberships.csv', (
+            'team,person,role\n'
+            'Backend,viki.kit@example.com,lead\n'
+            'Frontend,viki.kit@example.com,\n'
+            'Backend,nobody@example.com,boss\n'
+        ))
+        out, err = self.import_data('memberships', path)
+        self.assertIn("Memberships: 1 created, 0 updated, 0 skipped, 2 invalid", out)
+        self.assertIn("Line 3: {'team': ['Team with the given name not found.']}", err)
+        self.assertIn("Line 4: {'role': ['\"boss\" is not a valid choice.']}", err)
+        self.assertEqual(list(Membership.objects.values_list('role', flat=True)), [Membership.LEAD])
+
+        with self.assertRaisesMessage(CommandError, "Cannot read"):
+            self.import_data('persons', os.path.join(self.directory.name, 'missing.csv'))
+
+    def test_rows_are_validated_like_the_api(self):
+        rows = {
+            'persons': [
+                {'email': 'not-an-email', 'first_name': 'Taras1', 'last_name': 'M' * 51},
+                {'email': 'x' * 250 + '@example.com', 'first_name': 'Taras', 'last_name': 'Moroz'},
+            ],
+            'teams': [{'name': 'QA'}, {'name': 'N' * 101, 'description': 'Too long'}],
+        }
+        for resource, items in rows.items():
+            for item in items:
+                with self.subTest(resource=resource, item=item):
+                    response = self.client.post(f'/api/v1/{resource}/', item, format='json')
+                    path = self.write(f'{resource}.ndjson', json.dumps(item))
+                    out, err = self.import_data(resource, path)
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn(f"Line 1: {response.json()}", err)
+
+    def test_memberships_keep_counters_in_step(self):
+        call_command('seed_data', '--persons', '30', '--teams', '5', '--memberships', '2', stdout=StringIO())
+        path = os.path.join(self.directory.name, 'memberships.csv')
+        self.export_data('memberships', path)
+        Membership.objects.filter(person__email__in=['person.0@example.com', 'person.1@example.com']).delete()
+        repair_counters(Team, 100)
+        repair_counters(Person, 100)
+
+        out, err = self.import_data('memberships', path, '--batch-size', '7', '--mode', 'create')
+        self.assertIn("Memberships: 4 created, 0 updated, 56 skipped, 0 invalid", out)
+        self.assertEqual(repair_counters(Team, 100, dry_run=True), [])
+        self.assertEqual(repair_counters(Person, 100, dry_run=True), [])
+        self.assertEqual(Change.objects.filter(entity=Change.MEMBERSHIP, action=Change.CREATE).count(), 4)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'COPY is only used on PostgreSQL.')
+class CopyImportTests(ImportExportTestCase):
+    """ The imports of ``ImportExportCommandTests`` with the rows loaded by ``COPY``, one batch per row. """
+
+    def import_data(self, *args):
+        return super().import_data(*args, '--copy', '--batch-size', '1')
+
+    def test_persons(self):
+        person = Person.objects.create(first_name='Viktoria', last_name='Kit', email='viki.kit@example.com')
+        path = self.write('persons.csv', (
+            'email,first_name,last_name\n'
+            'viki.kit@example.com,Viktoria,Luxe\n'
+            'nazar.koval@example.com,Nazar,Koval\n'
+        ))
+
+        out, err = self.import_data('persons', path, '--mode', 'create')
+        self.assertIn("Persons: 1 created, 0 updated, 1 skipped, 0 invalid", out)
+        self.assertEqual(Person.objects.get(pk=person.pk).last_name, 'Kit')
+
+        out, err = self.import_data('persons', path)
+        self.assertIn("Persons: 0 created, 2 updated, 0 skipped, 0 invalid", out)
+        self.assertEqual(Person.objects.get(pk=person.pk).last_name, 'Luxe')
+        self.assertEqual(Person.objects.get(email='nazar.koval@example.com').team_count, 0)
+
+    def test_teams_keep_descriptions(self):
+        # Empty strings and CSV quoting survive the COPY into the temporary table
+        path = self.write('teams.ndjson', (
+            '{"name": "Backend"}\n'
+            '{"name": "Design", "description": "Screens, \\"icons\\",\\nand fonts"}\n'
+        ))
+        out, err = self.import_data('teams', path)
+        self.assertIn("Teams: 2 created, 0 updated, 0 skipped, 0 invalid", out)
+        self.assertEqual(
+            list(Team.objects.order_by('name').values_list('name', 'description', 'member_count')),
+            [('Backend', '', 0), ('Design', 'Screens, "icons",\nand fonts', 0)],
+        )
+
+    def test_memberships(self):
+        viktoria = Person.objects.create(first_name='Viktoria', last_name='Kit', email='viki.kit@example.com')
+        nazar = Person.objects.create(first_name='Nazar', last_name='Koval', email='nazar.koval@example.com')
+        team = Team.objects.create(name='Backend')
+        team.members.add(viktoria)
+        path = self.write('memberships.csv', (
+            'team,person,role,joined_at\n'
+            'Backend,viki.kit@example.com,lead,2024-01-02T03:04:05+00:00\n'
+            'Backend,nazar.koval@example.com,member,2024-01-02T03:04:05+00:00\n'
+        ))
+
+        out, err = self.import_data('memberships', path, '--mode', 'create')
+        self.assertIn("Memberships: 1 created, 0 updated, 1 skipped, 0 invalid", out)
+        self.assertEqual(Membership.objects.get(person=viktoria).role, Membership.MEMBER)
+
+        out, err = self.import_data('memberships', path)
+        self.assertIn("Memberships: 0 created, 2 updated, 0 skipped, 0 invalid", out)
+        self.assertEqual(Membership.objects.get(person=viktoria).role, Membership.LEAD)
+        self.assertEqual(Team.objects.get(pk=team.pk).member_count, 2)
+        self.assertEqual(repair_counters(Person, 100, dry_run=True), [])
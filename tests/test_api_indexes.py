@@ -0,0 +1,52 @@
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+
+from teams.models import Person, Team
+
+SEARCH_INDEXES = {
+    'teams_person': [
+        'person_first_name_prefix_idx', 'person_last_name_prefix_idx', 'person_email_upper_idx',
+        'person_first_name_trgm_idx', 'person_last_name_trgm_idx',
+    ],
+    'teams_team': ['team_name_prefix_idx', 'team_name_trgm_idx'],
+}
+
+
+def index_names(table):
+    with connection.cursor() as cursor:
+        return set(connection.introspection.get_constraints(cursor, table))
+
+
+class SearchIndexMigrationTests(TransactionTestCase):
+
+    def test_migrations_keep_search_indexes(self):
+        # The tables are rebuilt on SQLite after the search indexes were first created
+        call_command('migrate', 'teams', '0004', verbosity=0)
+        call_command('migrate', 'teams', verbosity=0)
+        for table, names in SEARCH_INDEXES.items():
+            with self.subTest(table=table):
+                self.assertLessEqual(set(names), index_names(table))
+
+
+class SearchIndexPlanTests(TestCase):
+
+    def plan(self, queryset):
+        """ The query plan of ``queryset``; PostgreSQL is kept from scanning the few rows of the test tables. """
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain()
+
+    def test_lookups_use_search_indexes(self):
+        lookups = [
+            (Person.objects.filter(first_name__istartswith='vik'), 'person_first_name_prefix_idx'),
+            (Person.objects.filter(last_name__istartswith='vik'), 'person_last_name_prefix_idx'),
+            (Person.objects.filter(email__iexact='viki.kit@example.com'), 'person_email_upper_idx'),
+            (Team.objects.filter(name__istartswith='back'), 'team_name_prefix_idx'),
+            (Team.objects.filter(name__iexact='backend'), 'team_name_prefix_idx'),
+        ]
+        for queryset, index in lookups:
+            with self.subTest(index=index, query=str(queryset.query)):
+                self.assertIn(index, self.plan(queryset))
@@ -0,0 +1,141 @@
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.bulk import BULK_BATCH_SIZE
+from api.metrics import LOGGED_SQL_LENGTH, MetricsMiddleware, MetricsRegistry, RequestMetrics, registry
+from teams.models import Person, Team
+
+
+class MetricsTests(APITestCase):
+    persons_url = '/api/v1/persons/'
+    metrics_url = '/metrics'
+
+    def setUp(self):
+        cache.clear()
+        registry.clear()
+        self.person = Person.objects.create(first_name="Viktoria", last_name="Kit", email="viki.kit@example.com")
+        self.team = Team.objects.create(name='Test Team')
+        self.team.members.add(self.person)
+
+    def timings(self, response):
+        return dict(entry.split(';', 1) for entry in response['Server-Timing'].split(', '))
+
+    def test_server_timing(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.persons_url)
+        timings = self.timings(response)
+        self.assertEqual(set(timings), {'total', 'db', 'serialize', 'render'})
+        self.assertIn(f'desc="{len(queries)} queries (0 duplicated)"', timings['db'])
+
+        # A cached response is neither queried nor serialized again
+        timings = self.timings(self.client.get(self.persons_url))
+        self.assertEqual(set(timings), {'total', 'db', 'render'})
+        self.assertIn('desc="0 queries (0 duplicated)"', timings['db'])
+
+    def test_duplicate_queries(self):
+        def view(request):
+            for _ in range(3):
+                Person.objects.get(pk=self.person.pk)
+            Team.objects.get(pk=self.team.pk)
+            return HttpResponse()
+
+        with override_settings(API_METRICS_DUPLICATE_QUERIES_WARNING=2), self.assertLogs('api.metrics') as logs:
+            response = MetricsMiddleware(view)(RequestFactory().get('/'))
+        self.assertIn('desc="4 queries (2 duplicated)"', self.timings(response)['db'])
+        self.assertIn('GET unmatched ran 2 duplicate queries, 3 times: SELECT', logs.output[0])
+
+    def test_duplicate_queries_of_batched_actions(self):
+        items = [
+            {'first_name': 'Bulk', 'last_name': 'Person', 'email': f'bulk.{i}@example.com'}
+            for i in range(BULK_BATCH_SIZE)
+        ]
+        with override_settings(API_METRICS_DUPLICATE_QUERIES_WARNING=1), self.assertNoLogs('api.metrics'):
+            self.client.post(f'{self.persons_url}bulk/', {'operation': 'create', 'items': items}, format='json')
+
+    def test_duplicate_queries_sql_is_shortened(self):
+        emails = [f'person.{i}@example.com' for i in range(LOGGED_SQL_LENGTH)]
+
+        def view(request):
+            for _ in range(2):
+                list(Person.objects.filter(email__in=emails))
+            return HttpResponse()
+
+        with override_settings(API_METRICS_DUPLICATE_QUERIES_WARNING=1), self.assertLogs('api.metrics') as logs:
+            MetricsMiddleware(view)(RequestFactory().get('/'))
+        self.assertIn('GET unmatched ran 1 duplicate queries, 2 times: SELECT', logs.output[0])
+        self.assertLess(len(logs.output[0]), 2 * LOGGED_SQL_LENGTH)
+
+    def test_metrics_endpoint(self):
+        self.client.get(self.persons_url)
+        self.client.get(f'{self.persons_url}0/')
+        self.client.post(self.persons_url, {'first_name': 'Matviy', 'last_name': 'Luxe', 'email': 'm.luxe@example.com'})
+        self.client.post(f'/api/v1/teams/{self.team.id}/members/', {'remove': [self.person.id]}, format='json')
+
+        self.client.force_login(User.objects.create_user('staff', is_staff=True))
+        response = self.client.get(self.metrics_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        lines = response.content.decode().splitlines()
+        for line in [
+            '# TYPE api_request_duration_seconds histogram',
+            'api_request_duration_seconds_bucket{route="person-list",method="GET",le="+Inf"} 1',
+            'api_request_duration_seconds_count{route="person-list",method="GET"} 1',
+            'api_requests_total{route="person-retrieve",method="GET",status="404"} 1',
+            'api_requests_total{route="person-create",method="POST",status="201"} 1',
+            'api_requests_total{route="team-members",method="POST",status="200"} 1',
+        ]:
+            self.assertIn(line, lines)
+        self.assertTrue(any(line.startswith('api_request_queries_total{route="team-members"') for line in lines))
+        self.assertTrue(any(
+            line.startswith('api_request_phase_seconds_total{route="person-list",method="GET",phase="serialize"}')
+            for line in lines
+        ))
+
+    @override_settings(API_METRICS_TOKEN='secret')
+    def test_metrics_access(self):
+        self.assertEqual(self.client.get(self.metrics_url).status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get(self.metrics_url, HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get(self.metrics_url, HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.force_login(User.objects.create_user('user'))
+        self.assertEqual(self.client.get(self.metrics_url).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_login(User.objects.create_user('staff', is_staff=True))
+        self.assertEqual(self.client.get(self.metrics_url).status_code, status.HTTP_200_OK)
+
+    @override_settings(API_METRICS_TOKEN='')
+    def test_no_token_allows_staff_only(self):
+        response = self.client.get(self.metrics_url, HTTP_AUTHORIZATION='Bearer ')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_metrics_of_all_processes(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(API_METRICS_DIR=directory):
+            # Another worker process, which has exited since
+            other = MetricsRegistry()
+            other.observe('person-list', 'GET', 200, 0.001, RequestMetrics(), 0, 10)
+            other.aggregate()
+
+            self.client.get(self.persons_url)
+            rendered = registry.render()
+        self.assertIn('api_request_duration_seconds_count{route="person-list",method="GET"} 2', rendered)
+        self.assertIn('api_requests_total{route="person-list",method="GET",status="200"} 2', rendered)
+
+    async def test_async_views(self):
+        response = await self.async_client.get(self.persons_url)
+        self.assertIn('desc="2 queries (0 duplicated)"', self.timings(response)['db'])
+        self.assertIn('api_request_duration_seconds_count{route="person-list",method="GET"} 1', registry.render())
+
+    @override_settings(API_METRICS=False)
+    def test_disabled(self):
+        response = self.client.get(self.persons_url)
+        self.assertNotIn('Server-Timing', response)
+        self.assertNotIn('person-list', registry.render())
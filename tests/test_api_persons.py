@@ -1,7 +1,13 @@
+import json
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient, APITestCase
 
-from api.serializers import PersonSerializer
-from teams.models import Person
+from api import bulk
+from api.serializers import UNIQUE_EMAIL_ERROR, PersonSerializer
+from teams.models import Person, Team
 
 
 class PersonAPITest(APITestCase):
@@ -28,7 +34,7 @@ class PersonAPITest(APITestCase):
         response = self.client.get(self.base_url)
         persons = Person.objects.all()
         serializer = PersonSerializer(persons, many=True)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
         self.assertEqual(response.status_code, 200)
 
     def test_get_valid_single_person(self):
@@ -60,6 +66,24 @@ class PersonAPITest(APITestCase):
         response = self.client.post(self.base_url, data=self.valid_payload)
         response_duplicate = self.client.post(self.base_url, data=self.valid_payload)
         self.assertEqual(response_duplicate.status_code, 400)
+        self.assertEqual(response_duplicate.data, {'email': ["This field must be unique."]})
+        self.assertEqual(Person.objects.filter(email=self.valid_payload['email']).count(), 1)
+
+    def test_create_does_not_query_email_first(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.base_url, data=self.valid_payload)
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse([query for query in queries if query['sql'].startswith('SELECT')])
+
+    def test_update_duplicate_email(self):
+        response = self.client.patch(f'{self.base_url}{self.person2.pk}/', {'email': self.person1.email})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'email': ["This field must be unique."]})
+        self.person2.refresh_from_db()
+        self.assertEqual(self.person2.email, 'matviy.luxe@example.com')
+
+        response = self.client.patch(f'{self.base_url}{self.person2.pk}/', {'email': 'matviy.luxe@example.com'})
+        self.assertEqual(response.status_code, 200)
 
     def test_fields_in_response(self):
         response = self.client.get(f'{self.base_url}{self.person1.pk}/')
@@ -86,3 +110,253 @@ class PersonAPITest(APITestCase):
     def test_delete_invalid_person(self):
         response = self.client.delete(f'{self.base_url}1000/')
         self.assertEqual(response.status_code, 404)
+
+    def test_list_persons_is_paginated_by_cursor(self):
+        Person.objects.bulk_create(
+            Person(first_name='Paged', last_name='Person', email=f'paged.{i}@example.com') for i in range(5)
+        )
+        expected_ids = list(Person.objects.order_by('id').values_list('id', flat=True))
+
+        seen_ids = []
+        url = f'{self.base_url}?page_size=3'
+        while url:
+            # One query for the ETag stamp and one for the page
+            with self.assertNumQueries(2):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 3)
+            seen_ids.extend(person['id'] for person in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(seen_ids, expected_ids)
+
+    def test_list_persons_previous_cursor(self):
+        first_page = self.client.get(f'{self.base_url}?page_size=1')
+        second_page = self.client.get(first_page.data['next'])
+        self.assertIsNone(first_page.data['previous'])
+        self.assertEqual(second_page.data['results'][0]['id'], self.person2.pk)
+
+        response = self.client.get(second_page.data['previous'])
+        self.assertEqual(response.data['results'], first_page.data['results'])
+
+    def test_list_persons_invalid_cursor(self):
+        response = self.client.get(f'{self.base_url}?cursor=invalid')
+        self.assertEqual(response.status_code, 404)
+
+    def test_list_persons_unpaginated_opt_in(self):
+        response = self.client.get(f'{self.base_url}?unpaginated=true')
+        serializer = PersonSerializer(Person.objects.all(), many=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, serializer.data)
+
+    def test_export_persons_ndjson(self):
+        response = self.client.get(f'{self.base_url}export/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        serializer = PersonSerializer(Person.objects.order_by('id'), many=True)
+        self.assertEqual([json.loads(line) for line in lines], serializer.data)
+
+    def test_export_persons_json_array(self):
+        response = self.client.get(f'{self.base_url}export/?format=json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+        serializer = PersonSerializer(Person.objects.order_by('id'), many=True)
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), serializer.data)
+
+    def test_export_empty_persons(self):
+        Person.objects.all().delete()
+        response = self.client.get(f'{self.base_url}export/', HTTP_ACCEPT='application/json')
+        self.assertEqual(b''.join(response.streaming_content), b'[]')
+
+
+class PersonBulkAPITest(APITestCase):
+    bulk_url = '/api/v1/persons/bulk/'
+
+    def setUp(self):
+        self.person = Person.objects.create(first_name="Viktoria", last_name="Kit", email="viki.kit@example.com")
+
+    def items(self, count, prefix='bulk'):
+        return [
+            {'first_name': 'Bulk', 'last_name': 'Person', 'email': f'{prefix}.{i}@example.com'} for i in range(count)
+        ]
+
+    def test_bulk_create(self):
+        response = self.client.post(self.bulk_url, {'operation': 'create', 'items': self.items(3)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['created']), 3)
+        self.assertEqual(response.data['errors'], [])
+        self.assertEqual(Person.objects.count(), 4)
+
+    def test_bulk_create_query_count_is_constant(self):
+        for count in (10, 100):
+            # Uniqueness lookup, savepoint, insert, change log insert, savepoint release
+            with self.assertNumQueries(5):
+                response = self.client.post(
+                    self.bulk_url, {'operation': 'create', 'items': self.items(count, prefix=count)}, format='json'
+                )
+            self.assertEqual(response.status_code, 200)
+
+    def test_bulk_create_reports_invalid_items(self):
+        items = self.items(2) + [
+            {'first_name': 'Bad1', 'last_name': 'Person', 'email': 'bad@example.com'},
+            {'first_name': 'Viktoria', 'last_name': 'Kit', 'email': 'viki.kit@example.com'},
+            {'first_name': 'Bulk', 'last_name': 'Person', 'email': 'bulk.0@example.com'},
+        ]
+        response = self.client.post(self.bulk_url, {'operation': 'create', 'items': items}, format='json')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(len(response.data['created']), 2)
+        self.assertEqual([error['index'] for error in response.data['errors']], [2, 3, 4])
+        self.assertIn('first_name', response.data['errors'][0]['errors'])
+        self.assertIn('email', response.data['errors'][1]['errors'])
+        self.assertEqual(Person.objects.count(), 3)
+
+    def test_bulk_create_atomic_writes_nothing_on_error(self):
+        items = self.items(2) + [{'first_name': '', 'last_name': 'Person', 'email': 'empty@example.com'}]
+        response = self.client.post(
+            self.bulk_url, {'operation': 'create', 'items': items, 'atomic': True}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['created'], [])
+        self.assertEqual(Person.objects.count(), 1)
+
+    def test_bulk_upsert(self):
+        items = [{'first_name': 'Viktoriia', 'last_name': 'Kit', 'email': 'viki.kit@example.com'}] + self.items(1)
+        response = self.client.post(self.bulk_url, {'operation': 'upsert', 'items': items}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], [self.person.id])
+        self.assertEqual(len(response.data['created']), 1)
+        self.person.refresh_from_db()
+        self.assertEqual(self.person.first_name, 'Viktoriia')
+
+    def taken_concurrently(self, *emails):
+        """ Let other requests create a person with the next of ``emails`` each time emails are read. """
+        read = bulk._ids_by_email
+        emails = list(emails)
+
+        def read_then_take(batch_emails):
+            existing = read(batch_emails)
+            if emails:
+                Person.objects.create(first_name='Other', last_name='Request', email=emails.pop(0))
+            return existing
+        return mock.patch('api.bulk._ids_by_email', side_effect=read_then_take)
+
+    def test_bulk_create_email_taken_concurrently(self):
+        with self.taken_concurrently('bulk.1@example.com'):
+            response = self.client.post(self.bulk_url, {'operation': 'create', 'items': self.items(3)}, format='json')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(len(response.data['created']), 2)
+        self.assertEqual(response.data['errors'], [{'index': 1, 'errors': UNIQUE_EMAIL_ERROR}])
+
+    def test_bulk_upsert_email_taken_concurrently(self):
+        with self.taken_concurrently('bulk.1@example.com'):
+            response = self.client.post(self.bulk_url, {'operation': 'upsert', 'items': self.items(3)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['created']), 2)
+        self.assertEqual(response.data['updated'], [Person.objects.get(email='bulk.1@example.com').id])
+        self.assertEqual(Person.objects.get(email='bulk.1@example.com').first_name, 'Bulk')
+
+    def test_bulk_email_kept_being_taken_concurrently(self):
+        with self.taken_concurrently('bulk.1@example.com', 'bulk.2@example.com'):
+            response = self.client.post(self.bulk_url, {'operation': 'upsert', 'items': self.items(3)}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['created'], [])
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+        self.assertEqual(Person.objects.filter(email__startswith='bulk.').count(), 2)
+
+    def test_bulk_delete(self):
+        response = self.client.post(self.bulk_url, {'operation': 'delete', 'ids': [self.person.id, 1000]}, format='json')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.data['deleted'], [self.person.id])
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+        self.assertFalse(Person.objects.exists())
+
+    def test_bulk_delete_atomic(self):
+        response = self.client.post(
+            self.bulk_url, {'operation': 'delete', 'ids': [self.person.id, 1000], 'atomic': True}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(Person.objects.exists())
+
+    def test_bulk_requires_items_for_operation(self):
+        response = self.client.post(self.bulk_url, {'operation': 'create', 'ids': [1]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('items', response.data)
+
+
+class PersonFilterAPITest(APITestCase):
+    base_url = '/api/v1/persons/'
+
+    def setUp(self):
+        self.viktoria = Person.objects.create(first_name="Viktoria", last_name="Kit", email="viki.kit@example.com")
+        self.matviy = Person.objects.create(first_name="Matviy", last_name="Luxe", email="matviy.luxe@example.com")
+        self.kyrylo = Person.objects.create(first_name="Kyrylo", last_name="Vik", email="Kyrylo.Vik@example.com")
+
+    def filtered_ids(self, **params):
+        response = self.client.get(self.base_url, params)
+        self.assertEqual(response.status_code, 200)
+        return [person['id'] for person in response.data['results']]
+
+    def test_filter_by_name_prefix(self):
+        self.assertEqual(self.filtered_ids(name='vik'), [self.viktoria.id, self.kyrylo.id])
+        self.assertEqual(self.filtered_ids(name='LUX'), [self.matviy.id])
+        self.assertEqual(self.filtered_ids(name='iktoria'), [])
+
+    def test_name_prefix_is_not_a_pattern(self):
+        self.assertEqual(self.filtered_ids(name='%'), [])
+        self.assertEqual(self.filtered_ids(name='_at'), [])
+
+    def test_filter_by_email(self):
+        self.assertEqual(self.filtered_ids(email='kyrylo.vik@example.com'), [self.kyrylo.id])
+        self.assertEqual(self.filtered_ids(email='kyrylo.vik@example'), [])
+
+    def test_filter_by_team(self):
+        team = Team.objects.create(name='Test Team')
+        team.members.add(self.viktoria, self.matviy)
+        self.assertEqual(self.filtered_ids(team=team.id), [self.viktoria.id, self.matviy.id])
+        self.assertEqual(self.filtered_ids(team=team.id, name='mat'), [self.matviy.id])
+
+    def test_filter_by_invalid_team(self):
+        response = self.client.get(self.base_url, {'team': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('team', response.data)
+
+
+class PersonFieldsAPITest(APITestCase):
+    base_url = '/api/v1/persons/'
+
+    def setUp(self):
+        self.person = Person.objects.create(first_name="Viktoria", last_name="Kit", email="viki.kit@example.com")
+
+    def test_list_selected_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.base_url, {'fields': 'id,email'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [{'id': self.person.id, 'email': self.person.email}])
+
+        select = queries.captured_queries[-1]['sql']
+        self.assertIn('"email"', select)
+        self.assertNotIn('"first_name"', select)
+
+    def test_retrieve_selected_fields(self):
+        response = self.client.get(f'{self.base_url}{self.person.id}/', {'fields': 'first_name'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'first_name': 'Viktoria'})
+
+    def test_export_selected_fields(self):
+        response = self.client.get(f'{self.base_url}export/', {'fields': 'id'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [{'id': self.person.id}])
+
+    def test_unknown_field(self):
+        response = self.client.get(self.base_url, {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.data)
+
+    def test_persons_cannot_be_expanded(self):
+        response = self.client.get(self.base_url, {'fields': 'id', 'expand': 'teams'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('expand', response.data)
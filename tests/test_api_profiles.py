@@ -0,0 +1,64 @@
+import json
+import os
+import runpy
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from rest_framework.test import APITestCase
+
+SETTINGS = (
+    'import json, django; django.setup(); from django.conf import settings; '
+    'print(json.dumps({"debug": settings.DEBUG, "middleware": settings.MIDDLEWARE, '
+    '"conn_max_age": settings.DATABASES["default"]["CONN_MAX_AGE"], '
+    '"staticfiles": settings.STORAGES["staticfiles"]["BACKEND"]}))'
+)
+
+
+def profile_settings(**environ):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='wht_teams.settings', **environ)
+    result = subprocess.run([sys.executable, '-c', SETTINGS], capture_output=True, text=True, env=env)
+    return json.loads(result.stdout or result.stderr)
+
+
+class ProfileTests(APITestCase):
+
+    def test_dev_profile(self):
+        dev = profile_settings(DJANGO_PROFILE='dev', DB_CONN_MAX_AGE='60')
+        self.assertTrue(dev['debug'])
+        self.assertNotIn('whitenoise.middleware.WhiteNoiseMiddleware', dev['middleware'])
+
+    def test_prod_profile(self):
+        prod = profile_settings(DJANGO_PROFILE='prod', DB_CONN_MAX_AGE='60')
+        self.assertFalse(prod['debug'])
+        self.assertEqual(prod['conn_max_age'], 60)
+        middleware = prod['middleware']
+        self.assertEqual(
+            middleware.index('whitenoise.middleware.WhiteNoiseMiddleware'),
+            middleware.index('django.middleware.security.SecurityMiddleware') + 1,
+        )
+        self.assertEqual(prod['staticfiles'], 'whitenoise.storage.CompressedManifestStaticFilesStorage')
+
+    def test_gunicorn_settings(self):
+        path = settings.BASE_DIR / 'gunicorn.conf.py'
+        with mock.patch.dict(os.environ, {'WEB_WORKERS': '4', 'WEB_MAX_REQUESTS': '500'}):
+            config = runpy.run_path(str(path))
+        self.assertEqual(config['workers'], 4)
+        self.assertTrue(config['preload_app'])
+        self.assertEqual(config['max_requests'], 500)
+        self.assertGreater(config['max_requests_jitter'], 0)
+
+    def test_gunicorn_clears_metrics_snapshots_only(self):
+        path = settings.BASE_DIR / 'gunicorn.conf.py'
+        with tempfile.TemporaryDirectory() as directory:
+            snapshots = ['12-0123456789abcdef0123456789abcdef.json', '34-0123456789abcdef0123456789abcdef.json.tmp']
+            others = ['notes.json', 'data.txt']
+            for name in snapshots + others:
+                open(os.path.join(directory, name), 'w').close()
+            os.mkdir(os.path.join(directory, 'cache'))
+
+            with mock.patch.dict(os.environ, {'API_METRICS_DIR': directory}):
+                runpy.run_path(str(path))['on_starting'](server=None)
+            self.assertEqual(sorted(os.listdir(directory)), ['cache', 'data.txt', 'notes.json'])
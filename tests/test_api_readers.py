@@ -0,0 +1,45 @@
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+
+from api.readers import ValuesReader
+from api.serializers import PersonSerializer, TeamSerializer
+from teams.models import Person, Team
+
+
+class ValuesReaderTests(TestCase):
+    """ The values reader must render byte for byte what the serializers render. """
+
+    def setUp(self):
+        self.persons = [
+            Person.objects.create(first_name="Viktoria", last_name="Kit", email="viki.kit@example.com"),
+            Person.objects.create(first_name="Матвій", last_name="Люкс", email="matviy.luxe@example.com"),
+            Person.objects.create(first_name="Kyrylo", last_name="Vik", email="kyrylo.vik@example.com"),
+        ]
+        self.team = Team.objects.create(name='Test Team', description='This is a "test" team')
+        self.team.members.set([self.persons[2], self.persons[0]])
+        Team.objects.create(name='Empty Team')
+
+    def assertSameOutput(self, serializer_class, queryset, **kwargs):
+        expected = serializer_class(queryset, many=True, **kwargs).data
+        reader = ValuesReader(serializer_class(**kwargs))
+        actual = reader.represent(reader.values(queryset))
+        self.assertEqual(JSONRenderer().render(actual), JSONRenderer().render(expected))
+
+    def test_persons(self):
+        self.assertSameOutput(PersonSerializer, Person.objects.order_by('id'))
+
+    def test_sparse_persons(self):
+        self.assertSameOutput(PersonSerializer, Person.objects.order_by('id'), fields=['email', 'updated_at'])
+
+    def test_teams_with_members(self):
+        self.assertSameOutput(TeamSerializer, Team.objects.order_by('id').prefetch_related('members'))
+
+    def test_teams_with_member_ids(self):
+        self.assertSameOutput(
+            TeamSerializer, Team.objects.order_by('id'), fields=['id', 'members', 'name'], compact=['members']
+        )
+
+    def test_queries_do_not_depend_on_row_count(self):
+        reader = ValuesReader(TeamSerializer())
+        with self.assertNumQueries(2):
+            reader.represent(reader.values(Team.objects.order_by('id')))
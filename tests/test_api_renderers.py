@@ -0,0 +1,86 @@
+import datetime
+import decimal
+import io
+import uuid
+from unittest import mock
+
+from django.test import SimpleTestCase
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from api.renderers import FastJSONParser, FastJSONRenderer
+from teams.models import Person
+
+SAMPLES = [
+    {'id': 1, 'first_name': 'Матвій', 'last_name': 'Їжакевич', 'email': 'matviy@example.com'},
+    [{'name': 'Команда', 'members': [1, 2, 3], 'description': ''}, None, True, False],
+    {'line': 'a\u2028b\u2029c', 'quote': '"\\/\n\t', 'emoji': '\U0001F600', 'control': '\x00\x1f'},
+    {1: 'integer key', 'big': 2 ** 63, 'negative': -2 ** 63},
+    {
+        'updated_at': datetime.datetime(2023, 10, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+        'date': datetime.date(2023, 10, 1),
+        'time': datetime.time(12, 30),
+        'decimal': decimal.Decimal('1.10'),
+        'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    },
+    {'huge': 2 ** 70},
+]
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def assertSameRendering(self, data, accepted_media_type=None):
+        self.assertEqual(
+            FastJSONRenderer().render(data, accepted_media_type),
+            JSONRenderer().render(data, accepted_media_type),
+        )
+
+    def test_same_output_as_json_renderer(self):
+        for data in SAMPLES:
+            with self.subTest(data=data):
+                self.assertSameRendering(data)
+
+    def test_same_output_when_indented(self):
+        self.assertSameRendering(SAMPLES[0], 'application/json; indent=4')
+
+    def test_same_output_without_orjson(self):
+        with mock.patch('api.renderers.orjson', None):
+            for data in SAMPLES:
+                with self.subTest(data=data):
+                    self.assertSameRendering(data)
+
+    def test_none_renders_empty_body(self):
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+
+class FastJSONParserTests(SimpleTestCase):
+    def parse(self, parser, body):
+        return parser.parse(io.BytesIO(body), 'application/json', {'encoding': 'utf-8'})
+
+    def test_same_result_as_json_parser(self):
+        for data in SAMPLES[:3]:
+            body = JSONRenderer().render(data)
+            with self.subTest(body=body):
+                self.assertEqual(self.parse(FastJSONParser(), body), self.parse(JSONParser(), body))
+
+    def test_invalid_json(self):
+        for body in [b'{"first_name": ', b'{"value": NaN}', b'']:
+            with self.subTest(body=body):
+                with self.assertRaises(ParseError):
+                    self.parse(FastJSONParser(), body)
+
+    def test_other_encoding(self):
+        body = '{"first_name": "Матвій"}'.encode('utf-16')
+        parsed = FastJSONParser().parse(io.BytesIO(body), 'application/json', {'encoding': 'utf-16'})
+        self.assertEqual(parsed, {'first_name': 'Матвій'})
+
+
+class JSONContentTests(APITestCase):
+    def test_cyrillic_person_round_trip(self):
+        data = {'first_name': 'Матвій', 'last_name': 'Їжакевич', 'email': 'matviy@example.com'}
+        response = self.client.post('/api/v1/persons/', data, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+        self.assertIn('Матвій'.encode(), response.content)
+        self.assertEqual(Person.objects.get().first_name, 'Матвій')
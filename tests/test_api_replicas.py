@@ -0,0 +1,158 @@
+from unittest import skipUnless
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test import RequestFactory, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.cache import response_timeout
+from api.replicas import REPLICA_ALIAS, WROTE_COOKIE, can_read_from_replica, read_from_replica
+from teams.models import Person, Team
+
+
+# Whether the replica is a database of its own in tests, rather than a test mirror of the primary
+SEPARATE_REPLICA = not settings.DATABASES[REPLICA_ALIAS].get('TEST', {}).get('MIRROR')
+
+
+def create_everywhere(model, **fields):
+    """ Create an object on the primary and its replicated copy on a separate replica. """
+    instance = model.objects.create(**fields)
+    if SEPARATE_REPLICA:
+        model.objects.using(REPLICA_ALIAS).create(pk=instance.pk, **fields)
+    return instance
+
+
+@override_settings(REPLICA_READS=True)
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Tells which database a request used by the queries it ran on each connection.
+
+    The replica is a test mirror of the primary, or a separate database when the settings
+    define one; these tests pass either way.
+    """
+    databases = '__all__'
+    persons_url = '/api/v1/persons/'
+    teams_url = '/api/v1/teams/'
+    client_class = APIClient
+
+    def setUp(self):
+        cache.clear()
+        self.person = create_everywhere(Person, first_name="Viktoria", last_name="Kit", email="viki.kit@example.com")
+        self.team = create_everywhere(Team, name='Test Team')
+
+    def assertReadsFrom(self, alias, request):
+        """ Check that ``request`` only queried ``alias`` and return its response. """
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as primary, \
+                CaptureQueriesContext(connections[REPLICA_ALIAS]) as replica:
+            response = request()
+        queries = {DEFAULT_DB_ALIAS: len(primary), REPLICA_ALIAS: len(replica)}
+        self.assertGreater(queries.pop(alias), 0)
+        self.assertEqual(list(queries.values()), [0])
+        return response
+
+    def list_from(self, alias, client=None):
+        response = self.assertReadsFrom(alias, lambda: (client or self.client).get(self.persons_url))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_reads_from_replica(self):
+        self.list_from(REPLICA_ALIAS)
+
+    def test_retrieve_reads_from_replica(self):
+        for url in (f'{self.persons_url}{self.person.id}/', f'{self.teams_url}{self.team.id}/'):
+            response = self.assertReadsFrom(REPLICA_ALIAS, lambda: self.client.get(url))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_writes_go_to_primary(self):
+        data = {'first_name': 'Andrii', 'last_name': 'Shevchenko', 'email': 'a.shevchenko@example.com'}
+        response = self.assertReadsFrom(DEFAULT_DB_ALIAS, lambda: self.client.post(self.persons_url, data))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Person.objects.filter(email=data['email']).exists())
+
+    def test_membership_changes_go_to_primary(self):
+        data = {'person_id': self.person.id}
+        for action in ('add_member', 'remove_member'):
+            response = self.assertReadsFrom(
+                DEFAULT_DB_ALIAS, lambda: self.client.post(f'{self.teams_url}{self.team.id}/{action}/', data)
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(self.team.members.exists())
+
+    def test_reads_follow_own_writes(self):
+        data = {'first_name': 'Andrii', 'last_name': 'Shevchenko', 'email': 'a.shevchenko@example.com'}
+        response = self.client.post(self.persons_url, data)
+        self.assertIn(WROTE_COOKIE, response.cookies)
+        self.list_from(DEFAULT_DB_ALIAS)
+
+        # Other clients keep reading from the replica, once the response read from the primary is not cached
+        cache.clear()
+        self.list_from(REPLICA_ALIAS, self.client_class())
+
+    def test_failed_writes_do_not_stick(self):
+        response = self.client.post(self.persons_url, {'first_name': 'Andrii'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn(WROTE_COOKIE, response.cookies)
+        self.list_from(REPLICA_ALIAS)
+
+    def test_tampered_cookie_is_ignored(self):
+        self.client.cookies[WROTE_COOKIE] = '1'
+        self.list_from(REPLICA_ALIAS)
+
+    def test_async_reads_from_replica(self):
+        # The queries of async views run in this thread, whose connections are the captured ones
+        get = async_to_sync(self.async_client.get)
+        response = self.assertReadsFrom(REPLICA_ALIAS, lambda: get(self.persons_url))
+        self.assertEqual(response.resolver_match.func.__module__, 'api.async_views')
+
+    def test_reads_in_transaction_stay_on_primary(self):
+        request = RequestFactory().get(self.persons_url)
+        self.assertTrue(can_read_from_replica(request))
+        with transaction.atomic():
+            self.assertFalse(can_read_from_replica(request))
+
+    def test_replica_responses_are_cached_shortly(self):
+        self.assertEqual(response_timeout(), settings.API_CACHE_TIMEOUT)
+        with read_from_replica():
+            self.assertEqual(response_timeout(), min(settings.API_CACHE_TIMEOUT, settings.REPLICA_MAX_LAG_SECONDS))
+
+    @override_settings(REPLICA_READS=False)
+    def test_without_replica_everything_goes_to_primary(self):
+        self.list_from(DEFAULT_DB_ALIAS)
+        response = self.client.post(self.persons_url, {'first_name': 'Andrii'})
+        self.assertNotIn(WROTE_COOKIE, response.cookies)
+
+
+@skipUnless(SEPARATE_REPLICA, 'Needs a separate replica database.')
+@override_settings(REPLICA_READS=True)
+class ReplicaDataTests(TransactionTestCase):
+    """
+    The replica is a separate database here, so rows written to the primary only are not
+    replicated and show which rows a request read.
+    """
+    databases = '__all__'
+    persons_url = '/api/v1/persons/'
+    client_class = APIClient
+
+    def setUp(self):
+        cache.clear()
+        self.person = create_everywhere(Person, first_name="Viktoria", last_name="Kit", email="viki.kit@example.com")
+        self.primary_only = Person.objects.create(
+            first_name="Matviy", last_name="Luxe", email="matviy.luxe@example.com"
+        )
+
+    def list_ids(self):
+        return [person['id'] for person in self.client.get(self.persons_url).data['results']]
+
+    def test_reads_see_replicated_rows_only(self):
+        self.assertEqual(self.list_ids(), [self.person.id])
+        response = self.client.get(f'{self.persons_url}{self.primary_only.id}/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_reads_follow_own_writes(self):
+        data = {'first_name': 'Andrii', 'last_name': 'Shevchenko', 'email': 'a.shevchenko@example.com'}
+        response = self.client.post(self.persons_url, data)
+        self.assertFalse(Person.objects.using(REPLICA_ALIAS).filter(email=data['email']).exists())
+        self.assertEqual(self.list_ids(), [self.person.id, self.primary_only.id, response.data['id']])
@@ -0,0 +1,66 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db.models import Count
+from rest_framework.test import APITestCase
+
+from api.management.commands.recount_members import repair_counters
+from teams.models import Change, Membership, Person, Team
+
+
+class SeedDataCommandTests(APITestCase):
+    def seed(self, *args):
+        out = StringIO()
+        call_command('seed_data', *args, stdout=out)
+        return out.getvalue()
+
+    def snapshot(self):
+        return (
+            list(Person.objects.order_by('id').values_list('first_name', 'last_name', 'email', 'team_count')),
+            list(Team.objects.order_by('id').values_list('name', 'member_count')),
+            list(Membership.objects.order_by('person__email', 'team__name').values_list('person__email', 'team__name')),
+        )
+
+    def test_generates_data(self):
+        output = self.seed('--persons', '50', '--teams', '10', '--memberships', '3', '--batch-size', '20')
+        self.assertEqual(output, "Created 50 persons, 10 teams and 150 memberships.\n")
+        self.assertEqual(Person.objects.count(), 50)
+        self.assertEqual(Team.objects.count(), 10)
+        self.assertEqual(
+            list(Person.objects.annotate(teams_joined=Count('teams')).values_list('teams_joined', flat=True).distinct()),
+            [3],
+        )
+        self.assertEqual(repair_counters(Team, 100, dry_run=True), [])
+        self.assertEqual(repair_counters(Person, 100, dry_run=True), [])
+        self.assertFalse(Change.objects.exists())
+
+    def test_same_seed_same_data(self):
+        self.seed('--persons', '30', '--teams', '5', '--memberships', '2', '--seed', '7')
+        first = self.snapshot()
+        self.seed('--persons', '30', '--teams', '5', '--memberships', '2', '--seed', '7', '--flush')
+        self.assertEqual(self.snapshot(), first)
+
+        self.seed('--persons', '30', '--teams', '5', '--memberships', '2', '--seed', '8', '--flush')
+        self.assertNotEqual(self.snapshot(), first)
+
+    def test_zipf_distribution(self):
+        self.seed('--persons', '500', '--teams', '20', '--distribution', 'zipf')
+        sizes = list(Team.objects.order_by('id').values_list('member_count', flat=True))
+        self.assertEqual(sum(sizes), 500)
+        self.assertGreater(sizes[0], 5 * sizes[-1])
+
+    def test_refuses_to_mix_with_existing_data(self):
+        Person.objects.create(first_name='Viktoria', last_name='Kit', email='viki.kit@example.com')
+        with self.assertRaisesMessage(CommandError, "pass --flush"):
+            self.seed('--persons', '10')
+        self.assertEqual(Person.objects.count(), 1)
+
+        self.seed('--persons', '10', '--teams', '2', '--flush')
+        self.assertFalse(Person.objects.filter(email='viki.kit@example.com').exists())
+        self.assertEqual(Person.objects.count(), 10)
+
+    def test_invalid_memberships(self):
+        with self.assertRaisesMessage(CommandError, "more teams than there are"):
+            self.seed('--teams', '2', '--memberships', '3')
+        with self.assertRaisesMessage(CommandError, "at most half of the teams"):
+            self.seed('--teams', '4', '--memberships', '3', '--distribution', 'zipf')
@@ -1,7 +1,11 @@
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from api.serializers import TeamSerializer
+from api.serializers import PersonSerializer, TeamSerializer
 from teams.models import Person, Team
 
 
@@ -15,6 +19,18 @@ class TeamAPITests(APITestCase):
     def test_list_teams(self):
         response = self.client.get(self.base_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], TeamSerializer(Team.objects.all(), many=True).data)
+
+    def test_list_teams_is_paginated_by_cursor(self):
+        Team.objects.create(name='Second Team')
+        response = self.client.get(f'{self.base_url}?page_size=1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([team['id'] for team in response.data['results']], [self.team.id])
+        self.assertIsNotNone(response.data['next'])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([team['name'] for team in response.data['results']], ['Second Team'])
+        self.assertIsNone(response.data['next'])
 
     def test_create_team(self):
         data = {'name': 'New Team', 'description': 'This is a new test team'}
@@ -73,3 +89,148 @@ class TeamAPITests(APITestCase):
         data = {'person_id': self.person.id}
         response = self.client.post(f'{self.base_url}{self.team.id}/add_member/', data)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_teams_query_count_is_constant(self):
+        for team_count, members_per_team in ((1, 1), (5, 3), (20, 10)):
+            Team.objects.exclude(pk=self.team.pk).delete()
+            for i in range(team_count):
+                team = Team.objects.create(name=f'Team {team_count}-{i}')
+                team.members.set(
+                    Person.objects.create(
+                        first_name='Member', last_name='Test', email=f'member.{team_count}.{i}.{j}@example.com'
+                    )
+                    for j in range(members_per_team)
+                )
+            # One query each for the ETag stamp, the teams and all of their members
+            with self.assertNumQueries(3):
+                response = self.client.get(self.base_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data['results']), team_count + 1)
+
+    def test_retrieve_team_with_members(self):
+        self.team.members.add(self.person)
+        with self.assertNumQueries(3):
+            response = self.client.get(f'{self.base_url}{self.team.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['members'][0]['id'], self.person.id)
+
+    def test_export_teams_with_members(self):
+        self.team.members.add(self.person)
+        Team.objects.create(name='Empty Team')
+        response = self.client.get(f'{self.base_url}export/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        serializer = TeamSerializer(Team.objects.order_by('id'), many=True)
+        self.assertEqual([json.loads(line) for line in lines], serializer.data)
+        self.assertEqual(json.loads(lines[0])['members'][0]['email'], self.person.email)
+
+
+class TeamMembersAPITests(APITestCase):
+    base_url = '/api/v1/teams/'
+
+    def setUp(self):
+        self.team = Team.objects.create(name='Test Team')
+        self.persons = [
+            Person.objects.create(first_name='Member', last_name='Test', email=f'member.{i}@example.com')
+            for i in range(4)
+        ]
+        self.url = f'{self.base_url}{self.team.id}/members/'
+
+    def member_ids(self):
+        return sorted(self.team.members.values_list('id', flat=True))
+
+    def test_add_and_remove_members(self):
+        self.team.members.add(self.persons[0], self.persons[1])
+        data = {'add': [self.persons[1].id, self.persons[2].id], 'remove': [self.persons[0].id, self.persons[3].id]}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'added': [self.persons[2].id], 'removed': [self.persons[0].id]})
+        self.assertEqual(self.member_ids(), [self.persons[1].id, self.persons[2].id])
+
+    def test_replace_members(self):
+        self.team.members.add(self.persons[0], self.persons[1])
+        data = {'replace': [self.persons[1].id, self.persons[3].id]}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'added': [self.persons[3].id], 'removed': [self.persons[0].id]})
+        self.assertEqual(self.member_ids(), [self.persons[1].id, self.persons[3].id])
+
+    def test_replace_with_empty_list_removes_everyone(self):
+        self.team.members.add(*self.persons)
+        response = self.client.post(self.url, {'replace': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.member_ids(), [])
+
+    def test_query_count_does_not_depend_on_batch_size(self):
+        extra = Person.objects.bulk_create(
+            Person(first_name='Extra', last_name='Test', email=f'extra.{i}@example.com') for i in range(50)
+        )
+        for persons in (self.persons[:1], extra):
+            self.team.members.clear()
+            with self.assertNumQueries(10):
+                response = self.client.post(self.url, {'add': [person.id for person in persons]}, format='json')
+            self.assertEqual(len(response.data['added']), len(persons))
+
+    def test_unknown_person(self):
+        response = self.client.post(self.url, {'add': [self.persons[0].id, 1000]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data['missing'], [1000])
+        self.assertEqual(self.member_ids(), [])
+
+    def test_replace_cannot_be_combined(self):
+        response = self.client.post(self.url, {'replace': [], 'add': [self.persons[0].id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unknown_team(self):
+        response = self.client.post(f'{self.base_url}1000/members/', {'add': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_filter_teams_by_name_prefix(self):
+        other = Team.objects.create(name='Other Team')
+        response = self.client.get(self.base_url, {'name': 'oth'})
+        self.assertEqual([team['id'] for team in response.data['results']], [other.id])
+        response = self.client.get(self.base_url, {'name': 'team'})
+        self.assertEqual(response.data['results'], [])
+
+
+class TeamFieldsAPITests(APITestCase):
+    base_url = '/api/v1/teams/'
+
+    def setUp(self):
+        self.team = Team.objects.create(name='Test Team', description='This is a test team')
+        self.person = Person.objects.create(first_name="Viktoria", last_name="Kit", email="viki.kit@example.com")
+        self.team.members.add(self.person)
+        self.person.refresh_from_db()
+
+    def test_members_as_ids(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.base_url, {'fields': 'id,name,members'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data['results'], [{'id': self.team.id, 'name': 'Test Team', 'members': [self.person.id]}]
+        )
+
+        teams, members = [query['sql'] for query in queries.captured_queries[-2:]]
+        self.assertNotIn('"description"', teams)
+        self.assertNotIn('"email"', members)
+
+    def test_expanded_members(self):
+        response = self.client.get(f'{self.base_url}{self.team.id}/', {'fields': 'members', 'expand': 'members'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'members': [PersonSerializer(self.person).data]})
+
+    def test_without_members_does_not_query_them(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(self.base_url, {'fields': 'name'})
+        self.assertEqual(response.data['results'], [{'name': 'Test Team'}])
+
+    def test_default_representation_embeds_members(self):
+        response = self.client.get(f'{self.base_url}{self.team.id}/', {'expand': 'members'})
+        self.team.refresh_from_db()
+        self.assertEqual(response.data, TeamSerializer(self.team).data)
+
+    def test_unknown_expand(self):
+        response = self.client.get(self.base_url, {'fields': 'id', 'expand': 'owner'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
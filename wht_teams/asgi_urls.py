@@ -0,0 +1,8 @@
+from django.urls import path, include
+
+from .urls import urlpatterns as wsgi_urlpatterns
+
+# URLS served over ASGI: the same as over WSGI, with async read endpoints in the API
+urlpatterns = [
+    path('api/v1/', include('api.async_urls')),
+] + wsgi_urlpatterns
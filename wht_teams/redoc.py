@@ -1,18 +1,68 @@
+"""
+OpenAPI schema and documentation views.
+
+drf_yasg's views, renderers and spec validators take longer to import than the rest of the API, so
+this module is only imported by ``wht_teams.urls.docs`` on the first request for the docs.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control
 from drf_yasg import openapi
 from drf_yasg.views import get_schema_view, ReDocRenderer
+from rest_framework.response import Response
 
 # Redoc
 ReDocRenderer.template = 'wht_teams/redoc/custom_redoc.html'
-with open('templates/wht_teams/redoc/description.html') as f:
+with open(settings.BASE_DIR / 'templates' / 'wht_teams' / 'redoc' / 'description.html') as f:
     description = f.read()
 
-api_info = get_schema_view(
-    openapi.Info(
-        title="WHT Teams API",
-        default_version='v1',
-        description=description,
-        contact=openapi.Contact(email="31545d@gmail.com"),
-        license=openapi.License(name="BSD License"),
-    ),
-    public=True
-)
\ No newline at end of file
+api_info = openapi.Info(
+    title="WHT Teams API",
+    default_version='v1',
+    description=description,
+    contact=openapi.Contact(email="31545d@gmail.com"),
+    license=openapi.License(name="BSD License"),
+)
+
+
+class CachedSchemaView(get_schema_view(api_info, public=True)):
+    """
+    Schema view generating the schema once per process instead of on every request.
+
+    The schema only changes with the code, so it is kept until the process exits, keyed by what it
+    depends on: the API version, the host it is served from and the output format. Only the
+    ``max_schemas`` most recently used are kept, since any Host header is accepted when
+    ``ALLOWED_HOSTS`` is ``*``. Responses carry an ETag of the schema and may be cached by clients
+    for ``API_SCHEMA_CACHE_SECONDS``.
+    """
+    schemas = OrderedDict()
+    max_schemas = 8
+    lock = threading.Lock()
+
+    def get(self, request, version='', format=None):
+        key = (request.version or version, request.scheme, request.get_host(), request.accepted_renderer.format)
+        with self.lock:
+            entry = self.schemas.get(key)
+            if entry is not None:
+                self.schemas.move_to_end(key)
+        if entry is None:
+            schema = super().get(request, version, format).data
+            digest = hashlib.sha1(json.dumps(schema, sort_keys=True, default=str).encode()).hexdigest()
+            entry = (schema, f'"{digest}-{key[-1]}"')
+            with self.lock:
+                self.schemas[key] = entry
+                while len(self.schemas) > self.max_schemas:
+                    self.schemas.popitem(last=False)
+        schema, etag = entry
+
+        response = get_conditional_response(request, etag=etag) or Response(schema)
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=settings.API_SCHEMA_CACHE_SECONDS)
+        return response
+
+
+docs_view = CachedSchemaView.with_ui('swagger', cache_timeout=0)
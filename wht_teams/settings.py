@@ -1,12 +1,17 @@
 from pathlib import Path
-from decouple import config
+from decouple import Choices, config, Csv
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = config('SECRET_KEY')
 
-DEBUG = True
-ALLOWED_HOSTS = []
+# Runtime profile: 'dev' for manage.py runserver, 'prod' for gunicorn (see gunicorn.conf.py) with DEBUG off
+# and the static files served from STATIC_ROOT by WhiteNoise
+DJANGO_PROFILE = config('DJANGO_PROFILE', default='dev', cast=Choices(['dev', 'prod']))
+
+DEBUG = config('DEBUG', default=DJANGO_PROFILE == 'dev', cast=bool)
+# Comma-separated host names the API is served from; only needed with DEBUG off
+ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='', cast=Csv())
 
 # Application definition
 INSTALLED_APPS = [
@@ -25,6 +30,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
+    'api.budgets.QueryBudgetMiddleware',
+    'api.middleware.ASGIUrlconfMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -36,6 +44,9 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'wht_teams.urls'
 
+# URLconf of the requests served over ASGI, which has async read endpoints; empty to use ROOT_URLCONF
+ASGI_URLCONF = config('ASGI_URLCONF', default='wht_teams.asgi_urls')
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -57,15 +68,83 @@ WSGI_APPLICATION = 'wht_teams.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'postgres',
-        'USER': 'postgres',
-        'PASSWORD': 'postgres',
-        'HOST': 'db',
-        'PORT': '5432',
+        'ENGINE': config('DB_ENGINE', default='django.db.backends.postgresql'),
+        'NAME': config('DB_NAME', default='postgres'),
+        'USER': config('DB_USER', default='postgres'),
+        'PASSWORD': config('DB_PASSWORD', default='postgres'),
+        'HOST': config('DB_HOST', default='db'),
+        'PORT': config('DB_PORT', default='5432'),
+        # Seconds a connection is kept open for the next requests of its worker, None for no limit
+        # and 0 to close it after every request. Kept connections are checked before being reused
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=lambda value: int(value) if value else None),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+        # Needed behind a pooler in transaction mode like PgBouncer, where cursors can't outlive a transaction
+        'DISABLE_SERVER_SIDE_CURSORS': config('DB_DISABLE_SERVER_SIDE_CURSORS', default=False, cast=bool),
     }
 }
 
+# Read replica serving the list and retrieve actions, configured by DB_REPLICA_HOST or DB_REPLICA_NAME.
+# Its other settings default to the primary's. Without a replica the alias is the primary's database,
+# which reads are not sent to; tests always use the primary's test database through it
+DB_REPLICA_HOST = config('DB_REPLICA_HOST', default='')
+DB_REPLICA_NAME = config('DB_REPLICA_NAME', default='')
+REPLICA_READS = bool(DB_REPLICA_HOST or DB_REPLICA_NAME)
+
+DATABASES['replica'] = {
+    **DATABASES['default'],
+    'NAME': DB_REPLICA_NAME or DATABASES['default']['NAME'],
+    'USER': config('DB_REPLICA_USER', default=DATABASES['default']['USER']),
+    'PASSWORD': config('DB_REPLICA_PASSWORD', default=DATABASES['default']['PASSWORD']),
+    'HOST': DB_REPLICA_HOST or DATABASES['default']['HOST'],
+    'PORT': config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+    'TEST': {'MIRROR': 'default'},
+}
+
+DATABASE_ROUTERS = ['api.replicas.PrimaryReplicaRouter']
+
+# Upper bound in seconds of the replication lag: clients read from the primary for that long
+# after a write, and responses read from the replica are cached no longer than that
+REPLICA_MAX_LAG_SECONDS = config('REPLICA_MAX_LAG_SECONDS', default=5, cast=int)
+
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Seconds a cached API response is kept; writes invalidate it earlier
+API_CACHE_TIMEOUT = config('API_CACHE_TIMEOUT', default=300, cast=int)
+
+# Age in seconds before a change log entry is served by the change feed, so that entries of
+# transactions that are still committing are not skipped by consumers
+CHANGE_FEED_SETTLE_SECONDS = config('CHANGE_FEED_SETTLE_SECONDS', default=2, cast=int)
+
+# Per-request timings in Server-Timing headers and per-route metrics at /metrics
+API_METRICS = config('API_METRICS', default=True, cast=bool)
+
+# Number of duplicate queries (same SQL, e.g. N+1 queries) in one request from which a warning is logged
+API_METRICS_DUPLICATE_QUERIES_WARNING = config('API_METRICS_DUPLICATE_QUERIES_WARNING', default=10, cast=int)
+
+# Token a scraper sends as "Authorization: Bearer <token>" to read /metrics; staff users can read it either way
+API_METRICS_TOKEN = config('API_METRICS_TOKEN', default='')
+
+# Directory shared by the worker processes of a server, where each one writes its metrics so that /metrics
+# reports the sum over all of them; empty to report the metrics of the process answering the scrape
+API_METRICS_DIR = config('API_METRICS_DIR', default='')
+
+# Fail the requests that run more queries than the query budget of their viewset action
+API_QUERY_BUDGETS = config('API_QUERY_BUDGETS', default=DEBUG, cast=bool)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -81,9 +160,26 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetPagination',
+    'PAGE_SIZE': 100,
+    # orjson is used when installed; otherwise both fall back to the stdlib json module
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
 SWAGGER_SETTINGS = {
-    'DEFAULT_INFO': 'wht_teams.urls.api_info',
+    'DEFAULT_INFO': 'wht_teams.redoc.api_info',
 }
+# Seconds clients may cache the OpenAPI schema; it is generated once per process either way
+API_SCHEMA_CACHE_SECONDS = config('API_SCHEMA_CACHE_SECONDS', default=3600, cast=int)
 
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
@@ -91,4 +187,16 @@ USE_I18N = True
 USE_TZ = True
 
 STATIC_URL = 'static/'
+STATIC_ROOT = config('STATIC_ROOT', default=str(BASE_DIR / 'staticfiles'))
+
+if DJANGO_PROFILE == 'prod':
+    # Static files are served by the workers, compressed and with hashed names that clients cache
+    # forever. They have to be collected first with manage.py collectstatic
+    security = MIDDLEWARE.index('django.middleware.security.SecurityMiddleware')
+    MIDDLEWARE.insert(security + 1, 'whitenoise.middleware.WhiteNoiseMiddleware')
+    STORAGES = {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+    }
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -1,11 +1,18 @@
 from django.contrib import admin
 from django.urls import path, include
 
-from .redoc import api_info
+from api.metrics import metrics_view
+
+
+def docs(request, *args, **kwargs):
+    """ Serve the API docs, importing the docs machinery on the first request instead of in every worker. """
+    from .redoc import docs_view
+    return docs_view(request, *args, **kwargs)
 
 # URLS
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/v1/', include('api.urls')),
-    path('docs/', api_info.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
+    path('docs/', docs, name='schema-swagger-ui'),
+    path('metrics', metrics_view, name='metrics'),
 ]